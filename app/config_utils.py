@@ -3,6 +3,7 @@ Module with utilities needed to manage configuration files
 """
 import collections
 
+from page_generator.app import variable_providers
 from page_generator.confluence.models import json_model
 from page_generator.utils.json_utils import JsonDataFile
 
@@ -33,6 +34,7 @@ class Config(object):
         """
         self._json_data_obj = JsonDataFile(json_file)
         self._template_variables = collections.OrderedDict()
+        self._computed_variables = collections.OrderedDict()
         # validate config file structure and variables
         self._validate_mandatory_configuration()
         self._validate_template_variables()
@@ -47,6 +49,17 @@ class Config(object):
         """
         return self._template_variables
 
+    @property
+    def computed_variables(self):
+        # type: () -> dict
+        """Returns a dictionary with the template variables computed
+        by a provider when the template references them
+        $VarName = '!provider:argument'
+
+        :return: a dictionary with the computed template variables
+        """
+        return self._computed_variables
+
     def _validate_mandatory_configuration(self):
         # type: () -> None
         """Validates that json file has the mandatory values needed
@@ -70,12 +83,19 @@ class Config(object):
         # type: () -> None
         """Searches on the json configuration if there are variables
         starting with '$' character and it loads them into the template
-        variable dictionary from the instance to be available as an interface
+        variable dictionary from the instance to be available as an interface.
+
+        Values with the format '!provider:argument' (ex. '!env:BUILD_ID')
+        are loaded into the computed variables dictionary instead.
 
         :return: None.
         """
         for var_name, var_value in self._json_data_obj.json_model_dict.items():
-            if var_name.startswith('$'):
+            if not var_name.startswith('$'):
+                continue
+            if variable_providers.parse(var_value) is not None:
+                self._computed_variables[var_name] = var_value
+            else:
                 self._template_variables[var_name] = var_value
 
     def get_host_url(self):
@@ -0,0 +1,378 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module with a durable job queue (SQLite) for bulk runs: the state of
+every page job is checkpointed, so an interrupted batch can be resumed
+without generating again the finished pages or duplicating pages
+"""
+
+import collections
+import logging
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from page_generator.app import config_utils
+from page_generator.app import variable_providers
+from page_generator.app.page_manager import PageManager
+from page_generator.app.template_store import TemplateStore
+from page_generator.confluence.exceptions import ConfluenceError
+from page_generator.confluence.exceptions import ConfluenceVersionConflict
+from page_generator.utils import deadline_utils
+
+# get main logger instance
+LOGGER = logging.getLogger(__name__)
+
+# job states
+STATE_PENDING = 'pending'
+STATE_RENDERING = 'rendering'
+STATE_SUBMITTED = 'submitted'
+STATE_DONE = 'done'
+STATE_FAILED = 'failed'
+
+JOB_STATES = (STATE_PENDING, STATE_RENDERING, STATE_SUBMITTED, STATE_DONE, STATE_FAILED)
+
+Job = collections.namedtuple('Job', ['job_id', 'config_file', 'state', 'attempts',
+                                     'next_attempt_at', 'page_id', 'error'])
+Job.__doc__ = """Page job stored in the queue"""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    config_file TEXT NOT NULL UNIQUE,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    page_id TEXT,
+    error TEXT,
+    updated_at REAL NOT NULL
+)
+"""
+
+_JOB_COLUMNS = 'job_id, config_file, state, attempts, next_attempt_at, page_id, error'
+
+
+class JobQueue(object):
+    """Queue of page jobs (one per configuration file) stored in a
+    SQLite database. Every state change is committed right away:
+        pending: waiting to be run (or to be retried)
+        rendering: claimed by a worker, template being rendered
+        submitted: write request sent to the server
+        done: page written (page id stored)
+        failed: all the attempts failed
+
+    A failed attempt is scheduled again with exponential backoff until
+    max_attempts is reached. Jobs interrupted while rendering or
+    submitted are run again on resume: pages are searched by title
+    before being written, so they are never duplicated.
+    Usage:
+
+    with JobQueue('batch.db') as job_queue:
+        job_queue.add(config_files)
+        summary = job_queue.run(workers=8)
+    """
+
+    def __init__(self, db_file, max_attempts=3, retry_delay=2.0, retry_backoff=2.0):
+        # type: (str, [int], [float], [float]) -> JobQueue
+        """Constructor method
+
+        :param db_file: path of the SQLite database (created if needed)
+        :param max_attempts: number of attempts before a job is failed
+        :param retry_delay: seconds before the first retry of a job
+        :param retry_backoff: multiplier of the delay for every new retry
+        """
+        if max_attempts < 1:
+            raise ValueError("Number of attempts should be greater than 0")
+        self._db_file = db_file
+        self._max_attempts = max_attempts
+        self._retry_delay = retry_delay
+        self._retry_backoff = retry_backoff
+        self._lock = threading.Lock()
+        # connection shared by the workers, access serialized by the lock
+        self._connection = sqlite3.connect(db_file, check_same_thread=False,
+                                           isolation_level=None)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute(_SCHEMA)
+
+    def __enter__(self):
+        # type: () -> JobQueue
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        # type: () -> None
+        """Closes the database
+        """
+        with self._lock:
+            self._connection.close()
+
+    def _execute(self, sql, params=()):
+        # type: (str, tuple) -> list
+        """Runs a statement in its own transaction (committed when it returns)
+        """
+        with self._lock:
+            return self._connection.execute(sql, params).fetchall()
+
+    # -----------------
+    # Queue content
+    # -----------------
+    def add(self, config_files):
+        # type: (list[str]) -> int
+        """Adds a job for every config file not queued yet
+        (queued jobs keep their state, ex. done jobs are not run again)
+
+        :return: number of jobs added
+        """
+        now = time.time()
+        with self._lock:
+            with self._connection:
+                self._connection.execute('BEGIN')
+                added = 0
+                for config_file in config_files:
+                    cursor = self._connection.execute(
+                        'INSERT OR IGNORE INTO jobs (config_file, state, updated_at) '
+                        'VALUES (?, ?, ?)', (config_file, STATE_PENDING, now))
+                    added += cursor.rowcount
+        return added
+
+    def get_jobs(self, state=None):
+        # type: ([str]) -> list[Job]
+        """Returns the jobs of the queue (of a state if given)
+        """
+        if state is None:
+            rows = self._execute('SELECT {0} FROM jobs ORDER BY job_id'.format(_JOB_COLUMNS))
+        else:
+            rows = self._execute('SELECT {0} FROM jobs WHERE state = ? ORDER BY job_id'.format(
+                _JOB_COLUMNS), (state,))
+        return [Job(*row) for row in rows]
+
+    def counts(self):
+        # type: () -> dict
+        """Returns the number of jobs per state
+        """
+        counts = collections.OrderedDict((state, 0) for state in JOB_STATES)
+        for state, count in self._execute('SELECT state, COUNT(*) FROM jobs GROUP BY state'):
+            counts[state] = count
+        return counts
+
+    def recover(self, retry_failed=True):
+        # type: ([bool]) -> int
+        """Prepares the queue to be resumed: interrupted jobs (rendering
+        or submitted) and, if retry_failed, failed jobs are pending again
+
+        :return: number of jobs pending again
+        """
+        states = [STATE_RENDERING, STATE_SUBMITTED] + ([STATE_FAILED] if retry_failed else [])
+        with self._lock:
+            cursor = self._connection.execute(
+                'UPDATE jobs SET state = ?, next_attempt_at = 0, updated_at = ?, '
+                'attempts = CASE WHEN state = ? THEN 0 ELSE attempts END '
+                'WHERE state IN ({0})'.format(','.join('?' * len(states))),
+                [STATE_PENDING, time.time(), STATE_FAILED] + states)
+            return cursor.rowcount
+
+    # -----------------
+    # State changes
+    # -----------------
+    def claim(self):
+        # type: () -> Job
+        """Takes the next pending job due to run (state set to rendering).
+        The job is only taken if it is still pending, so a job is never
+        claimed twice by processes sharing the queue file
+
+        :return: Job instance, None if no job is due
+        """
+        with self._lock:
+            while True:
+                row = self._connection.execute(
+                    'SELECT {0} FROM jobs WHERE state = ? AND next_attempt_at <= ? '
+                    'ORDER BY next_attempt_at, job_id LIMIT 1'.format(_JOB_COLUMNS),
+                    (STATE_PENDING, time.time())).fetchone()
+                if row is None:
+                    return None
+                cursor = self._connection.execute(
+                    'UPDATE jobs SET state = ?, attempts = attempts + 1, updated_at = ? '
+                    'WHERE job_id = ? AND state = ?',
+                    (STATE_RENDERING, time.time(), row[0], STATE_PENDING))
+                if cursor.rowcount == 1:
+                    break
+                # claimed by another process in the meantime
+        job = Job(*row)
+        return job._replace(state=STATE_RENDERING, attempts=job.attempts + 1)
+
+    def get_next_attempt_at(self):
+        # type: () -> float
+        """Returns the time of the next pending job, None if there is none
+        """
+        rows = self._execute('SELECT MIN(next_attempt_at) FROM jobs WHERE state = ?',
+                             (STATE_PENDING,))
+        return rows[0][0]
+
+    def set_state(self, job, state, page_id=None):
+        # type: (Job, str, [str]) -> None
+        """Checkpoints a new state of a job
+        """
+        self._execute('UPDATE jobs SET state = ?, page_id = COALESCE(?, page_id), '
+                      'error = NULL, updated_at = ? WHERE job_id = ?',
+                      (state, page_id, time.time(), job.job_id))
+
+    def fail(self, job, error):
+        # type: (Job, Exception) -> bool
+        """Checkpoints a failed attempt of a job, scheduling a retry
+        with exponential backoff if it has attempts left and
+        the error is not permanent
+
+        :return: True if the job will be retried
+        """
+        # permanent errors of the server (ex. permissions) are not retried
+        permanent = (isinstance(error, ConfluenceError) and not error.transient and
+                     not isinstance(error, ConfluenceVersionConflict))
+        retry = job.attempts < self._max_attempts and not permanent
+        next_attempt_at = 0
+        if retry:
+            next_attempt_at = time.time() + (
+                self._retry_delay * self._retry_backoff ** (job.attempts - 1))
+        self._execute('UPDATE jobs SET state = ?, next_attempt_at = ?, error = ?, '
+                      'updated_at = ? WHERE job_id = ?',
+                      (STATE_PENDING if retry else STATE_FAILED, next_attempt_at,
+                       str(error), time.time(), job.job_id))
+        return retry
+
+    # -----------------
+    # Run
+    # -----------------
+    def run(self, workers=4, template_store=None, metrics=None, stop_event=None,
+            job_timeout=None, timeout=None):
+        # type: ([int], [TemplateStore], [metrics_utils.ClientMetrics], [threading.Event], [float], [tuple]) -> dict
+        """Runs the jobs of the queue until all of them are done or failed
+        (or the stop event is set). Interrupted jobs are not run: other
+        processes may be running them, call recover to resume them.
+
+        Every job has a deadline of job_timeout seconds for its template
+        fetch, page lookup and page write (retries included). A job that
+        exceeds it is cancelled and scheduled again like any failed attempt.
+
+        :param workers: number of jobs run at once
+        :param template_store: TemplateStore instance shared by the jobs,
+            if None a memory only store is used
+        :param metrics: ClientMetrics instance in which the metrics of the
+            requests to the server are collected, if None they are not collected
+        :param stop_event: Event to stop the workers after their current job
+        :param job_timeout: deadline in seconds of every job, if None jobs
+            are only bounded by the timeouts of their requests
+        :param timeout: (connect, read) timeout in seconds of the requests,
+            if None the default timeout is used
+        :return: number of jobs per state
+        """
+        # imported on demand: requests is only needed once the server is used
+        from page_generator.confluence import api
+        # computed variables are shared by the jobs of the run
+        variable_providers.set_default_cache(variable_providers.ProviderCache())
+        runner = _QueueRunner(self, template_store or TemplateStore(), metrics,
+                              stop_event or threading.Event(), job_timeout)
+        with api.ClientPool(metrics=metrics, timeout=timeout) as client_pool:
+            runner.client_pool = client_pool
+            runner.prefetch_templates(workers)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                worker_futures = [executor.submit(runner.work) for _ in range(workers)]
+                try:
+                    for future in worker_futures:
+                        future.result()
+                except KeyboardInterrupt:
+                    LOGGER.warning("Stopping the workers after their current job")
+                    runner.stop_event.set()
+                    raise
+        counts = self.counts()
+        LOGGER.info("Job queue: %s", ', '.join(
+            '{0} {1}'.format(count, state) for state, count in counts.items()))
+        return counts
+
+
+class _QueueRunner(object):
+    """Worker loop of JobQueue.run: claims jobs and generates their pages
+    with clients and templates shared by all the jobs
+    """
+
+    # maximum seconds a worker sleeps waiting for a retry
+    MAX_IDLE_SLEEP = 1.0
+
+    def __init__(self, job_queue, template_store, metrics, stop_event, job_timeout):
+        self.job_queue = job_queue
+        self.template_store = template_store
+        self.metrics = metrics
+        self.stop_event = stop_event
+        self.job_timeout = job_timeout
+        self.client_pool = None
+        self._authenticated = set()
+        self._lock = threading.Lock()
+
+    def work(self):
+        # type: () -> None
+        while not self.stop_event.is_set():
+            job = self.job_queue.claim()
+            if job is None:
+                next_attempt_at = self.job_queue.get_next_attempt_at()
+                if next_attempt_at is None:
+                    return
+                self.stop_event.wait(min(max(next_attempt_at - time.time(), 0.01),
+                                         _QueueRunner.MAX_IDLE_SLEEP))
+                continue
+            try:
+                with deadline_utils.deadline(self.job_timeout):
+                    page = self._run_job(job)
+            except Exception as ex:
+                if self.job_queue.fail(job, ex):
+                    LOGGER.warning("Job \"%s\" failed (attempt %d), it will be retried: %s",
+                                   job.config_file, job.attempts, ex)
+                else:
+                    LOGGER.error("Job \"%s\" failed: %s", job.config_file, ex)
+                continue
+            self.job_queue.set_state(job, STATE_DONE, page_id=page.id_number)
+
+    def _get_manager(self, config_file):
+        # type: (str) -> tuple
+        """Returns the PageManager of a config file with the shared client
+        of its server and the (host, user) key of its credentials
+        """
+        config_obj = config_utils.Config(config_file)
+        key = (config_obj.get_host_url(), PageManager.resolve_credential(config_obj.get_user()))
+        client = self.client_pool.get(
+            key[0], key[1], PageManager.resolve_credential(config_obj.get_password()))
+        manager = PageManager(config_file, template_store=self.template_store,
+                              metrics=self.metrics, confluence_client=client)
+        return manager, key
+
+    def prefetch_templates(self, workers):
+        # type: (int) -> None
+        """Planning phase of the run: the templates of all the pending
+        jobs are retrieved at once before the first job is rendered.
+        Jobs whose config file can not be read fail when their turn comes.
+
+        :param workers: maximum number of templates retrieved at once
+        """
+        managers = []
+        for job in self.job_queue.get_jobs(STATE_PENDING):
+            try:
+                managers.append(self._get_manager(job.config_file)[0])
+            except Exception as ex:
+                LOGGER.debug("Template of job \"%s\" not prefetched: %s", job.config_file, ex)
+        PageManager.prefetch_templates(managers, self.template_store, workers=workers)
+
+    def _run_job(self, job):
+        # type: (Job) -> api.Page
+        """Renders and writes the page of a job (create-or-update,
+        so a page written before an interruption is not duplicated)
+        """
+        manager, key = self._get_manager(job.config_file)
+        with self._lock:
+            # credentials already validated by a previous job are not probed again
+            manager.is_authenticated = key in self._authenticated
+        content = manager.render_page()
+        existing_page = manager.find_page()
+        with self._lock:
+            self._authenticated.add(key)
+        self.job_queue.set_state(job, STATE_SUBMITTED)
+        return manager.write_page(content, existing_page)
@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module with the end-to-end load-test harness: drives PageManager against
+a local FakeConfluenceServer and reports throughput, latency and
+requests per page.
+
+Usage:
+    python -m page_generator.app.load_harness --pages 200 --concurrency 8 --latency 0.02
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent import futures
+
+from page_generator.app.page_manager import PageManager
+from page_generator.confluence.fake_server import FakeConfluenceServer
+
+# default template used when no template file is given
+DEFAULT_TEMPLATE = (
+    u'<ac:layout><ac:layout-section ac:type="single"><ac:layout-cell>\n'
+    u'  <h1>Release $Version</h1>\n'
+    u'  <p>Generated page number $PageNumber</p>\n'
+    u'</ac:layout-cell></ac:layout-section></ac:layout>\n'
+)
+
+SPACE_KEY = 'LOAD'
+
+
+def percentile(sorted_values, fraction):
+    # type: (list[float], float) -> float
+    """Returns the percentile of a sorted list of values
+    (nearest-rank method), None if the list is empty
+
+    :param sorted_values: list of values sorted in ascending order
+    :param fraction: percentile as a fraction (ex. 0.99)
+    """
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def _write_job_config(work_dir, server, parent_page_id, source, page_number):
+    # type: (str, FakeConfluenceServer, str, str, int) -> str
+    """Writes the json config of one page job and returns its path
+    """
+    config_file = os.path.join(work_dir, 'page_{0:06d}.json'.format(page_number))
+    with open(config_file, 'w') as file_obj:
+        json.dump({
+            'host_url': server.url,
+            'user': 'load_user',
+            'pass': 'load_pass',
+            'source': source,
+            'space_key': SPACE_KEY,
+            'parent_page_id': parent_page_id,
+            'page_title': 'Load Test Page {0:06d}'.format(page_number),
+            '$Version': '1.0.{0}'.format(page_number),
+            '$PageNumber': str(page_number)
+        }, file_obj)
+    return config_file
+
+
+def run_load_test(pages=100, concurrency=4, latency=0.0, latency_jitter=0.0,
+                  error_rates=None, template_file=None, remote_template=False, seed=None):
+    # type: (int, int, float, float, [dict], [str], bool, [int]) -> dict
+    """Generates 'pages' pages through PageManager against a local fake
+    Confluence server and returns a report with pages/sec, latency
+    percentiles and requests per page.
+
+    :param pages: number of pages to generate
+    :param concurrency: number of pages generated in parallel
+    :param latency: seconds added by the server to every request
+    :param latency_jitter: maximum random seconds added to the latency
+    :param error_rates: probability of injected errors per status code
+    :param template_file: html template file (default: small built-in template)
+    :param remote_template: if True, the template is served by the fake
+        server as a confluence page and retrieved by URL
+    :param seed: seed for the random latency and error injection
+    :return: dictionary with the load-test report
+    """
+    work_dir = tempfile.mkdtemp(prefix='page_generator_load_')
+    try:
+        if template_file is None:
+            template_file = os.path.join(work_dir, 'template.html')
+            with open(template_file, 'w') as file_obj:
+                file_obj.write(DEFAULT_TEMPLATE)
+
+        with FakeConfluenceServer(latency=latency, latency_jitter=latency_jitter,
+                                  error_rates=error_rates, seed=seed) as server:
+            parent_page = server.add_page('Load Test Parent', SPACE_KEY, '<p>parent</p>')
+            source = template_file
+            if remote_template:
+                with open(template_file, 'rb') as file_obj:
+                    template_page = server.add_page(
+                        'Load Test Template', SPACE_KEY, file_obj.read().decode('utf-8'))
+                source = '{0}/pages/viewpage.action?pageId={1}'.format(
+                    server.url, template_page['id'])
+            config_files = [
+                _write_job_config(work_dir, server, parent_page['id'], source, page_number)
+                for page_number in range(pages)]
+            server.reset_stats()
+
+            latencies = []
+            errors = []
+            lock = threading.Lock()
+
+            def generate(config_file):
+                start_time = time.time()
+                try:
+                    PageManager(config_file).generate_page()
+                except Exception as ex:
+                    with lock:
+                        errors.append(str(ex))
+                    return
+                with lock:
+                    latencies.append(time.time() - start_time)
+
+            start_time = time.time()
+            with futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+                list(executor.map(generate, config_files))
+            wall_seconds = time.time() - start_time
+            stats = server.stats
+
+        latencies.sort()
+        return {
+            'pages': pages,
+            'created': len(latencies),
+            'failed': len(errors),
+            'concurrency': concurrency,
+            'wall_seconds': round(wall_seconds, 6),
+            'pages_per_second': round(len(latencies) / wall_seconds, 3) if wall_seconds else None,
+            'latency_p50': percentile(latencies, 0.50),
+            'latency_p99': percentile(latencies, 0.99),
+            'requests': stats['requests'],
+            'requests_per_page': round(float(stats['requests']) / pages, 3) if pages else None,
+            'requests_per_endpoint': stats['endpoints'],
+            'status_codes': dict((str(code), count)
+                                 for code, count in stats['status_codes'].items()),
+            'bytes_received_by_server': stats['bytes_received'],
+            'bytes_sent_by_server': stats['bytes_sent'],
+            'errors': errors[:10]
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _parse_error_rates(values):
+    # type: (list[str]) -> dict
+    """Parses error rates given as 'STATUS:RATE' strings (ex. '429:0.05')
+    """
+    error_rates = {}
+    for value in values or []:
+        status_code, rate = value.split(':', 1)
+        error_rates[int(status_code)] = float(rate)
+    return error_rates
+
+
+def main():
+    """Main Function
+    """
+    parser = argparse.ArgumentParser(description='Confluence page generator load test')
+    parser.add_argument('--pages', type=int, default=100,
+                        help='number of pages to generate')
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help='number of pages generated in parallel')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='seconds of latency added to every request')
+    parser.add_argument('--latency_jitter', type=float, default=0.0,
+                        help='maximum random seconds added to the latency')
+    parser.add_argument('--error_rate', action='append', metavar='STATUS:RATE',
+                        help='probability of an injected error (ex. 429:0.05), '
+                             'can be given several times')
+    parser.add_argument('--template_file', default=None,
+                        help='html template file used for the pages')
+    parser.add_argument('--remote_template', action='store_true',
+                        help='serve the template from a confluence page of the fake server')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='seed for the random latency and error injection')
+    args = parser.parse_args()
+
+    report = run_load_test(
+        pages=args.pages,
+        concurrency=args.concurrency,
+        latency=args.latency,
+        latency_jitter=args.latency_jitter,
+        error_rates=_parse_error_rates(args.error_rate),
+        template_file=args.template_file,
+        remote_template=args.remote_template,
+        seed=args.seed)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,16 +4,21 @@
 Module with the main API object for confluence page management
 """
 
+import collections
+import contextlib
+import io
 import logging
-import re
 import os
 from functools import wraps
 from collections import defaultdict
 
 from page_generator.app import config_utils
-from page_generator.confluence import api
-from page_generator.utils.http_utils import Auth
+from page_generator.app import reconciler
+from page_generator.app import template_store
+from page_generator.app import url_resolver
+from page_generator.app import variable_providers
 from page_generator.utils import file_utils
+from page_generator.utils import trace_utils
 
 # get main logger instance
 LOGGER = logging.getLogger(__name__)
@@ -45,10 +50,15 @@ def authenticate(function_to_decorate):
         LOGGER.info("Trying Basic Authentication - %s@%s",
                     self.get_user(),
                     self.config_obj.get_host_url())
-        if Auth.authenticate(
+        # imported on demand: requests is only needed once the server is used
+        from page_generator.utils.http_utils import Auth
+        with trace_utils.get_tracer().span('authenticate',
+                                           host=self.config_obj.get_host_url()):
+            is_valid = Auth.authenticate(
                 self.config_obj.get_host_url(),
                 self.get_user(),
-                self._credentials['password']):
+                self._credentials['password'])
+        if is_valid:
             LOGGER.debug("Basic Authentication Successful! - %s@%s",
                          self.get_user(),
                          self.config_obj.get_host_url())
@@ -72,16 +82,28 @@ class PageManager(object):
 
     ENV_PREFIX = "env."
 
-    def __init__(self, config_file):
-        # type: (str) -> PageManager
+    def __init__(self, config_file, template_store=None, metrics=None, confluence_client=None):
+        # type: (str, [template_store.TemplateStore], [metrics_utils.ClientMetrics], [api.ConfluenceClient]) -> PageManager
         """PageManager Constructor method
 
         :param config_file: path to the json config file
+        :param template_store: TemplateStore instance used to resolve
+            and cache the templates, if None templates are not cached
+        :param metrics: ClientMetrics instance in which the metrics of the
+            requests to the server are collected, if None they are not collected
+        :param confluence_client: opened ConfluenceClient instance shared
+            with other managers (ex. watch mode), so its connections stay
+            warm. if None, a new client is opened for every operation
         """
         self._config_file = config_file
         # templates
         self._template_source = None
         self._html_template = None
+        self._template_store = template_store
+        # (file state, streamed) of the last check of a local template
+        self._streamed_state = None
+        self.metrics = metrics
+        self._shared_client = confluence_client
         # authentication credentials dict
         self._credentials = {}
         # object handlers
@@ -100,6 +122,23 @@ class PageManager(object):
         """
         return self._credentials['user']
 
+    def _confluence_client(self):
+        # type: () -> api.ConfluenceClient
+        """Returns a new ConfluenceClient instance for the configured
+        host and credentials (to be used within 'with' statement)
+        """
+        if self._shared_client is not None:
+            # shared client is not closed when the 'with' block ends
+            return contextlib.nullcontext(self._shared_client)
+        # imported on demand: requests is only needed once the server is used
+        from page_generator.confluence import api
+        return api.ConfluenceClient(
+            self.config_obj.get_host_url(),
+            self._credentials['user'],
+            self._credentials['password'],
+            metrics=self.metrics
+        )
+
     def _load_template(self):
         # type: () -> None
         """Loads the source value of the configuration file gotten from the source value of the
@@ -112,6 +151,7 @@ class PageManager(object):
             raise Exception("")
         self._template_source = template_source
 
+    @trace_utils.traced('load_config_file')
     def _load_config_file(self, config_file):
         # type: (str) -> None
         """Creates a Config instance which will validate
@@ -133,29 +173,31 @@ class PageManager(object):
         LOGGER.info("Parsing Configuration file: \"%s\"", config_file)
         self.config_obj = config_utils.Config(config_file)
 
-        # check if config_obj has environment variable for USER
-        if PageManager.ENV_PREFIX in self.config_obj.get_user().lower().strip():
-            env_user = self.config_obj.get_user().strip().replace(PageManager.ENV_PREFIX, "")
-            LOGGER.debug("Retrieving value from environment variable: \"%s\"", env_user)
-            self._credentials['user'] = os.environ.get(env_user)
-            if self._credentials['user'] is None:
-                raise AssertionError(
-                    "Environment variable \"{0}\" does not exist. "
-                    "Please configure it with the confluence credentials".format(env_user))
-        else:
-            self._credentials['user'] = self.config_obj.get_user()
-
-        # check if config_obj has environment variable for PASSWORD
-        if PageManager.ENV_PREFIX in self.config_obj.get_password().lower().strip():
-            env_pass = self.config_obj.get_password().strip().replace(PageManager.ENV_PREFIX, "")
-            LOGGER.debug("Retrieving value from environment variable: \"%s\"", env_pass)
-            self._credentials['password'] = os.environ.get(env_pass)
-            if self._credentials['password'] is None:
-                raise AssertionError(
-                    "Environment variable \"{0}\" does not exist. "
-                    "Please configure it with the confluence credentials".format(env_pass))
-        else:
-            self._credentials['password'] = self.config_obj.get_password()
+        # check if config_obj has environment variables for the credentials
+        self._credentials['user'] = self.resolve_credential(self.config_obj.get_user())
+        self._credentials['password'] = self.resolve_credential(self.config_obj.get_password())
+
+    @staticmethod
+    def resolve_credential(value):
+        # type: (str) -> str
+        """Returns the value of a credential (user or password).
+        If it has the format 'env.OS_VAR', the value is retrieved
+        from that OS environment variable
+
+        :param value: configured value of the credential
+        :return: value of the credential
+        :raises AssertionError: if the environment variable does not exist
+        """
+        if PageManager.ENV_PREFIX not in value.lower().strip():
+            return value
+        env_name = value.strip().replace(PageManager.ENV_PREFIX, "")
+        LOGGER.debug("Retrieving value from environment variable: \"%s\"", env_name)
+        env_value = os.environ.get(env_name)
+        if env_value is None:
+            raise AssertionError(
+                "Environment variable \"{0}\" does not exist. "
+                "Please configure it with the confluence credentials".format(env_name))
+        return env_value
 
     def load_template_from_file(self, html_template_file):
         # type: (str) -> None
@@ -168,24 +210,66 @@ class PageManager(object):
         # Read HTML Template for Confluence
         self.template_obj = file_utils.ConfluenceHtmlTemplate(html_template_file)
 
+    @trace_utils.traced('replace_variables_in_template')
     def _replace_variables_in_template(self):
         # type: () -> None
         """Replace variables configured in config file into the HTML template
         :return: None
         """
         LOGGER.debug("Replacing variables in HTML Template")
-        for template_key, value in self.config_obj.template_variables.items():
+        variables = self.get_template_variables(
+            lambda names: set(name for name in names if name in self._html_template))
+        for template_key, value in variables.items():
             if template_key in self._html_template:
                 self._html_template = self._html_template.replace(template_key, value)
             else:
                 LOGGER.warning("Variable to replace was not found "
                                "in template: \"%s\"", template_key)
 
+    def _warn_missing_variables(self, found_variables):
+        # type: (set) -> None
+        """Warns about the configured variables that the template does
+        not reference (rendering paths that do not replace them one by one)
+
+        :param found_variables: names of the variables found in the template
+        """
+        for template_key in self.config_obj.template_variables:
+            if template_key not in found_variables:
+                LOGGER.warning("Variable to replace was not found "
+                               "in template: \"%s\"", template_key)
+
+    def get_template_variables(self, find_variables, offline=False, variable_cache=None):
+        # type: (Callable, [bool], [variable_providers.ProviderCache]) -> dict
+        """Returns the template variables of the page. Computed variables
+        are only computed if the template references them, their values
+        are memoized for the whole batch (see variable_providers)
+
+        :param find_variables: function that returns the names of a set of
+            variables that are referenced by the template
+            (ex. CompiledTemplate.find_variables)
+        :param offline: if True, providers can not connect to the server
+        :param variable_cache: ProviderCache in which the computed variables
+            are memoized, if None the one of the batch is used
+        :return: a dictionary with the template variables
+        """
+        computed_variables = self.config_obj.computed_variables
+        if not computed_variables:
+            return self.config_obj.template_variables
+        variables = collections.OrderedDict(self.config_obj.template_variables)
+        variables.update(computed_variables)
+        context = variable_providers.ProviderContext(
+            os.path.dirname(os.path.abspath(self._config_file)),
+            host=self.config_obj.get_host_url(),
+            confluence_client=None if offline else self._confluence_client)
+        return variable_providers.resolve_variables(
+            variables, find_variables, context, cache=variable_cache)
+
     @staticmethod
     def get_space_from_url(url):
         # type: (str) -> str
         """Retrieves the space from a normal confluence page URL.
-        This function will not accept URLs with page ID in it.
+        This function will not accept URLs with page ID in it,
+        except the '/spaces/KEY/pages/ID/Title' format.
 
         Ex: http://buic-confluence.conti.de:8090/display/IIC/I+IC
         will return 'IIC' as the space
@@ -193,13 +277,11 @@ class PageManager(object):
         :param url: full url of the confluence page to look for
         :return: a string with the confluence space
         """
-        url_pattern = re.compile(r'https?://[-\w_.]*:?\d{0,5}(.*)')
-        url_data_pattern = re.compile(r'/display/([-\w_?~]*)/(.*)')
-
-        if re.search(url_pattern, url):
-            url_data = re.match(url_pattern, url).group(1)
-            space = re.match(url_data_pattern, url_data).group(1)
-        else:
+        try:
+            space = url_resolver.parse_url(url).space_key
+        except ValueError:
+            space = None
+        if space is None:
             raise Exception("Confluence space not found in URL: \"{0}\"".format(url))
         return space
 
@@ -207,9 +289,11 @@ class PageManager(object):
     def get_page_title_from_url(url, formatted=True):
         # type: (str, bool) -> str
         """Retrieves the page title from a normal confluence page URL.
-        This function will not accept URLs with page ID in it.
+        This function will not accept URLs with page ID in it,
+        except the '/spaces/KEY/pages/ID/Title' format.
 
-        if 'formatted' is set to True, it will replace all '+' characters for spaces
+        if 'formatted' is set to True, it will decode the title
+        ('+' characters and %XX escapes)
 
         formatted=True:
         Ex: http://buic-confluence.conti.de:8090/display/~uidj5418/My+Page+1
@@ -224,18 +308,13 @@ class PageManager(object):
             flag to indicated if '+' characters should be replace for spaces
         :return:
         """
-
-        url_pattern = re.compile(r'https?://[-\w_.]*:?\d{0,5}(.*)')
-        url_data_pattern = re.compile(r'/display/([-\w_?~]*)/(.*)')
-
-        if re.search(url_pattern, url):
-            url_data = re.match(url_pattern, url).group(1)
-            title = re.match(url_data_pattern, url_data).group(2)
-            if formatted:
-                title = title.replace('+', ' ')
-        else:
+        try:
+            location = url_resolver.parse_url(url)
+        except ValueError:
+            location = None
+        if location is None or location.raw_title is None:
             raise Exception("Confluence page title not found in URL: \"{0}\"".format(url))
-        return title
+        return location.title if formatted else location.raw_title
 
     @staticmethod
     def is_url(url):
@@ -248,31 +327,30 @@ class PageManager(object):
         :return: True if valid URL is given. Otherwise returns False
         :rtype: bool
         """
-        url_pattern = re.compile(r'https?://[-\w_.]*:?\d{0,5}(.*)')
-        if url_pattern.match(url):
-            return True
-        return False
+        return url_resolver.is_url(url)
 
     @staticmethod
     def is_id_in_url(url):
         # type: (str) -> bool
         """Returns True if a given URL has page id in it
         ex. http://buic-confluence.conti.de:8090/pages/viewpage.action?pageId=102948555
+        ex. https://confluence.example.com/wiki/spaces/DEV/pages/102948555/Page
 
         :param url:     string with the url
         :return: True if URL has page id in it. Otherwise returns False
         :rtype: bool
         """
-        id_pattern = re.compile(r'.*pageId=(\d+)$')
-        if id_pattern.match(url):
-            return True
-        return False
+        try:
+            return url_resolver.is_id_in_url(url)
+        except ValueError:
+            return False
 
     @staticmethod
     def get_id_from_url(url):
         # type: (str) -> str
         """Retrieves the page id number from a confluence page URL
-        that has the format with 'pageId' variable.
+        that has the format with 'pageId' variable
+        or the '/spaces/KEY/pages/ID/Title' format.
 
         Ex: http://buic-confluence.conti.de:8090/pages/viewpage.action?pageId=102948555
         will return '102948555' as the page id
@@ -280,24 +358,125 @@ class PageManager(object):
         :param url: full url of the confluence page to look for
         :return: a string with the confluence space
         """
-        url_pattern = re.compile(r'https?://[-\w_.]*:?\d{0,5}(.*)')
-        url_id_pattern = re.compile(r'.*pageId=(\d+)$')
-
-        if re.search(url_pattern, url):
-            url_data = re.match(url_pattern, url).group(1)
-            page_id = re.match(url_id_pattern, url_data).group(1)
-        else:
+        try:
+            page_id = url_resolver.parse_url(url).page_id
+        except ValueError:
+            page_id = None
+        if page_id is None:
             raise Exception("pageId not found in URL: \"{0}\"".format(url))
         return page_id
 
+    @property
+    def template_source(self):
+        # type: () -> str
+        """Returns the configured template source (URL or file path)
+        """
+        return self._template_source
+
+    def is_template_from_file(self):
+        # type: () -> bool
+        """Returns True if the template source configured is a local file
+        """
+        return not self.is_url(self._template_source)
+
+    def is_template_streamed(self):
+        # type: () -> bool
+        """Returns True if the template is a local file rendered by
+        streaming it (templates with include directives, or minified
+        templates, are compiled in the template store instead)
+        """
+        if not self.is_template_from_file() or (
+                self._template_store is not None and self._template_store.minify):
+            return False
+        # checked once per version of the file
+        file_stat = os.stat(self._template_source)
+        file_state = (file_stat.st_mtime_ns, file_stat.st_size)
+        if self._streamed_state is None or self._streamed_state[0] != file_state:
+            with file_utils.MappedTemplateFile(self._template_source) as template:
+                self._streamed_state = (
+                    file_state, not template.contains(template_store.INCLUDE_MARKER))
+        return self._streamed_state[1]
+
+    def render_page_to(self, output):
+        # type: (io.BufferedIOBase) -> int
+        """Renders the configured page into a binary output stream
+        (ex. io.BytesIO or a file opened with 'wb').
+
+        Local file templates are memory mapped and rendered in chunks,
+        so the template is never loaded as a whole string.
+
+        :param output: binary stream in which the page is written
+        :return: number of bytes written
+        """
+        if self.is_template_streamed():
+            LOGGER.debug("Rendering HTML template file: \"%s\"", self._template_source)
+            with file_utils.MappedTemplateFile(self._template_source) as template:
+                written = template.render_to(
+                    output, self.get_template_variables(template.find_variables))
+                self._warn_missing_variables(template.found_variables)
+                return written
+        self._setup_html_template()
+        content = self._html_template.encode(file_utils.MappedTemplateFile.ENCODING)
+        output.write(content)
+        return len(content)
+
+    def render_page_offline(self, output):
+        # type: (io.BufferedIOBase) -> int
+        """Renders the configured page into a binary output stream
+        without authenticating or connecting to the server.
+
+        Remote templates are read from the local template cache,
+        so they should have been cached by a previous generation.
+
+        :param output: binary stream in which the page is written
+        :return: number of bytes written
+        :raises IOError: if the template is not available locally
+        """
+        store = self._template_store or template_store.TemplateStore()
+        template_path = store.resolve_local_path(self._template_source)
+        with file_utils.MappedTemplateFile(template_path) as template:
+            if not store.minify and not template.contains(template_store.INCLUDE_MARKER):
+                written = template.render_to(
+                    output, self.get_template_variables(template.find_variables, offline=True))
+                self._warn_missing_variables(template.found_variables)
+                return written
+        # fragments are read from the local files and the template cache
+        content = self._render_compiled(
+            store.get_compiled(self._template_source), offline=True).encode(
+            file_utils.MappedTemplateFile.ENCODING)
+        output.write(content)
+        return len(content)
+
+    @trace_utils.traced('setup_html_template')
     def _setup_html_template(self):
         # type: () -> None
-        """
+        """Retrieves the html template from its source and
+        replaces the configured variables in it
 
         :return: None
         """
+        if self._html_template is None and self.is_template_streamed():
+            buffer_obj = io.BytesIO()
+            self.render_page_to(buffer_obj)
+            self._html_template = buffer_obj.getvalue().decode(
+                file_utils.MappedTemplateFile.ENCODING)
+            return
+        store = self._template_store or template_store.TemplateStore()
+        if self._html_template is None and (store.is_compiled(self._template_source) or
+                                            self.is_template_from_file()):
+            # template already retrieved by the planning phase of the batch
+            # (or a local template with include directives)
+            self._html_template = self.render_page()
+            return
         if self._html_template is None:
             self._html_template = self.get_page_content_by_url(self._template_source)
+            if store.minify or template_store.INCLUDE_MARKER in self._html_template:
+                store.put(self._template_source, self._html_template)
+                self._html_template = self._render_compiled(store.get_compiled(
+                    self._template_source, loader=self.get_page_content_by_url))
+                return
+            if self._template_store is not None:
+                self._template_store.put(self._template_source, self._html_template)
         self._replace_variables_in_template()
 
     @authenticate
@@ -316,15 +495,14 @@ class PageManager(object):
         :return: None
         """
 
-        self._setup_html_template()
+        # file templates are streamed while rendering on page creation
+        streamed = self.is_template_streamed()
+        if not streamed:
+            self._setup_html_template()
 
         confluence_page = None
         # Start Confluence API
-        with api.ConfluenceClient(
-            self.config_obj.get_host_url(),
-            self._credentials['user'],
-            self._credentials['password']
-        ) as confluence_instance:
+        with self._confluence_client() as confluence_instance:
 
             LOGGER.info("Creating Confluence Page: \"%s\" inside Space: \"%s\"",
                         self.config_obj.get_page_title(),
@@ -332,12 +510,20 @@ class PageManager(object):
 
             # Create confluence page with HTML template content
             try:
-                confluence_page = confluence_instance.create_page(
-                    self.config_obj.get_page_title(),
-                    self.config_obj.get_space_key(),
-                    self._html_template,
-                    self.config_obj.get_parent_page_id()
-                )
+                with trace_utils.get_tracer().span(
+                        'create_page',
+                        title=self.config_obj.get_page_title(),
+                        streamed=streamed):
+                    if streamed:
+                        confluence_page = self._create_page_from_template_file(
+                            confluence_instance)
+                    else:
+                        confluence_page = confluence_instance.create_page(
+                            self.config_obj.get_page_title(),
+                            self.config_obj.get_space_key(),
+                            self._html_template,
+                            self.config_obj.get_parent_page_id()
+                        )
             except Exception as ex:
                 raise AssertionError("ERROR: Confluence page could not be created: {0}".format(ex))
 
@@ -348,6 +534,149 @@ class PageManager(object):
             LOGGER.info("Confluence Page successfully created: %s", gen_page_url)
         return confluence_page
 
+    def render_page(self, variable_cache=None):
+        # type: ([variable_providers.ProviderCache]) -> str
+        """Renders the configured page with the compiled template
+        of the template store, so templates shared by several pages
+        (or rendered again) are retrieved and compiled only once
+
+        :param variable_cache: ProviderCache in which the computed variables
+            are memoized, if None the one of the batch is used
+        :return: html content of the page
+        """
+        store = self._template_store or template_store.TemplateStore()
+        return self._render_compiled(
+            store.get_compiled(self._template_source, loader=self.get_page_content_by_url),
+            variable_cache=variable_cache)
+
+    def _render_compiled(self, template, offline=False, variable_cache=None):
+        # type: (template_store.CompiledTemplate, [bool], [variable_providers.ProviderCache]) -> str
+        """Renders the configured page with a compiled template,
+        reporting the bytes saved by its minification
+
+        :param template: CompiledTemplate instance
+        :param offline: if True, variables are computed without the server
+        :param variable_cache: ProviderCache of the computed variables,
+            if None the one of the batch is used
+        :return: html content of the page
+        """
+        if template.bytes_saved:
+            LOGGER.info("Minified template of page \"%s\": %d of %d bytes saved",
+                        self.config_obj.get_page_title(), template.bytes_saved,
+                        template.source_size)
+            if self.metrics is not None:
+                self.metrics.increment('minify_bytes_saved', template.bytes_saved)
+        self._warn_missing_variables(template.find_variables(self.config_obj.template_variables))
+        return template.render(
+            self.get_template_variables(template.find_variables, offline=offline,
+                                        variable_cache=variable_cache))
+
+    @staticmethod
+    def prefetch_templates(managers, store, workers=None, refresh=False):
+        # type: (Iterable[PageManager], template_store.TemplateStore, [int], [bool]) -> dict
+        """Retrieves the distinct templates of a batch of pages at once
+        before any page is rendered (see TemplateStore.prefetch).
+        Streamed local templates are skipped, they are never loaded as a whole
+
+        :param managers: PageManager instances of the batch
+        :param store: TemplateStore instance shared by the managers
+        :param workers: maximum number of templates retrieved at once
+        :param refresh: if True, remote templates are retrieved again
+            even if they are cached
+        :return: dictionary source -> exception of the failed templates
+        """
+        loaders = {}
+        for manager in managers:
+            if manager.is_template_streamed():
+                continue
+            loaders.setdefault(manager.template_source, None if manager.is_template_from_file()
+                               else manager.get_page_content_by_url)
+        return store.prefetch(loaders, workers=workers, refresh=refresh)
+
+    @authenticate
+    def find_page(self):
+        # type: () -> api.Page
+        """Searches the configured page (by title) in the configured space
+
+        :return: Page instance, None if the page does not exist
+        """
+        with self._confluence_client() as confluence_instance:
+            try:
+                return confluence_instance.get_page_from_title(
+                    self.config_obj.get_page_title(), self.config_obj.get_space_key())
+            except IndexError:
+                return None
+
+    @authenticate
+    def write_page(self, content, existing_page):
+        # type: (str, [api.Page]) -> api.Page
+        """Creates the configured page or, if it already exists, updates it.
+        Pages whose content did not change are not written: the server
+        normalises the bodies, so the hash of the written content is
+        stored in the version message and compared (see reconciler).
+
+        :param content: html content of the page
+        :param existing_page: Page with the current version of the page
+            (see find_page), None if the page does not exist
+        :return: Page created, updated or unchanged (existing_page)
+        """
+        page_title = self.config_obj.get_page_title()
+        space_key = self.config_obj.get_space_key()
+        with self._confluence_client() as confluence_instance:
+            with trace_utils.get_tracer().span('publish_page', title=page_title):
+                if existing_page is None:
+                    LOGGER.info("Creating Confluence Page: \"%s\" inside Space: \"%s\"",
+                                page_title, space_key)
+                    return confluence_instance.create_page(
+                        page_title, space_key, content, self.config_obj.get_parent_page_id(),
+                        version_message=reconciler.get_version_message(content))
+                stored_hash = reconciler.get_message_hash(existing_page.version_message)
+                if stored_hash is None:
+                    # last version not written by the page generator (ex. edited by hand)
+                    stored_hash = reconciler.content_hash(existing_page.content)
+                if stored_hash == reconciler.content_hash(content):
+                    LOGGER.info("Confluence Page is up to date: \"%s\"", page_title)
+                    return existing_page
+                LOGGER.info("Updating Confluence Page: \"%s\" inside Space: \"%s\"",
+                            page_title, space_key)
+                return confluence_instance.update_page(
+                    existing_page.id_number, page_title, space_key, content,
+                    existing_page.version_number + 1, self.config_obj.get_parent_page_id(),
+                    version_message=reconciler.get_version_message(content))
+
+    @authenticate
+    def publish_page(self):
+        # type: () -> api.Page
+        """Creates the configured page or, if a page with the same title
+        already exists in the space, updates it (create-or-update).
+        Pages whose content did not change are not written.
+
+        :return: Page created, updated or unchanged
+        """
+        with trace_utils.get_tracer().span('render_page', title=self.config_obj.get_page_title()):
+            content = self.render_page()
+        return self.write_page(content, self.find_page())
+
+    def _create_page_from_template_file(self, confluence_instance):
+        # type: (api.ConfluenceClient) -> api.Page
+        """Creates the configured page streaming the local template file
+        into the request body while the variables are being replaced,
+        so neither the rendered page nor the json payload are built
+        in memory.
+
+        :param confluence_instance: ConfluenceClient opened instance
+        :return: Page created
+        """
+        with file_utils.MappedTemplateFile(self._template_source) as template:
+            page = confluence_instance.create_page_from_chunks(
+                self.config_obj.get_page_title(),
+                self.config_obj.get_space_key(),
+                template.iter_chunks(self.get_template_variables(template.find_variables)),
+                self.config_obj.get_parent_page_id()
+            )
+            self._warn_missing_variables(template.found_variables)
+        return page
+
     @authenticate
     def delete_page(self, page_id):
         # type: (str) -> None
@@ -357,11 +686,7 @@ class PageManager(object):
         :return:
         """
         # Start Confluence API
-        with api.ConfluenceClient(
-            self.config_obj.get_host_url(),
-            self._credentials['user'],
-            self._credentials['password']
-        ) as confluence_instance:
+        with self._confluence_client() as confluence_instance:
 
             LOGGER.info("Delete Confluence Page with ID: \"%s\" inside Space: \"%s\"",
                         page_id,
@@ -385,11 +710,7 @@ class PageManager(object):
         :return: string with the html content of the page
         """
         # Start Confluence API
-        with api.ConfluenceClient(
-            self.config_obj.get_host_url(),
-            self._credentials['user'],
-            self._credentials['password']
-        ) as confluence_instance:
+        with self._confluence_client() as confluence_instance:
             LOGGER.debug("Getting Content from Page with ID: \"%s\"", page_id)
 
             try:
@@ -462,11 +783,7 @@ class PageManager(object):
         :return: string with the html content of the page
         """
         # Start Confluence API
-        with api.ConfluenceClient(
-            self.config_obj.get_host_url(),
-            self._credentials['user'],
-            self._credentials['password']
-        ) as confluence_instance:
+        with self._confluence_client() as confluence_instance:
 
             # try to search the confluence page in that space
             # with that title, if not found None will be returned
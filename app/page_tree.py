@@ -0,0 +1,482 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module to generate a whole tree of confluence pages from a single
+tree job specification, in parallel and creating every parent page
+before its children.
+
+Tree file format (json):
+
+{
+    "host_url": "http://confluence.example.com:8090",
+    "user": "env.CONFLUENCE_USER",
+    "pass": "env.CONFLUENCE_PASS",
+    "space_key": "REL",
+    "parent_page_id": "102948555",
+    "source": "templates/default.html",
+    "$Release": "1.0",
+    "pages": [
+        {
+            "id": "release",
+            "page_title": "Release 1.0",
+            "source": "templates/release.html",
+            "children": [
+                {"page_title": "Component A", "$Component": "A"},
+                {"page_title": "Component B", "$Component": "B"}
+            ]
+        }
+    ]
+}
+
+Settings ('source', 'space_key') and '$' variables are inherited from the
+outer levels. Top level pages are created under 'parent_page_id', the
+other pages under the page created for their parent node. The 'id' of a
+node is optional, the page title is used by default.
+
+Variables can reference the page created by another node of the tree
+with the value '@<id>.<field>', where field is 'id', 'title' or 'link'
+(permanent link), ex. "$ReleaseLink": "@release.link". The referenced
+page is created before the pages that reference it.
+
+Computed variables ('!provider:argument', see variable_providers) are
+resolved from the directory of the tree file.
+"""
+
+import collections
+import contextlib
+import io
+import json
+import logging
+import os
+import re
+from functools import partial
+
+from page_generator.app import url_resolver
+from page_generator.app.page_manager import PageManager
+from page_generator.app import scheduler
+from page_generator.app import variable_providers
+from page_generator.app.template_store import TemplateStore
+from page_generator.confluence.models import json_model
+from page_generator.utils import deadline_utils
+from page_generator.utils import trace_utils
+
+# get main logger instance
+LOGGER = logging.getLogger(__name__)
+
+# variable value referencing the page of another job, ex. '@release.link'
+REFERENCE_PATTERN = re.compile(r'^@(.+)\.(id|title|link)$')
+
+PageJob = collections.namedtuple('PageJob', [
+    'job_id', 'parent_job_id', 'page_title', 'source',
+    'space_key', 'parent_page_id', 'variables'])
+PageJob.__doc__ = """Page of a tree job, parent_page_id is only set for
+top level pages (the others use the id of the page of parent_job_id)"""
+
+
+class PageTree(object):
+    """Generates the pages of a tree job specification.
+
+    All the pages are created with a single authentication and a shared
+    ConfluenceClient. Pages are scheduled with DagScheduler: every page
+    is created as soon as its parent page and the pages it references
+    exist, with up to 'workers' pages being created at once. Templates
+    shared by several pages are retrieved and compiled only once.
+    """
+
+    MANDATORY_TREE_LIST = [
+        json_model.JSON_ATTR_HOST_URL,
+        json_model.JSON_ATTR_USER,
+        json_model.JSON_ATTR_PASS,
+        json_model.JSON_ATTR_PAGES
+    ]
+
+    # settings inherited by the nested pages
+    INHERITED_SETTINGS = [
+        json_model.JSON_ATTR_SOURCE,
+        json_model.JSON_ATTR_SPACE_KEY
+    ]
+
+    def __init__(self, tree_file, template_store=None, metrics=None, job_timeout=None):
+        # type: (str, [TemplateStore], [metrics_utils.ClientMetrics], [float]) -> PageTree
+        """Constructor method
+
+        :param tree_file: path to the json tree job file
+        :param template_store: TemplateStore instance used to resolve
+            and cache the templates, if None a memory store is used
+        :param metrics: ClientMetrics instance in which the metrics of the
+            requests to the server are collected, if None they are not collected
+        :param job_timeout: deadline in seconds of every page (template,
+            rendering, write and retries), if None pages have no deadline
+        """
+        self._tree_file = tree_file
+        self._job_timeout = job_timeout
+        self._template_store = template_store or TemplateStore()
+        self.metrics = metrics
+        self._settings = {}
+        self._credentials = {}
+        self._jobs = collections.OrderedDict()
+        self._errors = {}
+        self._load_tree_file(tree_file)
+
+    @property
+    def jobs(self):
+        # type: () -> dict
+        """Returns an ordered dictionary job_id -> PageJob,
+        parents are always before their children
+        """
+        return self._jobs
+
+    @property
+    def errors(self):
+        # type: () -> dict
+        """Returns a dictionary job_id -> exception of the pages
+        that could not be created in the last generation
+        """
+        return self._errors
+
+    @trace_utils.traced('load_tree_file')
+    def _load_tree_file(self, tree_file):
+        # type: (str) -> None
+        """Loads and validates the tree job file, creating a PageJob
+        for every page of the tree
+
+        :param tree_file: path to the json tree job file
+        :raises AttributeError: if a mandatory attribute is not configured
+        :raises ValueError: if a job id is duplicated
+        """
+        LOGGER.info("Parsing page tree file: \"%s\"", tree_file)
+        with io.open(tree_file, encoding='utf-8') as file_obj:
+            self._settings = json.load(file_obj)
+        for tree_attr in PageTree.MANDATORY_TREE_LIST:
+            if tree_attr not in self._settings:
+                raise AttributeError(
+                    "page tree file does not contain mandatory attribute \"{attr}\". "
+                    "Please be sure to add it and configure it in: "
+                    "\"{tree_file}\"".format(attr=tree_attr, tree_file=tree_file))
+        self._credentials['user'] = PageManager.resolve_credential(
+            self._settings[json_model.JSON_ATTR_USER])
+        self._credentials['password'] = PageManager.resolve_credential(
+            self._settings[json_model.JSON_ATTR_PASS])
+        self._add_jobs(self._settings[json_model.JSON_ATTR_PAGES], None, self._settings)
+        if not self._jobs:
+            raise AttributeError("page tree file does not contain any page: "
+                                 "\"{0}\"".format(tree_file))
+        # validate references: unknown pages and cycles
+        scheduler.get_levels(self.get_dependencies())
+
+    @staticmethod
+    def get_references(job):
+        # type: (PageJob) -> dict
+        """Returns the variables of a job that reference another job
+
+        :param job: PageJob instance
+        :return: dictionary variable name -> (job_id, field)
+        """
+        references = {}
+        for name, value in job.variables.items():
+            reference_match = REFERENCE_PATTERN.match(value) if isinstance(value, str) else None
+            if reference_match:
+                references[name] = reference_match.groups()
+        return references
+
+    def get_dependencies(self):
+        # type: () -> dict
+        """Returns the dependency graph of the jobs: every job depends
+        on the job of its parent node and on the jobs it references
+
+        :return: ordered dictionary job_id -> list of job ids
+        """
+        dependencies = collections.OrderedDict()
+        for job in self._jobs.values():
+            job_dependencies = [job.parent_job_id] if job.parent_job_id else []
+            for job_id, _ in self.get_references(job).values():
+                if job_id not in job_dependencies:
+                    job_dependencies.append(job_id)
+            dependencies[job.job_id] = job_dependencies
+        return dependencies
+
+    @staticmethod
+    def _get_variables(node):
+        # type: (dict) -> dict
+        """Returns the template variables ('$' attributes) of a node
+        """
+        return collections.OrderedDict(
+            (name, value) for name, value in node.items() if name.startswith('$'))
+
+    def _add_jobs(self, nodes, parent_job, inherited):
+        # type: (list[dict], [PageJob], dict) -> None
+        """Adds a PageJob for every node and its children
+
+        :param nodes: list with the page nodes of a level
+        :param parent_job: PageJob of the parent node, None for top level pages
+        :param inherited: settings and variables of the outer level
+        """
+        for node in nodes:
+            settings = dict((name, node.get(name, inherited.get(name)))
+                            for name in PageTree.INHERITED_SETTINGS)
+            variables = self._get_variables(inherited)
+            variables.update(self._get_variables(node))
+
+            page_title = node.get(json_model.JSON_ATTR_PAGE_TITLE)
+            job_id = node.get(json_model.JSON_ATTR_JOB_ID, page_title)
+            for attr, value in ((json_model.JSON_ATTR_PAGE_TITLE, page_title),
+                                (json_model.JSON_ATTR_SOURCE,
+                                 settings[json_model.JSON_ATTR_SOURCE]),
+                                (json_model.JSON_ATTR_SPACE_KEY,
+                                 settings[json_model.JSON_ATTR_SPACE_KEY])):
+                if not value:
+                    raise AttributeError(
+                        "page \"{job}\" of the page tree does not configure "
+                        "attribute \"{attr}\"".format(job=job_id or page_title, attr=attr))
+            if job_id in self._jobs:
+                raise ValueError("page id \"{0}\" is duplicated in the page tree".format(job_id))
+
+            source = settings[json_model.JSON_ATTR_SOURCE]
+            if not url_resolver.is_url(source) and not os.path.exists(source):
+                raise IOError("Template file '{0}' does not exist".format(source))
+
+            parent_page_id = None
+            if parent_job is None:
+                parent_page_id = node.get(json_model.JSON_ATTR_PARENT_PAGE_ID,
+                                          self._settings.get(json_model.JSON_ATTR_PARENT_PAGE_ID))
+                if not parent_page_id:
+                    raise AttributeError(
+                        "top level page \"{0}\" of the page tree does not configure "
+                        "attribute \"{1}\"".format(job_id, json_model.JSON_ATTR_PARENT_PAGE_ID))
+
+            job = PageJob(job_id, parent_job.job_id if parent_job else None, page_title,
+                          source, settings[json_model.JSON_ATTR_SPACE_KEY],
+                          parent_page_id, variables)
+            self._jobs[job_id] = job
+
+            node_settings = dict(settings, **variables)
+            self._add_jobs(node.get(json_model.JSON_ATTR_CHILDREN, []), job, node_settings)
+
+    def _confluence_client(self):
+        # type: () -> api.ConfluenceClient
+        """Returns a new ConfluenceClient instance for the configured
+        host and credentials (to be used within 'with' statement)
+        """
+        # imported on demand: requests is only needed once the server is used
+        from page_generator.confluence import api
+        return api.ConfluenceClient(
+            self._settings[json_model.JSON_ATTR_HOST_URL],
+            self._credentials['user'],
+            self._credentials['password'],
+            metrics=self.metrics
+        )
+
+    def _authenticate(self):
+        # type: () -> None
+        """Validates the credentials once for all the pages
+
+        :raises AssertionError: if the credentials are not valid
+        """
+        from page_generator.utils.http_utils import Auth
+        host = self._settings[json_model.JSON_ATTR_HOST_URL]
+        LOGGER.info("Trying Basic Authentication - %s@%s", self._credentials['user'], host)
+        with trace_utils.get_tracer().span('authenticate', host=host):
+            is_valid = Auth.authenticate(
+                host, self._credentials['user'], self._credentials['password'])
+        if not is_valid:
+            error_msg = "Authentication Error: check that user and password are correct"
+            LOGGER.error(error_msg)
+            raise AssertionError(error_msg)
+
+    def prefetch_templates(self, confluence_instance):
+        # type: (api.ConfluenceClient) -> dict
+        """Retrieves the distinct templates of all the pages at once before
+        the first page is created, so page creation never waits for them
+
+        :param confluence_instance: ConfluenceClient opened instance
+        :return: dictionary source -> exception of the failed templates
+        """
+        loader = partial(self._load_remote_template, confluence_instance)
+        return self._template_store.prefetch(dict(
+            (job.source, loader) for job in self._jobs.values()))
+
+    def build_scheduler(self, confluence_instance, workers=4):
+        # type: (api.ConfluenceClient, [int]) -> scheduler.DagScheduler
+        """Returns a DagScheduler with a task for every page of the tree,
+        every page depends on the page of its parent node and on the
+        pages it references
+
+        :param confluence_instance: ConfluenceClient opened instance
+        :param workers: maximum number of pages created at once
+        """
+        dag_scheduler = scheduler.DagScheduler(max_workers=workers)
+        for job_id, dependencies in self.get_dependencies().items():
+            dag_scheduler.add_task(
+                job_id,
+                partial(self._create_page, confluence_instance, self._jobs[job_id]),
+                depends_on=dependencies)
+        return dag_scheduler
+
+    def generate(self, workers=4):
+        # type: ([int]) -> dict
+        """Generates all the pages of the tree
+
+        Pages whose parent page could not be created are not generated,
+        the failed pages are available in 'errors'.
+
+        :param workers: maximum number of pages created at once
+        :return: dictionary job_id -> Page created
+        """
+        self._authenticate()
+        with self._confluence_client() as confluence_instance:
+            self.prefetch_templates(confluence_instance)
+            dag_scheduler = self.build_scheduler(confluence_instance, workers)
+            pages = dag_scheduler.run()
+        self._errors = dag_scheduler.errors
+        LOGGER.info("Page tree generated: %d page(s) created, %d failed",
+                    len(pages), len(self._errors))
+        return pages
+
+    def reconcile(self, workers=4, dry_run=False):
+        # type: ([int], [bool]) -> dict
+        """Reconciles the pages under the parent page with the tree:
+        only missing, changed or moved pages are written and the pages
+        under the parent page that are not in the tree are deleted.
+
+        All top level pages should share the same parent page and all
+        the pages the same space. References to the 'id' or 'link' of
+        other pages are not supported (they would need the pages to be
+        created first).
+
+        :param workers: maximum number of requests sent at once
+        :param dry_run: if True, the plan is only computed
+        :return: reconcile summary (see reconciler.Reconciler.reconcile)
+        :raises ValueError: if the tree can not be reconciled
+        """
+        from page_generator.app import reconciler
+        root_page_ids = set(str(job.parent_page_id) for job in self._jobs.values()
+                            if job.parent_job_id is None)
+        space_keys = set(job.space_key for job in self._jobs.values())
+        if len(root_page_ids) != 1 or len(space_keys) != 1:
+            raise ValueError("page tree should have a single parent page and space "
+                             "to be reconciled: \"{0}\"".format(self._tree_file))
+        self._authenticate()
+        with self._confluence_client() as confluence_instance:
+            self.prefetch_templates(confluence_instance)
+            desired_pages = self.get_desired_pages(confluence_instance)
+            reconciler_obj = reconciler.Reconciler(
+                confluence_instance, space_keys.pop(), root_page_ids.pop(), workers=workers,
+                job_timeout=self._job_timeout)
+            summary = reconciler_obj.reconcile(desired_pages, dry_run=dry_run)
+        self._errors = summary['errors']
+        return summary
+
+    def get_desired_pages(self, confluence_instance):
+        # type: (api.ConfluenceClient) -> list[reconciler.DesiredPage]
+        """Renders the pages of the tree as the desired state
+        of a reconciliation
+
+        :param confluence_instance: ConfluenceClient opened instance
+            (to retrieve the remote templates)
+        :return: list of DesiredPage
+        :raises ValueError: if a page references the id or link of another page
+        """
+        from page_generator.app import reconciler
+        desired_pages = []
+        for job in self._jobs.values():
+            variables = collections.OrderedDict(job.variables)
+            for name, (job_id, field) in self.get_references(job).items():
+                if field != 'title':
+                    raise ValueError(
+                        "page \"{0}\" references the {1} of page \"{2}\", only title "
+                        "references can be reconciled".format(job.job_id, field, job_id))
+                variables[name] = self._jobs[job_id].page_title
+            parent_title = None
+            if job.parent_job_id is not None:
+                parent_title = self._jobs[job.parent_job_id].page_title
+            with deadline_utils.deadline(self._job_timeout):
+                template = self._template_store.get_compiled(
+                    job.source, loader=partial(self._load_remote_template, confluence_instance))
+                content = template.render(
+                    self._compute_variables(confluence_instance, template, variables))
+            desired_pages.append(reconciler.DesiredPage(job.page_title, content, parent_title))
+        return desired_pages
+
+    def _create_page(self, confluence_instance, job, dependency_results):
+        # type: (api.ConfluenceClient, PageJob, dict) -> api.Page
+        """Creates the page of a job (scheduler task)
+
+        :param confluence_instance: ConfluenceClient opened instance
+        :param job: PageJob of the page
+        :param dependency_results: dictionary job_id -> Page
+            created for the jobs this job depends on
+        :return: Page created
+        """
+        parent_page_id = job.parent_page_id
+        if job.parent_job_id is not None:
+            parent_page_id = dependency_results[job.parent_job_id].id_number
+        with trace_utils.get_tracer().span('page', job_id=job.job_id), \
+                deadline_utils.deadline(self._job_timeout):
+            template = self._template_store.get_compiled(
+                job.source, loader=partial(self._load_remote_template, confluence_instance))
+            LOGGER.info("Creating Confluence Page: \"%s\" inside Space: \"%s\"",
+                        job.page_title, job.space_key)
+            with trace_utils.get_tracer().span('create_page', title=job.page_title):
+                return confluence_instance.create_page(
+                    job.page_title,
+                    job.space_key,
+                    template.render(self._compute_variables(
+                        confluence_instance, template,
+                        self._resolve_references(job, dependency_results))),
+                    parent_page_id
+                )
+
+    def _resolve_references(self, job, dependency_results):
+        # type: (PageJob, dict) -> dict
+        """Returns the variables of a job with the references
+        replaced by the values of the pages already created
+
+        :param job: PageJob instance
+        :param dependency_results: dictionary job_id -> Page created
+        :return: dictionary with the template variables
+        """
+        variables = collections.OrderedDict(job.variables)
+        for name, (job_id, field) in self.get_references(job).items():
+            page = dependency_results[job_id]
+            if field == 'id':
+                variables[name] = page.id_number
+            elif field == 'title':
+                variables[name] = page.title
+            else:
+                variables[name] = '{0}{1}'.format(page.base_url, page.permanent_link)
+        return variables
+
+    def _compute_variables(self, confluence_instance, template, variables):
+        # type: (api.ConfluenceClient, CompiledTemplate, dict) -> dict
+        """Returns the variables of a page with the computed variables
+        referenced by its template resolved (see variable_providers)
+
+        :param confluence_instance: ConfluenceClient opened instance
+        :param template: CompiledTemplate of the page
+        :param variables: dictionary with the template variables
+        :return: dictionary with the template variables
+        :raises ValueError: if a referenced variable can not be computed
+        """
+        context = variable_providers.ProviderContext(
+            os.path.dirname(os.path.abspath(self._tree_file)),
+            host=self._settings[json_model.JSON_ATTR_HOST_URL],
+            # the opened instance is shared, it is not closed by the providers
+            confluence_client=partial(contextlib.nullcontext, confluence_instance))
+        return variable_providers.resolve_variables(
+            variables, template.find_variables, context)
+
+    @staticmethod
+    def _load_remote_template(confluence_instance, source):
+        # type: (api.ConfluenceClient, str) -> str
+        """Retrieves the html content of a template confluence page
+
+        :param confluence_instance: ConfluenceClient opened instance
+        :param source: URL of the template page
+        :return: html content of the page
+        """
+        location = url_resolver.parse_url(source)
+        if location.page_id is not None:
+            page = confluence_instance.get_content(location.page_id)
+        else:
+            page = confluence_instance.get_page_from_title(location.title, location.space_key)
+        return page.content
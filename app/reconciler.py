@@ -0,0 +1,334 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module to reconcile the pages under a confluence parent page with a
+desired state: only the pages that are missing, changed, moved or not
+desired anymore are written
+"""
+
+import collections
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from page_generator.app import scheduler
+from page_generator.utils import deadline_utils
+from page_generator.utils import trace_utils
+
+# get main logger instance
+LOGGER = logging.getLogger(__name__)
+
+# plan actions
+ACTION_CREATE = 'create'
+ACTION_UPDATE = 'update'
+ACTION_MOVE = 'move'
+ACTION_DELETE = 'delete'
+
+DesiredPage = collections.namedtuple('DesiredPage', ['title', 'content', 'parent_title'])
+DesiredPage.__doc__ = """Page that should exist, parent_title is None
+for the pages directly under the root page"""
+
+CurrentPage = collections.namedtuple(
+    'CurrentPage', ['page_id', 'title', 'parent_page_id', 'version', 'content_hash'])
+CurrentPage.__doc__ = """Page that exists in the server under the root page"""
+
+# prefix of the version message in which the hash of the written
+# content is stored: the server normalises the storage format, so the
+# body it returns can not be compared with the rendered content
+VERSION_MESSAGE_PREFIX = 'page_generator content sha1:'
+
+PlanAction = collections.namedtuple('PlanAction', ['action', 'title', 'page_id', 'parent_title'])
+PlanAction.__doc__ = """Write needed to reach the desired state
+(page_id is None for the pages to create)"""
+
+
+def content_hash(content):
+    # type: (str) -> str
+    """Returns the hash used to compare the content of the pages
+    """
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+def get_version_message(content):
+    # type: (str) -> str
+    """Returns the version message that stores the hash of the content
+    """
+    return VERSION_MESSAGE_PREFIX + content_hash(content)
+
+
+def get_message_hash(version_message):
+    # type: ([str]) -> str
+    """Returns the content hash stored in a version message,
+    None if the version was not written with get_version_message
+    """
+    message = version_message or ''
+    if message.startswith(VERSION_MESSAGE_PREFIX):
+        return message[len(VERSION_MESSAGE_PREFIX):]
+    return None
+
+
+def get_stored_hash(page_json):
+    # type: (dict) -> str
+    """Returns the content hash stored in the version message of a page
+    (json with the 'version' expanded) or the hash of its body when the
+    last version was not written by the reconciler (ex. edited by hand)
+
+    :return: content hash, None if the last version was not written by
+        the reconciler and the body was not expanded
+    """
+    stored_hash = get_message_hash(page_json['version'].get('message'))
+    if stored_hash is not None:
+        return stored_hash
+    storage = page_json.get('body', {}).get('storage')
+    if storage is None:
+        return None
+    return content_hash(storage['value'])
+
+
+class Reconciler(object):
+    """Reconciles the subtree of a root page with a list of desired pages.
+
+    The current subtree is listed level by level (children of the pages
+    of a level are listed concurrently, with paginated requests), then
+    titles and content hashes are compared locally to compute the
+    minimal plan (the hash of the rendered content is stored in the
+    message of the versions it writes, see get_stored_hash):
+        create: desired page that does not exist
+        update: existing page whose content changed (moved too if needed)
+        move: existing page with the same content under another parent
+        delete: existing page that is not desired anymore
+
+    Writes are run concurrently with DagScheduler: pages are created
+    after their parent page and deleted after their children were
+    moved or deleted.
+    Usage:
+
+    with ConfluenceClient(host, user, password) as client:
+        reconciler = Reconciler(client, 'DEV', '102948555')
+        summary = reconciler.reconcile(desired_pages)
+    """
+
+    # properties retrieved when listing the current pages
+    LIST_EXPAND = ['version']
+    # properties retrieved for the pages whose last version was not
+    # written by the reconciler, their body is hashed to compare it
+    BODY_EXPAND = ['space', 'body.storage']
+
+    def __init__(self, confluence_instance, space_key, root_page_id, workers=4, page_limit=50,
+                 job_timeout=None):
+        # type: (api.ConfluenceClient, str, str, [int], [int], [float]) -> Reconciler
+        """Constructor method
+
+        :param confluence_instance: ConfluenceClient opened instance
+        :param space_key: space of the pages
+        :param root_page_id: id of the page under which the pages are reconciled
+            (the root page itself is never modified)
+        :param workers: maximum number of requests sent at once
+        :param page_limit: number of children retrieved per listing request
+        :param job_timeout: deadline in seconds of every write (with its
+            retries), if None writes have no deadline
+        """
+        self._confluence_instance = confluence_instance
+        self._space_key = space_key
+        self._root_page_id = str(root_page_id)
+        self._workers = workers
+        self._page_limit = page_limit
+        self._job_timeout = job_timeout
+
+    @trace_utils.traced('fetch_current_pages')
+    def fetch_current(self):
+        # type: () -> dict
+        """Lists all the pages under the root page, the body of a page
+        is retrieved only if its last version was not written by the
+        reconciler (see get_stored_hash)
+
+        :return: ordered dictionary title -> CurrentPage,
+            parents are always before their children
+        """
+        current_pages = collections.OrderedDict()
+        level = [self._root_page_id]
+        with ThreadPoolExecutor(max_workers=self._workers) as executor:
+            while level:
+                children_lists = executor.map(partial(
+                    self._confluence_instance.get_child_pages,
+                    limit=self._page_limit, expand=Reconciler.LIST_EXPAND), level)
+                next_level = []
+                for parent_page_id, children in zip(level, children_lists):
+                    for child in children:
+                        current_pages[child['title']] = CurrentPage(
+                            str(child['id']), child['title'], parent_page_id,
+                            child['version']['number'], get_stored_hash(child))
+                        next_level.append(str(child['id']))
+                level = next_level
+            # only the bodies of the pages without a stored hash are retrieved
+            unhashed = [title for title, current_page in current_pages.items()
+                        if current_page.content_hash is None]
+            pages = executor.map(partial(
+                self._confluence_instance.get_content, expand=Reconciler.BODY_EXPAND),
+                [current_pages[title].page_id for title in unhashed])
+            for title, page in zip(unhashed, pages):
+                current_pages[title] = current_pages[title]._replace(
+                    content_hash=content_hash(page.content))
+        return current_pages
+
+    def _get_desired_parent_id(self, desired_page, current_pages):
+        # type: (DesiredPage, dict) -> str
+        """Returns the id of the desired parent page,
+        None if the parent page does not exist yet
+        """
+        if desired_page.parent_title is None:
+            return self._root_page_id
+        parent = current_pages.get(desired_page.parent_title)
+        return parent.page_id if parent is not None else None
+
+    def plan(self, desired_pages, current_pages):
+        # type: (list[DesiredPage], dict) -> list[PlanAction]
+        """Computes the writes needed to go from the current pages
+        to the desired pages
+
+        :param desired_pages: list of DesiredPage
+        :param current_pages: dictionary title -> CurrentPage (see fetch_current)
+        :return: list of PlanAction (pages that did not change have no action)
+        :raises ValueError: if titles are duplicated, a parent is not
+            desired or parents are in a cycle
+        """
+        desired_by_title = self._validate_desired(desired_pages)
+        actions = []
+        for desired_page in desired_by_title.values():
+            current_page = current_pages.get(desired_page.title)
+            if current_page is None:
+                actions.append(PlanAction(
+                    ACTION_CREATE, desired_page.title, None, desired_page.parent_title))
+                continue
+            moved = (current_page.parent_page_id !=
+                     self._get_desired_parent_id(desired_page, current_pages))
+            if current_page.content_hash != content_hash(desired_page.content):
+                actions.append(PlanAction(ACTION_UPDATE, desired_page.title,
+                                          current_page.page_id, desired_page.parent_title))
+            elif moved:
+                actions.append(PlanAction(ACTION_MOVE, desired_page.title,
+                                          current_page.page_id, desired_page.parent_title))
+        for title, current_page in current_pages.items():
+            if title not in desired_by_title:
+                actions.append(PlanAction(ACTION_DELETE, title, current_page.page_id, None))
+        return actions
+
+    @staticmethod
+    def _validate_desired(desired_pages):
+        # type: (list[DesiredPage]) -> dict
+        """Validates the desired pages
+
+        :return: ordered dictionary title -> DesiredPage
+        """
+        desired_by_title = collections.OrderedDict()
+        for desired_page in desired_pages:
+            if desired_page.title in desired_by_title:
+                raise ValueError("Desired page title is duplicated: \"{0}\"".format(
+                    desired_page.title))
+            desired_by_title[desired_page.title] = desired_page
+        scheduler.get_levels(collections.OrderedDict(
+            (title, [desired_page.parent_title] if desired_page.parent_title else [])
+            for title, desired_page in desired_by_title.items()))
+        return desired_by_title
+
+    @staticmethod
+    def _get_task_id(action, title):
+        # type: (str, str) -> str
+        return '{0}:{1}'.format(action, title)
+
+    def build_scheduler(self, actions, desired_pages, current_pages):
+        # type: (list[PlanAction], list[DesiredPage], dict) -> scheduler.DagScheduler
+        """Returns a DagScheduler with a task for every action of the plan
+
+        :param actions: list of PlanAction (see plan)
+        :param desired_pages: list of DesiredPage
+        :param current_pages: dictionary title -> CurrentPage
+        """
+        desired_by_title = dict((page.title, page) for page in desired_pages)
+        created = set(action.title for action in actions if action.action == ACTION_CREATE)
+        # pages that are moved out of each current parent page
+        moved_from = collections.defaultdict(list)
+        for action in actions:
+            if action.action in (ACTION_UPDATE, ACTION_MOVE, ACTION_DELETE):
+                current_page = current_pages[action.title]
+                moved_from[current_page.parent_page_id].append(
+                    self._get_task_id(action.action, action.title))
+
+        dag_scheduler = scheduler.DagScheduler(max_workers=self._workers)
+        for action in actions:
+            task_id = self._get_task_id(action.action, action.title)
+            depends_on = []
+            if action.action == ACTION_DELETE:
+                # children are moved out (or deleted) before their parent is deleted
+                depends_on = [dependency for dependency in
+                              moved_from[current_pages[action.title].page_id]
+                              if dependency != task_id]
+                function = partial(self._delete_page, action)
+            else:
+                if action.parent_title in created:
+                    depends_on = [self._get_task_id(ACTION_CREATE, action.parent_title)]
+                function = partial(self._write_page, action,
+                                   desired_by_title[action.title], current_pages)
+            dag_scheduler.add_task(task_id, function, depends_on=depends_on)
+        return dag_scheduler
+
+    def _write_page(self, action, desired_page, current_pages, dependency_results):
+        # type: (PlanAction, DesiredPage, dict, dict) -> api.Page
+        """Creates, updates or moves a page (scheduler task)
+        """
+        parent_page_id = self._get_desired_parent_id(desired_page, current_pages)
+        if parent_page_id is None:
+            parent_page_id = dependency_results[
+                self._get_task_id(ACTION_CREATE, desired_page.parent_title)].id_number
+        LOGGER.info("Reconcile %s: \"%s\"", action.action, action.title)
+        with deadline_utils.deadline(self._job_timeout):
+            if action.action == ACTION_CREATE:
+                return self._confluence_instance.create_page(
+                    desired_page.title, self._space_key, desired_page.content, parent_page_id,
+                    version_message=get_version_message(desired_page.content))
+            current_page = current_pages[action.title]
+            if current_page.parent_page_id == parent_page_id:
+                parent_page_id = None
+            return self._confluence_instance.update_page(
+                current_page.page_id, desired_page.title, self._space_key,
+                desired_page.content, current_page.version + 1, parent_page_id,
+                version_message=get_version_message(desired_page.content))
+
+    def _delete_page(self, action, dependency_results):
+        # type: (PlanAction, dict) -> str
+        """Deletes a page (scheduler task)
+        """
+        LOGGER.info("Reconcile %s: \"%s\"", action.action, action.title)
+        with deadline_utils.deadline(self._job_timeout):
+            self._confluence_instance.delete_content(action.page_id)
+        return action.page_id
+
+    def reconcile(self, desired_pages, dry_run=False):
+        # type: (list[DesiredPage], [bool]) -> dict
+        """Lists the current pages, computes the plan and runs it
+
+        :param desired_pages: list of DesiredPage
+        :param dry_run: if True, the plan is only computed
+        :return: dictionary with the plan, the number of pages per action,
+            the unchanged pages and the errors of the failed actions
+        """
+        current_pages = self.fetch_current()
+        actions = self.plan(desired_pages, current_pages)
+        summary = collections.OrderedDict(
+            (action_name, 0) for action_name in
+            (ACTION_CREATE, ACTION_UPDATE, ACTION_MOVE, ACTION_DELETE))
+        for action in actions:
+            summary[action.action] += 1
+        summary['unchanged'] = len(desired_pages) - (len(actions) - summary[ACTION_DELETE])
+        summary['plan'] = actions
+        summary['errors'] = {}
+        LOGGER.info("Reconcile plan: %d create, %d update, %d move, %d delete, %d unchanged",
+                    summary[ACTION_CREATE], summary[ACTION_UPDATE], summary[ACTION_MOVE],
+                    summary[ACTION_DELETE], summary['unchanged'])
+        if not dry_run and actions:
+            dag_scheduler = self.build_scheduler(actions, desired_pages, current_pages)
+            with trace_utils.get_tracer().span('reconcile', actions=len(actions)):
+                dag_scheduler.run()
+            summary['errors'] = dag_scheduler.errors
+        return summary
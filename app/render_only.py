@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module to render confluence pages into a local directory
+without authenticating or connecting to the server (render-only mode)
+"""
+
+import json
+import logging
+import os
+import re
+import time
+from concurrent import futures
+
+from page_generator.app.page_manager import PageManager
+from page_generator.app.template_store import TemplateStore
+from page_generator.app import variable_providers
+
+# get main logger instance
+LOGGER = logging.getLogger(__name__)
+
+MANIFEST_FILE_NAME = 'manifest.json'
+
+# characters not allowed in the rendered file names
+_UNSAFE_FILE_CHARS = re.compile(r'[^-\w.]+')
+
+# template store of the worker process, shared by all its jobs
+_WORKER_STORE = None
+
+
+def get_output_file_name(job_index, page_title):
+    # type: (int, str) -> str
+    """Returns the file name in which a rendered page is written
+
+    ex. (3, 'Release 1.0 / Summary') -> '0003_Release_1.0_Summary.html'
+
+    :param job_index: position of the job in the batch
+    :param page_title: title of the page
+    :return: file name for the rendered page
+    """
+    safe_title = _UNSAFE_FILE_CHARS.sub('_', page_title).strip('_') or 'page'
+    return '{0:04d}_{1}.html'.format(job_index, safe_title)
+
+
+def _init_worker(template_cache_dir, minify, commands_enabled):
+    # type: ([str], bool, bool) -> None
+    """Initializes a worker process: creates the template store shared
+    by its jobs and applies the settings of the main process, which
+    are not inherited when the workers are spawned
+
+    :param template_cache_dir: directory with the cached remote templates
+    :param minify: if True, templates are minified
+    :param commands_enabled: if True, '!cmd' variables are enabled
+    """
+    global _WORKER_STORE
+    _WORKER_STORE = TemplateStore(template_cache_dir, minify=minify)
+    variable_providers.set_commands_enabled(commands_enabled)
+
+
+def _render_job(job_index, config_file, output_dir):
+    # type: (int, str, str) -> dict
+    """Renders the page of a single configuration file into the output
+    directory (executed inside the worker processes, see _init_worker)
+
+    :return: dictionary with the manifest entry of the job
+    """
+    entry = {
+        'config_file': config_file,
+        'status': 'failed'
+    }
+    start_time = time.time()
+    try:
+        store = _WORKER_STORE
+        page_manager_obj = PageManager(config_file, template_store=store)
+        config_obj = page_manager_obj.config_obj
+        entry.update({
+            'page_title': config_obj.get_page_title(),
+            'space_key': config_obj.get_space_key(),
+            'parent_page_id': config_obj.get_parent_page_id(),
+            'source': config_obj.get_source()
+        })
+        output_file = get_output_file_name(job_index, config_obj.get_page_title())
+        output_path = os.path.join(output_dir, output_file)
+        try:
+            with open(output_path, 'wb') as output:
+                entry['bytes'] = page_manager_obj.render_page_offline(output)
+                if store.minify:
+                    entry['bytes_saved'] = store.get_compiled(
+                        config_obj.get_source()).bytes_saved
+        except Exception:
+            # do not leave partially rendered pages in the output directory
+            # (the file may not exist: the original error is reported)
+            try:
+                os.remove(output_path)
+            except OSError:
+                pass
+            raise
+        entry['output_file'] = output_file
+        entry['status'] = 'rendered'
+    except Exception as ex:
+        entry['error'] = str(ex)
+    entry['seconds'] = round(time.time() - start_time, 6)
+    return entry
+
+
+def render_jobs(config_files, output_dir, template_cache_dir=None, workers=None, minify=False):
+    # type: (list[str], str, [str], [int], [bool]) -> dict
+    """Renders the pages of all configuration files into the output directory
+    in parallel worker processes and writes a manifest file with the
+    result of every job and the throughput of the whole batch.
+
+    No authentication or connection to the server is done, templates
+    from confluence pages are read from the template cache directory.
+
+    :param config_files: list of json configuration files (one per page)
+    :param output_dir: directory in which pages and manifest are written
+    :param template_cache_dir: directory with the cached remote templates
+    :param workers: number of worker processes (default: CPU count)
+    :param minify: if True, templates are minified and the bytes saved
+        are reported for every page
+    :return: dictionary with the manifest data
+    """
+    if not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+    workers = workers or os.cpu_count() or 1
+    LOGGER.info("Rendering %d page(s) into \"%s\" with %d worker(s)",
+                len(config_files), output_dir, workers)
+
+    start_time = time.time()
+    with futures.ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker,
+            initargs=(template_cache_dir, minify,
+                      variable_providers.get_commands_enabled())) as executor:
+        entries = list(executor.map(
+            _render_job,
+            range(len(config_files)),
+            config_files,
+            [output_dir] * len(config_files),
+            # batch small jobs to reduce the inter-process overhead
+            chunksize=max(1, len(config_files) // (workers * 4))))
+    wall_seconds = time.time() - start_time
+
+    rendered = [entry for entry in entries if entry['status'] == 'rendered']
+    total_bytes = sum(entry['bytes'] for entry in rendered)
+    manifest = {
+        'jobs': entries,
+        'summary': {
+            'pages': len(entries),
+            'rendered': len(rendered),
+            'failed': len(entries) - len(rendered),
+            'bytes': total_bytes,
+            'bytes_saved': sum(entry.get('bytes_saved', 0) for entry in rendered),
+            'workers': workers,
+            'wall_seconds': round(wall_seconds, 6),
+            'pages_per_second': round(len(rendered) / wall_seconds, 3) if wall_seconds else None,
+            'megabytes_per_second':
+                round(total_bytes / 1048576.0 / wall_seconds, 3) if wall_seconds else None
+        }
+    }
+    with open(os.path.join(output_dir, MANIFEST_FILE_NAME), 'w') as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+
+    for entry in entries:
+        if entry['status'] != 'rendered':
+            LOGGER.error("Page of \"%s\" could not be rendered: %s",
+                         entry['config_file'], entry['error'])
+    LOGGER.info("Rendered %d/%d page(s) in %.3f s (%s pages/s)",
+                len(rendered), len(entries), wall_seconds,
+                manifest['summary']['pages_per_second'])
+    return manifest
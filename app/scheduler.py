@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module with a scheduler that runs tasks with dependencies between them
+(a directed acyclic graph) in parallel
+"""
+
+import collections
+import logging
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# get main logger instance
+LOGGER = logging.getLogger(__name__)
+
+
+class DependencyError(Exception):
+    """Error set for the tasks that were not run because
+    one of their dependencies failed
+    """
+
+
+def get_levels(dependencies):
+    # type: (dict) -> list[list[str]]
+    """Sorts a dependency graph in levels: nodes of a level only
+    depend on nodes of previous levels (topological order)
+
+    :param dependencies: ordered dictionary node -> list of the nodes
+        it depends on
+    :return: list with the nodes of every level
+    :raises ValueError: if a dependency is unknown or there is a cycle
+    """
+    for node, node_dependencies in dependencies.items():
+        for dependency in node_dependencies:
+            if dependency not in dependencies:
+                raise ValueError("\"{0}\" depends on unknown \"{1}\"".format(
+                    node, dependency))
+    pending = dict((node, set(node_dependencies))
+                   for node, node_dependencies in dependencies.items())
+    levels = []
+    while pending:
+        level = [node for node in dependencies if node in pending and not pending[node]]
+        if not level:
+            raise ValueError("Dependency cycle: {0}".format(' -> '.join(_find_cycle(pending))))
+        for node in level:
+            del pending[node]
+        for node_dependencies in pending.values():
+            node_dependencies.difference_update(level)
+        levels.append(level)
+    return levels
+
+
+def _find_cycle(pending):
+    # type: (dict) -> list[str]
+    """Returns the nodes of a cycle among the pending nodes
+    (all of them have unresolved dependencies)
+    """
+    node = next(iter(pending))
+    visited = []
+    while node not in visited:
+        visited.append(node)
+        node = sorted(pending[node])[0]
+    return visited[visited.index(node):] + [node]
+
+
+class DagScheduler(object):
+    """Runs tasks in a thread pool as soon as all their dependencies
+    have finished, so independent tasks (ex. pages of the same level
+    of a page tree) run in parallel and a task always runs after
+    the tasks it depends on.
+
+    Every task function is called with a dictionary with the results
+    of its dependencies. If a task fails, the tasks that depend on it
+    (directly or not) are not run.
+    Usage:
+
+    scheduler = DagScheduler(max_workers=8)
+    scheduler.add_task('parent', create_parent)
+    scheduler.add_task('child', create_child, depends_on=['parent'])
+    scheduler.run()
+    scheduler.results['child']
+    """
+
+    def __init__(self, max_workers=4):
+        # type: ([int]) -> DagScheduler
+        """Constructor method
+
+        :param max_workers: maximum number of tasks running at once
+        """
+        if max_workers < 1:
+            raise ValueError("Number of workers should be greater than 0")
+        self._max_workers = max_workers
+        self._tasks = collections.OrderedDict()
+        self._dependencies = collections.OrderedDict()
+        self._results = {}
+        self._errors = collections.OrderedDict()
+
+    @property
+    def results(self):
+        # type: () -> dict
+        """Returns a dictionary task_id -> result of the finished tasks
+        """
+        return self._results
+
+    @property
+    def errors(self):
+        # type: () -> dict
+        """Returns a dictionary task_id -> exception of the failed tasks
+        and of the tasks not run because a dependency failed
+        """
+        return self._errors
+
+    def add_task(self, task_id, function, depends_on=None):
+        # type: (str, Callable, [list[str]]) -> None
+        """Adds a task to the graph
+
+        :param task_id: unique identifier of the task
+        :param function: function to run, called with a dictionary
+            task_id -> result of the dependencies
+        :param depends_on: list with the ids of the tasks
+            that should finish before this task
+        :raises ValueError: if the task id is already in the graph
+        """
+        if task_id in self._tasks:
+            raise ValueError("Task \"{0}\" is already scheduled".format(task_id))
+        self._tasks[task_id] = function
+        self._dependencies[task_id] = list(depends_on or [])
+
+    def add_dependency(self, task_id, depends_on):
+        # type: (str, str) -> None
+        """Adds a dependency to a task already in the graph
+        """
+        if depends_on not in self._dependencies[task_id]:
+            self._dependencies[task_id].append(depends_on)
+
+    def get_levels(self):
+        # type: () -> list[list[str]]
+        """Returns the tasks grouped by level: tasks of a level only
+        depend on tasks of previous levels
+
+        :raises ValueError: if a dependency is unknown or there is a cycle
+        """
+        return get_levels(self._dependencies)
+
+    def run(self):
+        # type: () -> dict
+        """Runs all the tasks of the graph
+
+        :return: dictionary task_id -> result of the finished tasks
+        :raises ValueError: if a dependency is unknown or there is a cycle
+        """
+        levels = self.get_levels()
+        LOGGER.debug("Running %d task(s) in %d level(s) with %d worker(s)",
+                     len(self._tasks), len(levels), self._max_workers)
+        pending = dict((task_id, set(dependencies))
+                       for task_id, dependencies in self._dependencies.items())
+        dependents = collections.defaultdict(list)
+        for task_id, dependencies in self._dependencies.items():
+            for dependency in dependencies:
+                dependents[dependency].append(task_id)
+
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            running = {}
+
+            def submit(task_id):
+                dependency_results = dict(
+                    (dependency, self._results[dependency])
+                    for dependency in self._dependencies[task_id])
+                future = executor.submit(self._tasks[task_id], dependency_results)
+                running[future] = task_id
+
+            for task_id in levels[0] if levels else []:
+                submit(task_id)
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task_id = running.pop(future)
+                    try:
+                        self._results[task_id] = future.result()
+                    except Exception as ex:
+                        LOGGER.error("Task \"%s\" failed: %s", task_id, ex)
+                        self._errors[task_id] = ex
+                        self._skip_dependents(task_id, dependents)
+                        continue
+                    for dependent in dependents[task_id]:
+                        pending[dependent].discard(task_id)
+                        if not pending[dependent] and dependent not in self._errors:
+                            submit(dependent)
+        return self._results
+
+    def _skip_dependents(self, task_id, dependents):
+        # type: (str, dict) -> None
+        """Sets an error for all the tasks that depend on a failed task
+        """
+        for dependent in dependents[task_id]:
+            if dependent not in self._errors:
+                self._errors[dependent] = DependencyError(
+                    "Task \"{0}\" was not run because task \"{1}\" failed".format(
+                        dependent, task_id))
+                self._skip_dependents(dependent, dependents)
@@ -0,0 +1,385 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module with a resident generation service: a local HTTP (or Unix socket)
+endpoint that accepts page generation jobs and keeps the confluence
+sessions, compiled templates and page index warm between jobs
+"""
+
+import collections
+import json
+import logging
+import os
+import socketserver
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from page_generator.app import config_utils
+from page_generator.app import variable_providers
+from page_generator.app.page_manager import PageManager
+from page_generator.app.template_store import TemplateStore
+from page_generator.confluence.exceptions import ConfluenceResourceNotFound
+from page_generator.confluence.exceptions import ConfluenceVersionConflict
+from page_generator.utils import deadline_utils
+
+# get main logger instance
+LOGGER = logging.getLogger(__name__)
+
+# job result status
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+# providers of the computed variables that the config files of the
+# jobs can use: any client can submit a config file, so the providers
+# that run commands or read local files and environment variables are refused
+SERVICE_PROVIDERS = ('page',)
+
+# page actions of a job
+ACTION_CREATED = 'created'
+ACTION_UPDATED = 'updated'
+ACTION_UNCHANGED = 'unchanged'
+
+
+class _ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """HTTP server listening on a Unix socket
+    """
+    daemon_threads = True
+
+
+class GenerationService(object):
+    """Long running service that generates pages on request, so the
+    imports, config parsing, authentication probe, template retrieval
+    and TLS setup are not repeated for every page:
+        confluence clients: one opened session per host and user
+        config files: parsed again only when they are modified
+        templates: compiled once, local files are compiled again when
+            modified and remote pages when the job asks to refresh them
+        page index: id, version and content of the published pages, so
+            a job only sends the write request (or nothing if the page
+            did not change)
+
+    Endpoints:
+        POST /jobs   {"config_file": "page.json", "refresh_template": false}
+                     -> job result with the timings of every phase
+        GET /status  -> counters of the service
+
+    This instance should be used within 'with' statement.
+    Usage:
+
+    with GenerationService(port=8765) as service:
+        service.submit({'config_file': 'page.json'})
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, unix_socket=None,
+                 template_store=None, metrics=None, job_timeout=None, timeout=None):
+        # type: ([str], [int], [str], [TemplateStore], [metrics_utils.ClientMetrics], [float], [tuple]) -> GenerationService
+        """Constructor method
+
+        :param host: interface to listen on
+        :param port: port to listen on (0 to pick a free one)
+        :param unix_socket: path of a Unix socket to listen on
+            instead of host and port
+        :param template_store: TemplateStore instance used to cache
+            the templates, if None a memory only store is used
+        :param metrics: ClientMetrics instance in which the metrics of the
+            requests to the server are collected, if None they are not collected
+        :param job_timeout: default deadline in seconds of every job
+            (a job can set its own 'timeout'), if None jobs are only
+            bounded by the timeouts of their requests
+        :param timeout: (connect, read) timeout in seconds of the requests,
+            if None the default timeout is used
+        """
+        # imported on demand: requests is only needed once the server is used
+        from page_generator.confluence import api
+        self._template_store = template_store or TemplateStore()
+        self.metrics = metrics
+        self._client_pool = api.ClientPool(metrics=metrics, timeout=timeout)
+        self._job_timeout = job_timeout
+        self._lock = threading.Lock()
+        # config file -> (file state, PageManager)
+        self._managers = {}
+        # (host, user) of the credentials already authenticated
+        self._authenticated = set()
+        # (host, space key, title) -> last published Page
+        self._page_index = {}
+        # local template -> file state
+        self._template_states = {}
+        self._counters = collections.Counter()
+        self._started = time.time()
+        self._unix_socket = unix_socket
+        if unix_socket is not None:
+            self._httpd = _ThreadingUnixHTTPServer(unix_socket, _ServiceHandler)
+        else:
+            self._httpd = ThreadingHTTPServer((host, port), _ServiceHandler)
+            self._httpd.daemon_threads = True
+        self._httpd.service = self
+        self._thread = None
+
+    # -----------------
+    # Service lifecycle
+    # -----------------
+    def __enter__(self):
+        # type: () -> GenerationService
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def start(self):
+        # type: () -> None
+        """Starts serving requests in a background thread
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._httpd.serve_forever, kwargs={'poll_interval': 0.05},
+                name='generation-service')
+            self._thread.daemon = True
+            self._thread.start()
+            LOGGER.info("Generation service listening on %s", self.url)
+
+    def stop(self):
+        # type: () -> None
+        """Stops the service, closes its socket and the confluence clients
+        """
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpd.server_close()
+        if self._unix_socket is not None and os.path.exists(self._unix_socket):
+            os.remove(self._unix_socket)
+        self._client_pool.close()
+
+    def run(self):
+        # type: () -> None
+        """Serves requests until interrupted (Ctrl+C)
+        """
+        self.start()
+        try:
+            while self._thread.is_alive():
+                self._thread.join(0.5)
+        except KeyboardInterrupt:
+            LOGGER.info("Generation service stopped")
+        finally:
+            self.stop()
+
+    @property
+    def url(self):
+        # type: () -> str
+        """Returns the address of the service
+        (ex. http://127.0.0.1:8765 or unix:/tmp/page_generator.sock)
+        """
+        if self._unix_socket is not None:
+            return 'unix:{0}'.format(self._unix_socket)
+        host, port = self._httpd.server_address[:2]
+        return 'http://{0}:{1}'.format(host, port)
+
+    @property
+    def status(self):
+        # type: () -> dict
+        """Returns the counters of the service
+        """
+        with self._lock:
+            return {
+                'uptime_s': round(time.time() - self._started, 3),
+                'jobs': self._counters['jobs'],
+                'failed': self._counters['failed'],
+                'clients': len(self._client_pool),
+                'configs': len(self._managers),
+                'pages': len(self._page_index)
+            }
+
+    # -----------------
+    # Jobs
+    # -----------------
+    @staticmethod
+    def _get_file_state(path):
+        # type: (str) -> tuple
+        try:
+            stat = os.stat(path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def _get_manager(self, config_file):
+        # type: (str) -> PageManager
+        """Returns the PageManager of a config file,
+        parsing the file again only if it was modified
+        """
+        state = self._get_file_state(config_file)
+        with self._lock:
+            cached = self._managers.get(config_file)
+        if cached is not None and cached[0] == state:
+            return cached[1]
+        config_obj = config_utils.Config(config_file)
+        client = self._client_pool.get(
+            config_obj.get_host_url(),
+            PageManager.resolve_credential(config_obj.get_user()),
+            PageManager.resolve_credential(config_obj.get_password()))
+        manager = PageManager(config_file, template_store=self._template_store,
+                              metrics=self.metrics, confluence_client=client)
+        with self._lock:
+            # credentials already validated by a previous job are not probed again
+            manager.is_authenticated = (
+                (config_obj.get_host_url(), manager.get_user()) in self._authenticated)
+            self._managers[config_file] = (state, manager)
+        return manager
+
+    def _refresh_template(self, source, force=False):
+        # type: (str, [bool]) -> None
+        """Invalidates the cached template if forced or if the
+        local template file was modified
+        """
+        if self._template_store.is_remote(source):
+            if force:
+                self._template_store.invalidate(source)
+            return
+        state = self._get_file_state(source)
+        with self._lock:
+            previous_state = self._template_states.get(source)
+            self._template_states[source] = state
+        if force or (previous_state is not None and previous_state != state):
+            self._template_store.invalidate(source)
+
+    def _publish(self, manager, content):
+        # type: (PageManager, str) -> tuple
+        """Writes the page, looking it up only if it is not indexed yet
+
+        :return: tuple with the Page, the action and the timings
+        """
+        config_obj = manager.config_obj
+        key = (config_obj.get_host_url(), config_obj.get_space_key(),
+               config_obj.get_page_title())
+        timings = collections.OrderedDict()
+        with self._lock:
+            existing_page = self._page_index.get(key)
+        indexed = existing_page is not None
+        if not indexed:
+            start = time.perf_counter()
+            existing_page = manager.find_page()
+            timings['lookup_ms'] = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        try:
+            page = manager.write_page(content, existing_page)
+        except (ConfluenceVersionConflict, ConfluenceResourceNotFound):
+            if not indexed:
+                raise
+            # indexed page is outdated (ex. edited or deleted by someone else)
+            LOGGER.debug("Indexed page \"%s\" is outdated, searching it again", key[2])
+            existing_page = manager.find_page()
+            page = manager.write_page(content, existing_page)
+        timings['write_ms'] = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self._page_index[key] = page
+        if existing_page is None:
+            action = ACTION_CREATED
+        elif page is existing_page:
+            action = ACTION_UNCHANGED
+        else:
+            action = ACTION_UPDATED
+        return page, action, timings
+
+    def submit(self, job):
+        # type: (dict) -> dict
+        """Runs a generation job
+
+        :param job: dictionary with the 'config_file' of the page and
+            optionally 'refresh_template' (True to retrieve a remote
+            template again) and 'timeout' (deadline of the job in seconds)
+        :return: dictionary with the status, the page and the
+            timings (milliseconds) of the job
+        :raises ValueError: if the job has no config file
+        """
+        config_file = job.get('config_file') if isinstance(job, dict) else None
+        if not config_file:
+            raise ValueError("Job should have a 'config_file'")
+        timings = collections.OrderedDict()
+        result = collections.OrderedDict([('config_file', config_file)])
+        start = job_start = time.perf_counter()
+        try:
+            with deadline_utils.deadline(job.get('timeout') or self._job_timeout):
+                manager = self._get_manager(config_file)
+                # any client can submit a config file: only safe providers are used
+                refused = [provider for provider in variable_providers.get_providers()
+                           if provider not in SERVICE_PROVIDERS and
+                           variable_providers.uses_provider(
+                               manager.config_obj.computed_variables, provider)]
+                if refused:
+                    raise ValueError("Config file \"{0}\" uses {1} variables, only {2} "
+                                     "variables are allowed by the service".format(
+                                         config_file,
+                                         ', '.join("'!{0}'".format(name) for name in refused),
+                                         ', '.join("'!{0}'".format(name)
+                                                   for name in SERVICE_PROVIDERS)))
+                timings['load_ms'] = (time.perf_counter() - start) * 1000
+                self._refresh_template(manager.template_source,
+                                       force=job.get('refresh_template'))
+                start = time.perf_counter()
+                # every job is a batch: computed variables are not reused by later jobs
+                content = manager.render_page(variable_cache=variable_providers.ProviderCache())
+                timings['render_ms'] = (time.perf_counter() - start) * 1000
+                page, action, publish_timings = self._publish(manager, content)
+                timings.update(publish_timings)
+                with self._lock:
+                    self._authenticated.add(
+                        (manager.config_obj.get_host_url(), manager.get_user()))
+                result['status'] = STATUS_DONE
+                result['action'] = action
+                result['page_id'] = page.id_number
+                result['title'] = page.title
+                result['version'] = page.version_number
+        except Exception as ex:
+            LOGGER.error("Job \"%s\" failed: %s", config_file, ex)
+            result['status'] = STATUS_FAILED
+            result['error'] = str(ex)
+        timings['total_ms'] = (time.perf_counter() - job_start) * 1000
+        result['timings'] = collections.OrderedDict(
+            (name, round(value, 3)) for name, value in timings.items())
+        with self._lock:
+            self._counters['jobs'] += 1
+            if result['status'] == STATUS_FAILED:
+                self._counters['failed'] += 1
+        return result
+
+
+class _ServiceHandler(BaseHTTPRequestHandler):
+    """HTTP request handler for GenerationService
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format_str, *args):
+        # called for every request, message is only formatted if logged
+        if LOGGER.isEnabledFor(logging.DEBUG):
+            LOGGER.debug("service - %s", format_str % args)
+
+    def _send(self, status_code, json_data):
+        # type: (int, dict) -> None
+        payload = json.dumps(json_data).encode('utf-8')
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/status':
+            self._send(200, self.server.service.status)
+        else:
+            self._send(404, {'error': 'Unknown path: {0}'.format(self.path)})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        if self.path.rstrip('/') != '/jobs':
+            self._send(404, {'error': 'Unknown path: {0}'.format(self.path)})
+            return
+        try:
+            result = self.server.service.submit(json.loads(body.decode('utf-8') or '{}'))
+        except ValueError as ex:
+            self._send(400, {'error': str(ex)})
+            return
+        self._send(200 if result['status'] == STATUS_DONE else 500, result)
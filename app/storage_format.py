@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module with the minification of confluence storage format (XHTML)
+templates: the indentation of pretty-printed templates is removed
+before they are sent to the server
+"""
+
+import re
+
+# content that is never changed: CDATA sections, comments,
+# preformatted blocks and code macro bodies
+_PRESERVED_PATTERN = (r'<!\[CDATA\[.*?\]\]>|<!--.*?-->|'
+                      r'<(?P<block>pre|ac:plain-text-body)(?=[\s/>])[^>]*?'
+                      r'(?:/>|>.*?</(?P=block)\s*>)')
+_TOKEN_PATTERN = re.compile(r'{0}|<[^>]*>'.format(_PRESERVED_PATTERN), re.DOTALL)
+_TAG_NAME_PATTERN = re.compile(r'<\s*(/?)\s*([\w:.-]+)')
+# only XML whitespace: other unicode spaces (ex. no-break space) are content
+WHITESPACE = ' \t\r\n'
+_WHITESPACE_PATTERN = re.compile(r'[ \t\r\n]+')
+
+# elements whose surrounding whitespace is never rendered, whitespace
+# next to any other element (inline or unknown) is kept as a space
+BLOCK_TAGS = frozenset([
+    'address', 'article', 'aside', 'blockquote', 'body', 'br', 'caption', 'col',
+    'colgroup', 'dd', 'div', 'dl', 'dt', 'figcaption', 'figure', 'footer',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'head', 'header', 'hr', 'html', 'li',
+    'nav', 'ol', 'p', 'pre', 'section', 'table', 'tbody', 'td', 'tfoot', 'th',
+    'thead', 'tr', 'ul',
+    'ac:layout', 'ac:layout-cell', 'ac:layout-section', 'ac:rich-text-body',
+    'ac:task', 'ac:task-list'
+])
+
+# macros: whitespace between their tags and their parameters or
+# bodies is not rendered, around them it is (ex. inline status macro)
+MACRO_TAGS = frozenset(['ac:structured-macro', 'ac:macro'])
+MACRO_CHILD_TAGS = frozenset(['ac:parameter', 'ac:default-parameter', 'ac:plain-text-body'])
+
+# elements whose whole content is a value (leading and trailing
+# whitespace inside them is kept as a space)
+VALUE_TAGS = frozenset(['ac:parameter', 'ac:default-parameter', 'title', 'textarea'])
+
+
+def _is_significant(token, after):
+    # type: (str, bool) -> bool
+    """Returns True if whitespace next to a tag (or preserved content)
+    can be rendered, so it has to be kept as a single space
+
+    :param token: tag or preserved content
+    :param after: True if the whitespace is after the token
+    """
+    match = _TAG_NAME_PATTERN.match(token)
+    if match is None:
+        # CDATA and comments: kept as they were written
+        return True
+    closing, name = match.group(1), match.group(2).lower()
+    if name in BLOCK_TAGS:
+        return False
+    # inner side: after the opening tag or before the closing tag
+    inner = after != bool(closing) and not token.endswith('/>')
+    if name in VALUE_TAGS and inner:
+        return True
+    if name in MACRO_CHILD_TAGS:
+        return False
+    if name in MACRO_TAGS:
+        return not inner
+    return True
+
+
+def minify(content):
+    # type: (str) -> str
+    """Returns the storage format content without insignificant
+    whitespace: whitespace next to block elements (paragraphs, tables,
+    layouts, ...) and between macros and their parameters is removed,
+    other whitespace runs (ex. around inline or unknown elements)
+    are collapsed into a single space.
+
+    Tags (and their attributes), CDATA sections, comments, <pre> and
+    <ac:plain-text-body> content are never changed.
+
+    :param content: storage format (XHTML) content
+    :return: minified content
+    """
+    tokens = []
+    position = 0
+    for match in _TOKEN_PATTERN.finditer(content):
+        if match.start() > position:
+            tokens.append((False, content[position:match.start()]))
+        tokens.append((True, match.group(0)))
+        position = match.end()
+    if position < len(content):
+        tokens.append((False, content[position:]))
+
+    parts = []
+    for index, (is_tag, token) in enumerate(tokens):
+        if is_tag:
+            parts.append(token)
+            continue
+        previous_tag = tokens[index - 1][1] if index > 0 else None
+        next_tag = tokens[index + 1][1] if index + 1 < len(tokens) else None
+        keep_before = previous_tag is not None and _is_significant(previous_tag, True)
+        keep_after = next_tag is not None and _is_significant(next_tag, False)
+        text = token.strip(WHITESPACE)
+        if not text:
+            # whitespace between two tags
+            parts.append(' ' if keep_before and keep_after else '')
+            continue
+        text = _WHITESPACE_PATTERN.sub(' ', text)
+        if keep_before and token[0] in WHITESPACE:
+            text = ' ' + text
+        if keep_after and token[-1] in WHITESPACE:
+            text += ' '
+        parts.append(text)
+    return ''.join(parts)
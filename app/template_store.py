@@ -0,0 +1,491 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module with the template store used to resolve html template sources
+(local files or confluence page URLs) and keep a local cache of them
+"""
+
+import collections
+import hashlib
+import io
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from page_generator.app import storage_format
+from page_generator.utils import deadline_utils
+from page_generator.utils import trace_utils
+
+# get main logger instance
+LOGGER = logging.getLogger(__name__)
+
+# start of an include directive: <!--#include source="fragment.html" -->
+INCLUDE_MARKER = '<!--#include'
+INCLUDE_PATTERN = re.compile(r'<!--#include\s+source="([^"]+)"\s*-->')
+
+
+class CompiledTemplate(object):
+    """Template content split once into literal segments and variable
+    slots, so rendering the same template for many pages only joins
+    the segments with the values of every page.
+
+    Segments are compiled for each set of variable names (pages of a
+    batch usually share them), only the MAX_SEGMENTS sets used last are
+    kept. Variables are matched in a single pass, longer names first,
+    like in file_utils.MappedTemplateFile.
+    """
+
+    # maximum number of sets of variable names whose segments are kept
+    MAX_SEGMENTS = 32
+
+    def __init__(self, content, includes=None, source_size=None):
+        # type: (str, [dict], [int]) -> CompiledTemplate
+        """Constructor method
+
+        :param content: html content of the template
+            (with the include directives already resolved)
+        :param includes: dictionary fragment source -> sha1 of the fragment
+            content, of all the fragments included (directly or not)
+        :param source_size: size in bytes of the template before it was
+            minified, if None the template was not minified
+        """
+        self._content = content
+        self._includes = includes or {}
+        self._size = len(content.encode(TemplateStore.ENCODING))
+        self._source_size = self._size if source_size is None else source_size
+        # least recently used sets of variable names first
+        self._segments = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def content(self):
+        # type: () -> str
+        """Returns the html content of the template
+        """
+        return self._content
+
+    @property
+    def source_size(self):
+        # type: () -> int
+        """Returns the size in bytes of the template before it was minified
+        """
+        return self._source_size
+
+    @property
+    def bytes_saved(self):
+        # type: () -> int
+        """Returns the bytes removed from the template (and from every
+        page rendered with it) by the minification
+        """
+        return self._source_size - self._size
+
+    @property
+    def includes(self):
+        # type: () -> dict
+        """Returns the fragments composed into the template:
+        fragment source -> sha1 of the fragment content
+        """
+        return self._includes
+
+    def _get_segments(self, names):
+        # type: (Iterable[str]) -> list[str]
+        """Returns the template split into [literal, name, literal, ...]
+        for the given variable names
+        """
+        key = frozenset(names)
+        with self._lock:
+            segments = self._segments.get(key)
+            if segments is not None:
+                self._segments.move_to_end(key)
+        if segments is None:
+            if key:
+                pattern = re.compile('({0})'.format('|'.join(
+                    re.escape(name) for name in sorted(key, key=len, reverse=True))))
+                segments = pattern.split(self._content)
+            else:
+                segments = [self._content]
+            with self._lock:
+                self._segments[key] = segments
+                if len(self._segments) > CompiledTemplate.MAX_SEGMENTS:
+                    self._segments.popitem(last=False)
+        return segments
+
+    def find_variables(self, variables):
+        # type: (dict) -> set
+        """Returns the variable names that are referenced in the template
+
+        :param variables: dictionary with the template variables
+        :return: a set with the variable names found
+        """
+        return set(self._get_segments(variables)[1::2])
+
+    def render(self, variables):
+        # type: (dict) -> str
+        """Returns the template content with the variables replaced
+
+        :param variables: dictionary with the template variables
+            $VarName = value
+        :return: rendered html content
+        """
+        segments = self._get_segments(variables)
+        parts = list(segments)
+        parts[1::2] = [variables[name] for name in segments[1::2]]
+        return ''.join(parts)
+
+
+class TemplateStore(object):
+    """Resolves html template sources and caches the remote ones.
+
+    Templates can include fragments (local files or confluence pages)
+    with the directive <!--#include source="..." -->. Fragments are
+    cached like any other template source, resolved concurrently and
+    composed once: the compiled template already contains them, so
+    rendering it again costs nothing. Relative fragment paths are
+    resolved from the directory of the local template including them.
+
+    Local file sources are always used as they are. Templates retrieved
+    from confluence pages are kept in memory and, if a cache directory
+    is configured, written to disk so they can be used later without
+    connecting to the server (ex. render-only mode).
+    """
+
+    CACHE_FILE_EXTENSION = '.html'
+    ENCODING = 'utf-8'
+    # number of template sources retrieved at once by prefetch
+    PREFETCH_WORKERS = 8
+
+    def __init__(self, cache_dir=None, minify=False):
+        # type: ([str], [bool]) -> TemplateStore
+        """Constructor method
+
+        :param cache_dir: directory in which remote templates are cached.
+            if None, templates are only cached in memory
+        :param minify: if True, the insignificant whitespace of the templates
+            is removed when they are compiled (see storage_format.minify)
+        """
+        self._cache_dir = cache_dir
+        self._minify = minify
+        self._templates = {}
+        self._compiled = {}
+        self._source_locks = {}
+        # fragment source -> sources whose compiled template includes it
+        self._include_dependents = {}
+        self._lock = threading.Lock()
+        if cache_dir and not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+
+    @property
+    def cache_dir(self):
+        # type: () -> str
+        """Returns the directory in which templates are cached
+        """
+        return self._cache_dir
+
+    @property
+    def minify(self):
+        # type: () -> bool
+        """Returns True if the templates are minified when they are compiled
+        """
+        return self._minify
+
+    @staticmethod
+    def is_remote(source):
+        # type: (str) -> bool
+        """Returns True if the template source is not a local file
+        """
+        return source.startswith('http://') or source.startswith('https://')
+
+    def get_cache_path(self, source):
+        # type: (str) -> str
+        """Returns the file path in which a remote template source is cached
+
+        :param source: URL of the template source
+        :return: path of the cache file, None if no cache directory is set
+        """
+        if not self._cache_dir:
+            return None
+        key = hashlib.sha1(source.encode(TemplateStore.ENCODING)).hexdigest()
+        return os.path.join(self._cache_dir, key + TemplateStore.CACHE_FILE_EXTENSION)
+
+    def get(self, source):
+        # type: (str) -> str
+        """Returns the cached content of a template source
+
+        :param source: URL or file path of the template
+        :return: template content, None if it is not cached
+        """
+        with self._lock:
+            if source in self._templates:
+                return self._templates[source]
+        cache_path = self.get_cache_path(source) if self.is_remote(source) else source
+        if cache_path is None or not os.path.exists(cache_path):
+            return None
+        with io.open(cache_path, encoding=TemplateStore.ENCODING, newline='') as file_obj:
+            content = file_obj.read()
+        with self._lock:
+            self._templates[source] = content
+        return content
+
+    def put(self, source, content):
+        # type: (str, str) -> None
+        """Stores the content of a template source in the cache
+
+        :param source: URL or file path of the template
+        :param content: html content of the template
+        :return: None
+        """
+        with self._lock:
+            self._templates[source] = content
+            self._drop_compiled(source)
+        cache_path = self.get_cache_path(source)
+        if cache_path is not None and self.is_remote(source):
+            LOGGER.debug("Caching template \"%s\" in: \"%s\"", source, cache_path)
+            # write to a temporary file first so readers never see partial files
+            tmp_path = '{0}.{1}.tmp'.format(cache_path, os.getpid())
+            with io.open(tmp_path, 'w', encoding=TemplateStore.ENCODING, newline='') as file_obj:
+                file_obj.write(content)
+            os.replace(tmp_path, cache_path)
+
+    def invalidate(self, source):
+        # type: (str) -> None
+        """Removes a template source from the cache (ex. when the
+        template changed), so it is loaded again
+
+        :param source: URL or file path of the template
+        """
+        with self._lock:
+            self._templates.pop(source, None)
+            self._drop_compiled(source)
+        cache_path = self.get_cache_path(source) if self.is_remote(source) else None
+        if cache_path is not None and os.path.exists(cache_path):
+            os.remove(cache_path)
+
+    def _drop_compiled(self, source):
+        # type: (str) -> None
+        """Removes the compiled template of a source and of all the
+        templates that include it (the lock should be held)
+        """
+        self._compiled.pop(source, None)
+        for dependent in self._include_dependents.pop(source, ()):
+            self._compiled.pop(dependent, None)
+
+    @staticmethod
+    def get_include_source(fragment_source, including_source):
+        # type: (str, str) -> str
+        """Returns the source of an included fragment: relative paths are
+        resolved from the directory of the local template including it
+
+        :param fragment_source: source given in the include directive
+        :param including_source: URL or file path of the including template
+        """
+        if (TemplateStore.is_remote(fragment_source) or os.path.isabs(fragment_source) or
+                TemplateStore.is_remote(including_source)):
+            return fragment_source
+        return os.path.normpath(os.path.join(os.path.dirname(including_source), fragment_source))
+
+    def _compile(self, source, content, loader, stack):
+        # type: (str, str, [Callable], tuple) -> CompiledTemplate
+        """Compiles a template resolving its include directives
+        (fragments not compiled yet are loaded concurrently)
+        and minifying it if the store minifies templates
+
+        :param source: URL or file path of the template
+        :param content: html content of the template
+        :param loader: loader of the remote fragments
+        :param stack: sources including this template (to detect include cycles)
+        :raises ValueError: if the includes form a cycle
+        """
+        stack += (source,)
+        fragment_sources = []
+        for match in INCLUDE_PATTERN.finditer(content):
+            fragment_source = self.get_include_source(match.group(1), source)
+            if fragment_source in stack:
+                raise ValueError("Include cycle in template \"{0}\": {1}".format(
+                    stack[0], ' -> '.join(stack + (fragment_source,))))
+            if fragment_source not in fragment_sources:
+                fragment_sources.append(fragment_source)
+        if not fragment_sources:
+            return self._minify_compiled(content, None, len(content.encode(TemplateStore.ENCODING)))
+        fragments = self._get_fragments(fragment_sources, loader, stack)
+        includes = {}
+        for fragment in fragments.values():
+            includes.update(fragment.includes)
+        with self._lock:
+            for fragment_source in fragment_sources:
+                includes[fragment_source] = hashlib.sha1(self._templates.get(
+                    fragment_source, '').encode(TemplateStore.ENCODING)).hexdigest()
+            for fragment_source in includes:
+                self._include_dependents.setdefault(fragment_source, set()).add(source)
+        source_size = len(content.encode(TemplateStore.ENCODING))
+        for match in INCLUDE_PATTERN.finditer(content):
+            fragment = fragments[self.get_include_source(match.group(1), source)]
+            source_size += fragment.source_size - len(match.group(0).encode(TemplateStore.ENCODING))
+        composed = INCLUDE_PATTERN.sub(
+            lambda match: fragments[self.get_include_source(match.group(1), source)].content,
+            content)
+        return self._minify_compiled(composed, includes, source_size)
+
+    def _minify_compiled(self, content, includes, source_size):
+        # type: (str, [dict], int) -> CompiledTemplate
+        """Returns the compiled template of a composed content,
+        minified if the store minifies templates
+
+        :param source_size: size in bytes of the content before any minification
+        """
+        if not self._minify:
+            return CompiledTemplate(content, includes)
+        return CompiledTemplate(storage_format.minify(content), includes, source_size)
+
+    def _get_fragments(self, fragment_sources, loader, stack):
+        # type: (list[str], [Callable], tuple) -> dict
+        """Returns the compiled fragments of a template,
+        loading the ones not compiled yet concurrently
+
+        :return: dictionary fragment source -> CompiledTemplate
+        """
+        def _get_fragment(fragment_source):
+            with self._lock:
+                compiled = self._compiled.get(fragment_source)
+            if compiled is not None:
+                return compiled
+            content = self.get(fragment_source)
+            if content is None:
+                if loader is None or not self.is_remote(fragment_source):
+                    raise IOError("Template fragment \"{0}\" included by \"{1}\" "
+                                  "is not available".format(fragment_source, stack[-1]))
+                content = loader(fragment_source)
+                self.put(fragment_source, content)
+            compiled = self._compile(fragment_source, content, loader, stack)
+            with self._lock:
+                return self._compiled.setdefault(fragment_source, compiled)
+
+        if len(fragment_sources) == 1:
+            return {fragment_sources[0]: _get_fragment(fragment_sources[0])}
+        current_deadline = deadline_utils.get_deadline()
+
+        def _get_fragment_in_worker(fragment_source):
+            with deadline_utils.use_deadline(current_deadline):
+                return _get_fragment(fragment_source)
+
+        with ThreadPoolExecutor(max_workers=min(
+                len(fragment_sources), TemplateStore.PREFETCH_WORKERS)) as executor:
+            futures = [executor.submit(_get_fragment_in_worker, fragment_source)
+                       for fragment_source in fragment_sources]
+            return dict((fragment_source, future.result())
+                        for fragment_source, future in zip(fragment_sources, futures))
+
+    def get_compiled(self, source, loader=None):
+        # type: (str, [Callable]) -> CompiledTemplate
+        """Returns the compiled template of a source, compiling it
+        only the first time it is requested
+
+        :param source: URL or file path of the template
+        :param loader: function called with the source to retrieve
+            the content of templates not cached yet (ex. from the server)
+        :return: CompiledTemplate instance
+        :raises IOError: if the template (or one of its fragments) is not
+            cached and no loader is given
+        :raises ValueError: if the includes of the template form a cycle
+        """
+        with self._lock:
+            compiled = self._compiled.get(source)
+            source_lock = self._source_locks.setdefault(source, threading.Lock())
+        if compiled is not None:
+            return compiled
+        # pages sharing a template wait for the first one to load it
+        # (no longer than the deadline of their job)
+        current_deadline = deadline_utils.get_deadline()
+        if not source_lock.acquire(
+                timeout=-1 if current_deadline is None else current_deadline.remaining()):
+            raise deadline_utils.DeadlineExceeded(
+                "Deadline of {0:.1f} s exceeded waiting for template \"{1}\"".format(
+                    current_deadline.seconds, source))
+        try:
+            with self._lock:
+                compiled = self._compiled.get(source)
+            if compiled is not None:
+                return compiled
+            content = self.get(source)
+            if content is None:
+                if loader is None:
+                    raise IOError("Template \"{0}\" is not available".format(source))
+                content = loader(source)
+                self.put(source, content)
+            compiled = self._compile(source, content, loader, ())
+            with self._lock:
+                return self._compiled.setdefault(source, compiled)
+        finally:
+            source_lock.release()
+
+    def is_compiled(self, source):
+        # type: (str) -> bool
+        """Returns True if the template of a source is already compiled
+        (ex. by prefetch), so it can be rendered without any I/O
+        """
+        with self._lock:
+            return source in self._compiled
+
+    def prefetch(self, loaders, workers=None, refresh=False):
+        # type: (dict, [int], [bool]) -> dict
+        """Planning phase of a batch: retrieves and compiles the distinct
+        template sources of all its jobs at once before rendering starts,
+        so rendering and page creation never wait for template I/O.
+
+        Remote sources are retrieved concurrently, local files are read.
+        Failures are only logged: the jobs of a failed source retry
+        loading it when their turn comes.
+
+        :param loaders: dictionary source -> loader (see get_compiled),
+            the loader of local sources can be None
+        :param workers: maximum number of sources retrieved at once
+        :param refresh: if True, remote sources are retrieved again
+            even if they are cached
+        :return: dictionary source -> exception of the failed sources
+        """
+        def _load(source):
+            loader = loaders[source]
+            if refresh and loader is not None and self.is_remote(source):
+                self.put(source, loader(source))
+            self.get_compiled(source, loader=loader)
+
+        errors = {}
+        if not loaders:
+            return errors
+        start_time = time.monotonic()
+        with trace_utils.get_tracer().span('prefetch_templates', sources=len(loaders)), \
+                ThreadPoolExecutor(max_workers=min(
+                    len(loaders), workers or TemplateStore.PREFETCH_WORKERS)) as executor:
+            futures = dict((source, executor.submit(_load, source)) for source in loaders)
+            for source, future in futures.items():
+                try:
+                    future.result()
+                except Exception as ex:
+                    LOGGER.warning("Template \"%s\" could not be prefetched: %s", source, ex)
+                    errors[source] = ex
+        LOGGER.info("Prefetched %d template source(s) in %.2f s",
+                    len(loaders) - len(errors), time.monotonic() - start_time)
+        return errors
+
+    def resolve_local_path(self, source):
+        # type: (str) -> str
+        """Returns a local file path from which the template can be read
+        without connecting to any server
+
+        :param source: URL or file path of the template
+        :return: path of the local template file
+        :raises IOError: if the template is not available locally
+        """
+        if not self.is_remote(source):
+            if not os.path.exists(source):
+                raise IOError("Template file '{0}' does not exist".format(source))
+            return source
+        cache_path = self.get_cache_path(source)
+        if cache_path is None or not os.path.exists(cache_path):
+            raise IOError(
+                "Template \"{0}\" is not available in the local template cache. "
+                "Run the generation once with a template cache directory "
+                "to store it.".format(source))
+        return cache_path
@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module to parse confluence page URLs and resolve them into page ids.
+
+Supported URL formats:
+    http://host:8090/display/SPACE/Page+Title
+    http://host:8090/pages/viewpage.action?pageId=102948555
+    https://host/wiki/spaces/SPACE/pages/102948555/Page+Title
+"""
+
+import collections
+import logging
+import re
+import threading
+from functools import lru_cache
+from urllib.parse import unquote_plus
+
+# get main logger instance
+LOGGER = logging.getLogger(__name__)
+
+# patterns are compiled once for all the calls
+URL_PATTERN = re.compile(r'(https?://[-\w_.]*:?\d{0,5})(.*)')
+DISPLAY_PATTERN = re.compile(r'(?:/wiki)?/display/([-\w_?~]*)/([^?#]*)')
+SPACES_PATTERN = re.compile(r'(?:/wiki)?/spaces/([-\w_~]+)/pages/(\d+)(?:/([^?#]*))?')
+PAGE_ID_PATTERN = re.compile(r'.*pageId=(\d+)$')
+
+# maximum number of parsed URLs kept in memory
+PARSED_URLS_CACHE_SIZE = 1024
+
+# maximum number of titles searched with a single CQL query
+MAX_TITLES_PER_QUERY = 50
+
+PageLocation = collections.namedtuple(
+    'PageLocation', ['host', 'space_key', 'title', 'raw_title', 'page_id'])
+PageLocation.__doc__ = """Values parsed out of a confluence page URL,
+values not present in the URL are None"""
+
+
+def is_url(url):
+    # type: (str) -> bool
+    """Returns True if a given string is a valid URL
+    """
+    return URL_PATTERN.match(url) is not None
+
+
+def is_id_in_url(url):
+    # type: (str) -> bool
+    """Returns True if a given string has a page id in it
+    (pageId parameter or /spaces/KEY/pages/ID path)
+    """
+    if PAGE_ID_PATTERN.match(url):
+        return True
+    return is_url(url) and parse_url(url).page_id is not None
+
+
+@lru_cache(maxsize=PARSED_URLS_CACHE_SIZE)
+def parse_url(url):
+    # type: (str) -> PageLocation
+    """Parses a confluence page URL. Results are cached,
+    so parsing the same URL again is a dictionary lookup.
+
+    :param url: full url of the confluence page
+    :raises ValueError: if the URL is not a confluence page URL
+    :return: PageLocation instance
+    """
+    url_match = URL_PATTERN.match(url)
+    if url_match is None:
+        raise ValueError("Given value is not a valid URL: \"{0}\"".format(url))
+    host, url_data = url_match.groups()
+
+    spaces_match = SPACES_PATTERN.match(url_data)
+    if spaces_match:
+        space_key, page_id, raw_title = spaces_match.groups()
+        return PageLocation(host, space_key, unquote_plus(raw_title) if raw_title else None,
+                            raw_title or None, page_id)
+
+    id_match = PAGE_ID_PATTERN.match(url_data)
+    if id_match:
+        return PageLocation(host, None, None, None, id_match.group(1))
+
+    display_match = DISPLAY_PATTERN.match(url_data)
+    if display_match:
+        space_key, raw_title = display_match.groups()
+        return PageLocation(host, space_key, unquote_plus(raw_title), raw_title, None)
+
+    raise ValueError("Confluence page not found in URL: \"{0}\"".format(url))
+
+
+def build_title_query(space_key, titles):
+    # type: (str, list[str]) -> str
+    """Returns a CQL query that searches pages with any of the
+    given titles inside a space
+    """
+    def quote(value):
+        return '"{0}"'.format(value.replace('\\', '\\\\').replace('"', '\\"'))
+
+    return 'type=page and space={0} and title in ({1})'.format(
+        quote(space_key), ','.join(quote(title) for title in titles))
+
+
+class UrlResolver(object):
+    """Resolves confluence page URLs into page ids with the fewest
+    server requests: URLs with id need no request and title URLs are
+    searched with one CQL query per space. Resolved ids are kept,
+    so every title is requested only once per resolver instance.
+    Usage:
+
+    resolver = UrlResolver()
+    with ConfluenceClient(host, user, password) as client:
+        page_ids = resolver.resolve_ids(urls, client)
+    """
+
+    def __init__(self):
+        # type: () -> UrlResolver
+        self._lock = threading.Lock()
+        # (space_key, title) -> page id
+        self._page_ids = {}
+
+    def resolve_ids(self, urls, confluence_client):
+        # type: (list[str], ConfluenceClient) -> dict
+        """Resolves a list of page URLs into page ids
+
+        :param urls: list with the URLs of the pages
+        :param confluence_client: ConfluenceClient instance
+            used for the searches
+        :return: dictionary url -> page id (None if the page was not found)
+        """
+        result = {}
+        # space -> titles not resolved yet
+        pending = collections.OrderedDict()
+        for url in urls:
+            location = parse_url(url)
+            if location.page_id is not None:
+                result[url] = location.page_id
+                continue
+            with self._lock:
+                page_id = self._page_ids.get((location.space_key, location.title))
+            if page_id is not None:
+                result[url] = page_id
+            else:
+                titles = pending.setdefault(location.space_key, [])
+                if location.title not in titles:
+                    titles.append(location.title)
+
+        for space_key, titles in pending.items():
+            self._search_titles(confluence_client, space_key, titles)
+
+        for url in urls:
+            if url not in result:
+                location = parse_url(url)
+                with self._lock:
+                    result[url] = self._page_ids.get((location.space_key, location.title))
+                if result[url] is None:
+                    LOGGER.warning("Confluence page not found for URL: \"%s\"", url)
+        return result
+
+    def _search_titles(self, confluence_client, space_key, titles):
+        # type: (ConfluenceClient, str, list[str]) -> None
+        """Searches the pages with the given titles in a space
+        and keeps their ids
+        """
+        for index in range(0, len(titles), MAX_TITLES_PER_QUERY):
+            titles_chunk = titles[index:index + MAX_TITLES_PER_QUERY]
+            results = confluence_client.search_content(
+                build_title_query(space_key, titles_chunk), limit=len(titles_chunk))
+            with self._lock:
+                for page_data in results:
+                    self._page_ids[(space_key, page_data['title'])] = page_data['id']
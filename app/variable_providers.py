@@ -0,0 +1,321 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module with the computed template variables: a variable configured as
+'!provider:argument' is computed by its provider only when the template
+of the page references it, and the result is shared by the pages of
+the batch
+"""
+
+import collections
+import io
+import logging
+import os
+import shlex
+import subprocess
+import threading
+
+from page_generator.app import url_resolver
+from page_generator.utils import deadline_utils
+
+# get main logger instance
+LOGGER = logging.getLogger(__name__)
+
+# prefix of the computed variable values: '!provider:argument'
+PROVIDER_PREFIX = '!'
+
+# fields of the 'page' provider: '!page:URL|field'
+PAGE_FIELDS = ('id', 'title', 'version', 'link')
+
+# provider that runs commands, disabled unless it is enabled explicitly
+CMD_PROVIDER = 'cmd'
+
+
+class ProviderContext(object):
+    """Inputs of the providers of a page besides their argument:
+        base_dir: directory from which relative file paths are resolved
+            (directory of the config file)
+        host: confluence host of the page
+        confluence_client: function that returns a ConfluenceClient
+            to be used within 'with' statement (ex. PageManager._confluence_client)
+    """
+
+    def __init__(self, base_dir, host=None, confluence_client=None):
+        # type: (str, [str], [Callable]) -> ProviderContext
+        """Constructor method
+
+        :param base_dir: directory of the config file
+        :param host: confluence host of the page
+        :param confluence_client: function that returns a ConfluenceClient,
+            None when rendering offline (pages can not be retrieved)
+        """
+        self.base_dir = base_dir
+        self.host = host
+        self.confluence_client = confluence_client
+
+    def get_path(self, path):
+        # type: (str) -> str
+        """Returns a file path resolved from the base directory
+        """
+        return os.path.normpath(os.path.join(self.base_dir, os.path.expanduser(path)))
+
+
+class ProviderCache(object):
+    """Memoizes the values of the computed variables of a batch: every
+    (provider, argument) is computed once, even if several pages request
+    it at the same time. Failed computations are not memoized.
+    Usage:
+
+    variable_providers.set_default_cache(ProviderCache())  # new batch
+    """
+
+    def __init__(self):
+        # type: () -> ProviderCache
+        self._values = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._values)
+
+    def get(self, key, function):
+        # type: (Hashable, Callable) -> str
+        """Returns the memoized value of a key, computing it with
+        the function (without arguments) the first time
+        """
+        with self._lock:
+            if key in self._values:
+                return self._values[key]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                if key in self._values:
+                    return self._values[key]
+            value = function()
+            with self._lock:
+                self._values[key] = value
+                self._key_locks.pop(key, None)
+        return value
+
+
+# -----------------
+# Providers
+# -----------------
+def _get_env(argument, context):
+    # type: (str, ProviderContext) -> str
+    """'!env:NAME': value of an OS environment variable
+    """
+    value = os.environ.get(argument)
+    if value is None:
+        raise ValueError("Environment variable \"{0}\" does not exist".format(argument))
+    return value
+
+
+def _get_file(argument, context):
+    # type: (str, ProviderContext) -> str
+    """'!file:PATH': content of a text file (without the last line break)
+    """
+    with io.open(context.get_path(argument), encoding='utf-8') as file_obj:
+        return file_obj.read().rstrip('\r\n')
+
+
+def _get_lines(argument, context):
+    # type: (str, ProviderContext) -> str
+    """'!lines:PATH': number of lines of a text file
+    """
+    with io.open(context.get_path(argument), 'rb') as file_obj:
+        return str(sum(1 for _ in file_obj))
+
+
+def _get_cmd(argument, context):
+    # type: (str, ProviderContext) -> str
+    """'!cmd:COMMAND ARGS': output of a command run from the
+    directory of the config file (without surrounding whitespace).
+    Only available when commands are enabled (see set_commands_enabled)
+    """
+    if not _COMMANDS_ENABLED:
+        raise ValueError("Command \"{0}\" not run: '!cmd' variables are disabled, "
+                         "run with --allow_cmd_variables to enable them".format(argument))
+    current_deadline = deadline_utils.get_deadline()
+    result = subprocess.run(
+        shlex.split(argument), cwd=context.base_dir, stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE, universal_newlines=True, check=False,
+        timeout=None if current_deadline is None else current_deadline.remaining())
+    if result.returncode != 0:
+        raise ValueError("Command \"{0}\" failed with exit code {1}: {2}".format(
+            argument, result.returncode, result.stderr.strip()))
+    return result.stdout.strip()
+
+
+def _get_page(argument, context):
+    # type: (str, ProviderContext) -> str
+    """'!page:URL|field': id, title, version (default) or link of a confluence page
+    """
+    page_url, _, field = argument.rpartition('|')
+    if not page_url:
+        page_url, field = field, 'version'
+    if field not in PAGE_FIELDS:
+        raise ValueError("Page field \"{0}\" is not one of: {1}".format(
+            field, ', '.join(PAGE_FIELDS)))
+    if context.confluence_client is None:
+        raise ValueError("Page \"{0}\" can not be retrieved when rendering offline "
+                         "(render-only mode never connects to the server)".format(page_url))
+    location = url_resolver.parse_url(page_url)
+    with context.confluence_client() as confluence_instance:
+        if location.page_id is not None:
+            page = confluence_instance.get_content(location.page_id)
+        else:
+            page = confluence_instance.get_page_from_title(location.title, location.space_key)
+    if field == 'id':
+        return str(page.id_number)
+    if field == 'title':
+        return page.title
+    if field == 'version':
+        return str(page.version_number)
+    return '{0}{1}'.format(page.base_url, page.permanent_link)
+
+
+_PROVIDERS = collections.OrderedDict([
+    ('env', _get_env),
+    ('file', _get_file),
+    ('lines', _get_lines),
+    (CMD_PROVIDER, _get_cmd),
+    ('page', _get_page),
+])
+
+
+def register_provider(name, function):
+    # type: (str, Callable) -> None
+    """Registers a variable provider, so '!name:argument' values
+    are computed by it
+
+    :param name: name of the provider
+    :param function: function called with the argument and the
+        ProviderContext of the page, it should return a string
+    """
+    _PROVIDERS[name] = function
+
+
+_COMMANDS_ENABLED = False
+
+
+def set_commands_enabled(enabled):
+    # type: (bool) -> None
+    """Enables (or disables) the '!cmd' variables: config files
+    can then run any command, so only trusted config files should be used
+    """
+    global _COMMANDS_ENABLED
+    _COMMANDS_ENABLED = enabled
+
+
+def get_commands_enabled():
+    # type: () -> bool
+    """Returns True if the '!cmd' variables are enabled (see set_commands_enabled)
+    """
+    return _COMMANDS_ENABLED
+
+
+def uses_provider(variables, provider):
+    # type: (dict, str) -> bool
+    """Returns True if any of the variables is computed by the provider
+    """
+    return any((parse(value) or (None,))[0] == provider for value in variables.values())
+
+
+def get_providers():
+    # type: () -> list[str]
+    """Returns the names of the registered providers
+    """
+    return list(_PROVIDERS)
+
+
+def parse(value):
+    # type: (object) -> tuple
+    """Returns the (provider, argument) of a computed variable value,
+    None if the value is a plain value (not a string starting with
+    '!name:' of a registered provider)
+    """
+    if not isinstance(value, str) or not value.startswith(PROVIDER_PREFIX):
+        return None
+    name, separator, argument = value[len(PROVIDER_PREFIX):].partition(':')
+    if not separator or name not in _PROVIDERS:
+        return None
+    return name, argument
+
+
+_DEFAULT_CACHE = ProviderCache()
+
+
+def get_default_cache():
+    # type: () -> ProviderCache
+    """Returns the cache in which the computed variables are memoized
+    """
+    return _DEFAULT_CACHE
+
+
+def set_default_cache(cache):
+    # type: (ProviderCache) -> None
+    """Sets the cache in which the computed variables are memoized
+    (a new cache starts a new batch)
+    """
+    global _DEFAULT_CACHE
+    _DEFAULT_CACHE = cache
+
+
+def resolve(name, value, context, cache=None):
+    # type: (str, str, ProviderContext, [ProviderCache]) -> str
+    """Returns the value of a computed variable
+
+    :param name: name of the variable ($VarName)
+    :param value: configured value '!provider:argument'
+    :param context: ProviderContext of the page
+    :param cache: ProviderCache in which the value is memoized,
+        if None the default cache is used
+    :raises ValueError: if the value can not be computed
+    """
+    provider, argument = parse(value)
+
+    def _compute():
+        LOGGER.debug("Computing variable \"%s\" with provider \"%s\"", name, provider)
+        try:
+            result = _PROVIDERS[provider](argument, context)
+        except (OSError, subprocess.SubprocessError) as ex:
+            raise ValueError("Variable \"{0}\" can not be computed: {1}".format(name, ex))
+        if not isinstance(result, str):
+            raise ValueError("Provider \"{0}\" of variable \"{1}\" did not return a "
+                             "string".format(provider, name))
+        return result
+
+    if cache is None:
+        cache = get_default_cache()
+    return cache.get(
+        (provider, argument, context.base_dir, context.host), _compute)
+
+
+def resolve_variables(variables, find_variables, context, cache=None):
+    # type: (dict, Callable, ProviderContext, [ProviderCache]) -> dict
+    """Returns the template variables of a page with the computed
+    variables that the template references resolved (the ones it
+    does not reference are left out, they are never computed)
+
+    :param variables: dictionary with the plain and computed variables
+    :param find_variables: function that returns the names of a set of
+        variables that are referenced by the template
+        (ex. CompiledTemplate.find_variables)
+    :param context: ProviderContext of the page
+    :param cache: ProviderCache in which the values are memoized,
+        if None the default cache is used
+    :return: a dictionary with the template variables
+    :raises ValueError: if a referenced variable can not be computed
+    """
+    if not any(parse(value) is not None for value in variables.values()):
+        return variables
+    # plain names are searched as well, so longer names are matched first
+    referenced = find_variables(collections.OrderedDict.fromkeys(variables, ''))
+    resolved = collections.OrderedDict()
+    for name, value in variables.items():
+        if parse(value) is None:
+            resolved[name] = value
+        elif name in referenced:
+            resolved[name] = resolve(name, value, context, cache=cache)
+    return resolved
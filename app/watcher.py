@@ -0,0 +1,286 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module to watch the inputs of the pages (configuration files, local
+template files and remote template pages) and regenerate only the pages
+whose inputs changed
+"""
+
+import collections
+import logging
+import os
+import time
+
+from page_generator.app import config_utils
+from page_generator.app import url_resolver
+from page_generator.app import variable_providers
+from page_generator.app.page_manager import PageManager
+from page_generator.app.template_store import TemplateStore
+from page_generator.utils import deadline_utils
+
+# get main logger instance
+LOGGER = logging.getLogger(__name__)
+
+
+class Watcher(object):
+    """Watches the inputs of a set of pages and keeps them up to date.
+
+    A dependency index (template source or included fragment ->
+    configuration files that use it) is kept, so when an input changes
+    only the pages that use it are regenerated:
+        configuration file: modification time is polled
+        local template file: modification time is polled
+        remote template page: version numbers of all the remote templates
+            are polled with a single search request
+
+    Confluence clients (one per host and user) and the template store
+    are kept open between regenerations, so connections and templates
+    that did not change stay warm.
+    Usage:
+
+    with Watcher(['page_1.json', 'page_2.json']) as watcher:
+        watcher.run()
+    """
+
+    # maximum number of ids per version search request
+    MAX_IDS_PER_QUERY = 50
+
+    def __init__(self, config_files, template_store=None, metrics=None,
+                 interval=1.0, remote_interval=10.0, job_timeout=None):
+        # type: (list[str], [TemplateStore], [metrics_utils.ClientMetrics], [float], [float], [float]) -> Watcher
+        """Constructor method
+
+        :param config_files: list of json configuration files of the pages
+        :param template_store: TemplateStore instance used to cache
+            the templates, if None a memory only store is used
+        :param metrics: ClientMetrics instance in which the metrics of the
+            requests to the server are collected, if None they are not collected
+        :param interval: seconds between checks of the local files
+        :param remote_interval: seconds between checks of the remote templates
+        :param job_timeout: deadline in seconds of every page publication,
+            if None pages have no deadline
+        """
+        self._config_files = list(config_files)
+        self._template_store = template_store or TemplateStore()
+        self.metrics = metrics
+        self._interval = interval
+        self._remote_interval = remote_interval
+        self._job_timeout = job_timeout
+        self._client_pool = None
+        self._resolver = url_resolver.UrlResolver()
+        # config file -> PageManager / ConfluenceClient
+        self._managers = {}
+        self._config_clients = {}
+        # template source -> set of config files that use it
+        self._dependents = collections.defaultdict(set)
+        # local path -> (modification time, size)
+        self._file_states = {}
+        # remote source -> page id / last version number
+        self._remote_ids = {}
+        self._remote_versions = {}
+        self._last_remote_check = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        # type: () -> None
+        """Closes the confluence clients
+        """
+        if self._client_pool is not None:
+            self._client_pool.close()
+
+    @property
+    def dependents(self):
+        # type: () -> dict
+        """Returns the dependency index: template source ->
+        set of configuration files that use it
+        """
+        return self._dependents
+
+    def _get_client(self, config_file):
+        # type: (str) -> api.ConfluenceClient
+        """Returns the shared client for the host and user of a config file
+        """
+        if self._client_pool is None:
+            # imported on demand: requests is only needed once the server is used
+            from page_generator.confluence import api
+            self._client_pool = api.ClientPool(metrics=self.metrics)
+        config_obj = config_utils.Config(config_file)
+        return self._client_pool.get(
+            config_obj.get_host_url(),
+            PageManager.resolve_credential(config_obj.get_user()),
+            PageManager.resolve_credential(config_obj.get_password()))
+
+    def _load(self, config_file):
+        # type: (str) -> None
+        """Loads (or reloads) a config file and indexes its template source
+        """
+        client = self._get_client(config_file)
+        manager = PageManager(config_file, template_store=self._template_store,
+                              metrics=self.metrics, confluence_client=client)
+        self._managers[config_file] = manager
+        self._config_clients[config_file] = client
+        for source in list(self._dependents):
+            self._dependents[source].discard(config_file)
+            if not self._dependents[source]:
+                del self._dependents[source]
+        source = manager.template_source
+        self._dependents[source].add(config_file)
+        self._is_modified(config_file)
+        if not self._template_store.is_remote(source):
+            self._is_modified(source)
+
+    def _is_modified(self, path):
+        # type: (str) -> bool
+        """Returns True if a local file changed since its last check
+        """
+        try:
+            stat = os.stat(path)
+            state = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            state = None
+        previous_state = self._file_states.get(path)
+        self._file_states[path] = state
+        return previous_state != state
+
+    def _check_remote_sources(self):
+        # type: () -> set
+        """Polls the version numbers of the remote templates
+
+        :return: set of config files that use a remote template that changed
+        """
+        sources_by_client = collections.defaultdict(list)
+        for source, config_files in self._dependents.items():
+            if self._template_store.is_remote(source):
+                client = self._config_clients[next(iter(config_files))]
+                sources_by_client[client].append(source)
+        changed = set()
+        for client, sources in sources_by_client.items():
+            unresolved = [source for source in sources if source not in self._remote_ids]
+            if unresolved:
+                self._remote_ids.update(self._resolver.resolve_ids(unresolved, client))
+            page_ids = sorted(set(self._remote_ids[source] for source in sources
+                                  if self._remote_ids.get(source) is not None))
+            versions = {}
+            for index in range(0, len(page_ids), Watcher.MAX_IDS_PER_QUERY):
+                chunk = page_ids[index:index + Watcher.MAX_IDS_PER_QUERY]
+                results = client.search_content(
+                    'id in ({0})'.format(','.join(chunk)),
+                    limit=len(chunk), expand=['version'])
+                for result in results:
+                    versions[str(result['id'])] = result['version']['number']
+            for source in sources:
+                version = versions.get(self._remote_ids.get(source))
+                previous_version = self._remote_versions.get(source)
+                self._remote_versions[source] = version
+                if previous_version is not None and previous_version != version:
+                    LOGGER.info("Template changed: \"%s\" (version %s)", source, version)
+                    self._template_store.invalidate(source)
+                    changed.update(self._dependents[source])
+        return changed
+
+    def check_changes(self):
+        # type: () -> set
+        """Checks all the inputs once, invalidating the cached templates
+        that changed
+
+        :return: set of config files whose page should be regenerated
+        """
+        changed = set()
+        for config_file in self._config_files:
+            if self._is_modified(config_file):
+                LOGGER.info("Configuration changed: \"%s\"", config_file)
+                try:
+                    self._load(config_file)
+                except Exception as ex:
+                    LOGGER.error("Configuration \"%s\" cannot be loaded: %s", config_file, ex)
+                    continue
+                changed.add(config_file)
+        for source in list(self._dependents):
+            if not self._template_store.is_remote(source) and self._is_modified(source):
+                LOGGER.info("Template changed: \"%s\"", source)
+                self._template_store.invalidate(source)
+                changed.update(self._dependents[source])
+        now = time.monotonic()
+        if (self._last_remote_check is None or
+                now - self._last_remote_check >= self._remote_interval):
+            self._last_remote_check = now
+            try:
+                changed.update(self._check_remote_sources())
+            except Exception as ex:
+                LOGGER.error("Remote templates cannot be checked: %s", ex)
+        return changed
+
+    def regenerate(self, config_files):
+        # type: (list[str]) -> dict
+        """Publishes the pages of the given config files,
+        a failed page does not stop the others
+
+        :return: dictionary config file -> exception of the failed pages
+        """
+        errors = {}
+        # computed variables are computed again on every regeneration
+        variable_providers.set_default_cache(variable_providers.ProviderCache())
+        for config_file in config_files:
+            try:
+                with deadline_utils.deadline(self._job_timeout):
+                    self._managers[config_file].publish_page()
+            except Exception as ex:
+                LOGGER.error("Page of \"%s\" cannot be generated: %s", config_file, ex)
+                errors[config_file] = ex
+                continue
+            self._index_includes(config_file)
+        return errors
+
+    def _index_includes(self, config_file):
+        # type: (str) -> None
+        """Indexes the fragments included by the template of a config file,
+        so a change in a fragment regenerates the pages that include it
+        """
+        source = self._managers[config_file].template_source
+        if not self._template_store.is_compiled(source):
+            return
+        for fragment_source in self._template_store.get_compiled(source).includes:
+            self._dependents[fragment_source].add(config_file)
+            if (not self._template_store.is_remote(fragment_source) and
+                    fragment_source not in self._file_states):
+                self._is_modified(fragment_source)
+
+    def start(self):
+        # type: () -> dict
+        """Loads all the config files, publishes all the pages
+        and records the initial state of their inputs
+
+        :return: dictionary config file -> exception of the failed pages
+        """
+        for config_file in self._config_files:
+            self._load(config_file)
+        errors = self.regenerate(self._config_files)
+        self.check_changes()
+        return errors
+
+    def run(self, max_cycles=None):
+        # type: ([int]) -> None
+        """Publishes all the pages and then regenerates the pages whose
+        inputs changed until interrupted (Ctrl+C)
+
+        :param max_cycles: number of checks before returning,
+            if None it runs until interrupted
+        """
+        self.start()
+        LOGGER.info("Watching %d configuration file(s) and %d template(s)",
+                    len(self._config_files), len(self._dependents))
+        cycles = 0
+        try:
+            while max_cycles is None or cycles < max_cycles:
+                time.sleep(self._interval)
+                changed = self.check_changes()
+                if changed:
+                    self.regenerate(sorted(changed))
+                cycles += 1
+        except KeyboardInterrupt:
+            LOGGER.info("Watch mode stopped")
@@ -7,10 +7,25 @@ in order to use the API
 
 import abc
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
 import requests
 
 from page_generator.confluence.exceptions import ConfluenceError
 from page_generator.confluence.exceptions import ConfluencePermissionError
+from page_generator.confluence.exceptions import ConfluenceRateLimited
+from page_generator.confluence.exceptions import ConfluenceResourceNotFound
+from page_generator.confluence.exceptions import ConfluenceServerError
+from page_generator.confluence.exceptions import ConfluenceValueTooLong
+from page_generator.confluence.exceptions import ConfluenceVersionConflict
+from page_generator.confluence import hedging
+from page_generator.confluence.retry import RetryPolicy, parse_retry_after
+from page_generator.confluence import single_flight
+from page_generator.utils import deadline_utils
+from page_generator.utils import http_utils
+from page_generator.utils.json_utils import iter_json_chunks
 
 # main logger instance
 LOGGER = logging.getLogger(__name__)
@@ -30,14 +45,34 @@ class ConfluenceClient(object):
         instance.get_content(...)
     """
 
-    def __init__(self, confluence_host, user, password):
-        # type: (str, str, str) -> ConfluenceClient
+    # maximum number of reads (and hedges) sent at once by a client
+    MAX_HEDGED_READS = 16
+
+    def __init__(self, confluence_host, user, password, metrics=None, retry_policy=None,
+                 timeout=None, hedge_policy=None, coalesce_reads=True):
+        # type: (str, str, str, [metrics_utils.ClientMetrics], [RetryPolicy], [tuple], [hedging.HedgePolicy], [bool]) -> ConfluenceClient
         """
 
         :param confluence_host: confluence host name (with http extension)
             ex: http://wiki-id.conti.de:8080
         :param user: name of the user (existing in the server)
         :param password: password string of the user
+        :param metrics: ClientMetrics instance in which the requests
+            metrics are collected, if None no metrics are collected
+        :param retry_policy: RetryPolicy used for the requests that fail
+            with transient errors, if None the default policy is used
+            (use retry.NO_RETRY to disable the retries)
+        :param timeout: (connect, read) timeout in seconds of the requests,
+            if None the default timeout of http_utils is used. Requests sent
+            for a job with a deadline (see deadline_utils) are also
+            bounded by the time left
+        :param hedge_policy: HedgePolicy used to hedge the reads (GET),
+            if None the default policy of the hedging module is used
+            (reads are not hedged unless a default policy is set)
+        :param coalesce_reads: if True, concurrent identical reads (same path
+            and parameters) share one request, every caller gets its own
+            copy of the decoded result. Reads are shared by all the clients
+            of the same host and credentials
         """
         # Host and authentication credentials
         self._confluence_host = confluence_host
@@ -47,6 +82,15 @@ class ConfluenceClient(object):
         # build base API URL with confluence host name
         self._api_base_url = '{0}/rest/api'.format(self._confluence_host)
         self._client = None
+        self._metrics = metrics
+        self._retry_policy = retry_policy or RetryPolicy()
+        self._timeout = timeout
+        self._hedge_policy = hedge_policy or hedging.get_default_policy()
+        self._hedge_executor = None
+        self._hedge_lock = threading.Lock()
+        self._single_flight = (
+            single_flight.get_shared(confluence_host, user, password)
+            if coalesce_reads else None)
 
     def __enter__(self):
         # type: () -> ConfluenceClient
@@ -63,6 +107,10 @@ class ConfluenceClient(object):
         """Method to be called when exit 'with' statement
         to close the client connection and reset object instance
         """
+        if self._hedge_executor is not None:
+            # losing hedges are not waited for
+            self._hedge_executor.shutdown(wait=False)
+            self._hedge_executor = None
         if self._client:
             self._client.close()
             self._client = None
@@ -79,6 +127,20 @@ class ConfluenceClient(object):
         # required.
         return self._client
 
+    @staticmethod
+    def _get_error_message(response):
+        # type: (requests.Response) -> str
+        """Returns the message of an error response
+        (error bodies are not always json, ex. from a proxy)
+        """
+        try:
+            error_content_obj = ContentError(response.json())
+            return '{} (code:{})'.format(error_content_obj.message,
+                                         error_content_obj.status_code)
+        except Exception:
+            text = (response.text or '').strip()[:200] or response.reason
+            return '{} (code:{})'.format(text, response.status_code)
+
     @staticmethod
     def _handle_response_errors(path, params, response):
         # type: (str, dict[str, str], requests.Response) -> None
@@ -95,28 +157,129 @@ class ConfluenceClient(object):
             (check message to verify details)
         :raises ConfluencePermissionError: when the credentials
             were not valid to use resources from REST API in server.
-
+        :raises ConfluenceResourceNotFound: when the content does not exist
+        :raises ConfluenceVersionConflict: when the content was modified
+            by another request (version number is outdated)
+        :raises ConfluenceValueTooLong: when the request is too large
+        :raises ConfluenceRateLimited: when the server limits the requests
+            (transient)
+        :raises ConfluenceServerError: when the server fails (transient)
         """
-        if response.status_code == 400:
-            error_content_obj = ContentError(response.json())
-            raise ConfluenceError(
-                path, params, response,
-                msg='{} (code:{})'.format(
-                    error_content_obj.message,
-                    error_content_obj.status_code
-                )
-            )
-        elif response.status_code == 403:
+        status_code = response.status_code
+        if status_code < 400:
+            return
+        if status_code in (401, 403):
             raise ConfluencePermissionError(path, params, response)
-        elif response.status_code == 404:
-            # raise ConfluenceResourceNotFound(path, params, response)
-            Exception(path, params, response)
-        elif response.status_code == 409:
-            # raise ConfluenceVersionConflict(path, params, response)
-            Exception(path, params, response)
-        elif response.status_code == 413:
-            # raise ConfluenceValueTooLong(path, params, response)
-            Exception(path, params, response)
+        elif status_code == 404:
+            raise ConfluenceResourceNotFound(path, params, response)
+        elif status_code == 409:
+            raise ConfluenceVersionConflict(path, params, response)
+        elif status_code == 413:
+            raise ConfluenceValueTooLong(path, params, response)
+        elif status_code == 429:
+            raise ConfluenceRateLimited(
+                path, params, response,
+                retry_after=parse_retry_after(response.headers.get('Retry-After')))
+        elif status_code >= 500:
+            raise ConfluenceServerError(
+                path, params, response,
+                retry_after=parse_retry_after(response.headers.get('Retry-After')))
+        raise ConfluenceError(path, params, response,
+                              msg=ConfluenceClient._get_error_message(response))
+
+    def _request(self, method, path, params, retry=True, **kwargs):
+        # type: (str, str, dict, [bool], **object) -> requests.Response
+        """Sends a request to the REST API, checks its response and
+        sends it again if it failed with a transient error
+        (see RetryPolicy)
+
+        :param method: HTTP method (ex. 'GET')
+        :param path: path to REST API
+        :param params: dictionary with the parameters of the request
+        :param retry: False for requests that can not be sent again
+            (ex. streamed bodies)
+        :param kwargs: arguments for requests.Session.request
+        :return: response object from requests.Response
+        """
+        url = '{}/{}'.format(self._api_base_url, path)
+        attempt = 1
+        while True:
+            try:
+                response = self._send_request(
+                    method, path, url, params=params, auth=self._basic_auth,
+                    timeout=http_utils.get_request_timeout(self._timeout), **kwargs)
+                self._handle_response_errors(path, params, response)
+                return response
+            except (ConfluenceError, requests.RequestException) as ex:
+                if not retry or not self._retry_policy.should_retry(method, ex, attempt):
+                    raise
+                delay = self._retry_policy.get_delay(ex, attempt)
+                current_deadline = deadline_utils.get_deadline()
+                if current_deadline is not None and current_deadline.remaining() <= delay:
+                    raise deadline_utils.DeadlineExceeded(
+                        "Deadline of {0:.1f} s exceeded retrying {1} {2}: {3}".format(
+                            current_deadline.seconds, method, path, ex))
+                LOGGER.warning("%s %s failed (attempt %d), retrying in %.2f s: %s",
+                               method, path, attempt, delay, ex)
+                if self._metrics is not None:
+                    self._metrics.increment('retries')
+                time.sleep(delay)
+                attempt += 1
+
+    def _send_request(self, method, path, url, **kwargs):
+        # type: (str, str, str, **object) -> requests.Response
+        """Sends an HTTP request over the client session and,
+        if metrics are enabled, records its latency, size,
+        status code and connection reuse.
+
+        :param method: HTTP method (ex. 'GET')
+        :param path: path to REST API (used as metrics endpoint)
+        :param url: full url of the request
+        :param kwargs: arguments for requests.Session.request
+        :return: response object from requests.Response
+        """
+        if self._metrics is None:
+            return self.client.request(method, url, **kwargs)
+
+        body_counter = None
+        if kwargs.get('data') is not None and not isinstance(kwargs['data'], (bytes, str, dict)):
+            # count the bytes of streamed bodies while they are sent
+            body_counter = _ByteCounter(kwargs['data'])
+            kwargs['data'] = body_counter
+        connections_before = self._count_connections(url)
+        start_time = time.time()
+        try:
+            response = self.client.request(method, url, **kwargs)
+        except requests.RequestException:
+            self._metrics.observe_request(method, path, None, time.time() - start_time)
+            raise
+        elapsed = time.time() - start_time
+
+        if body_counter is not None:
+            bytes_sent = body_counter.count
+        else:
+            bytes_sent = len(response.request.body or b'')
+        new_connection = None
+        if connections_before is not None:
+            new_connection = self._count_connections(url) > connections_before
+        self._metrics.observe_request(
+            method, path, response.status_code, elapsed,
+            bytes_sent=bytes_sent,
+            bytes_received=len(response.content),
+            new_connection=new_connection)
+        return response
+
+    def _count_connections(self, url):
+        # type: (str) -> int
+        """Returns the number of connections opened so far by the
+        connection pools of the session adapter used for the url,
+        None if they can not be retrieved
+        """
+        try:
+            pools = self.client.get_adapter(url).poolmanager.pools
+            return sum(pools[key].num_connections for key in pools.keys())
+        except (AttributeError, KeyError):
+            return None
 
     def _post(self, path, params, data, files=None):
         # type: (str, dict, dict, str) -> dict
@@ -129,20 +292,60 @@ class ConfluenceClient(object):
         :param files:
         :return:
         """
-        # build base url with path
-        url = "{}/{}".format(self._api_base_url, path)
         headers = {"X-Atlassian-Token": "nocheck"}
         # send POST request over client and expect response
-        response = self.client.post(
-            url,
-            params=params,
+        response = self._request(
+            'POST', path, params,
             json=data,
             headers=headers,
-            files=files,
-            auth=self._basic_auth
+            files=files
+        )
+        return response.json()
+
+    def _post_stream(self, path, params, body_chunks):
+        # type: (str, dict, Iterable[bytes]) -> dict
+        """HTTP POST method for Confluence Client api which sends
+        a json body as a stream of encoded chunks
+        (chunked transfer encoding), so the payload is never
+        built in memory as a whole.
+
+        :param path: path to REST API to post content
+        :param params: dictionary with the parameters
+            to add to POST message.
+        :param body_chunks: iterable of encoded json chunks to post
+        :return:
+        """
+        headers = {
+            "X-Atlassian-Token": "nocheck",
+            "Content-Type": "application/json"
+        }
+        # send POST request over client and expect response
+        # (not retried: the chunks are consumed by the first attempt)
+        response = self._request(
+            'POST', path, params,
+            retry=False,
+            data=body_chunks,
+            headers=headers
+        )
+        return response.json()
+
+    def _put(self, path, params, data):
+        # type: (str, dict, dict) -> dict
+        """HTTP PUT method for Confluence Client api
+
+        :param path: path to REST API to update content
+        :param params: dictionary with the parameters
+            to add to PUT message.
+        :param data: dictionary with the data to put
+        :return:
+        """
+        headers = {"X-Atlassian-Token": "nocheck"}
+        # send PUT request over client and expect response
+        response = self._request(
+            'PUT', path, params,
+            json=data,
+            headers=headers
         )
-        #
-        self._handle_response_errors(path, params, response)
         return response.json()
 
     def _get(self, path, params, expand):
@@ -155,19 +358,86 @@ class ConfluenceClient(object):
         :param expand:
         :return:
         """
-        url = '{}/{}'.format(self._api_base_url, path)
         if expand:
             params['expand'] = ','.join(expand)
+        if self._single_flight is None:
+            return self._get_json(path, params)
+        # concurrent identical reads share the same request and result
+        key = (path, tuple(sorted((name, str(value)) for name, value in params.items())))
+        result, shared = self._single_flight.do(key, lambda: self._get_json(path, params))
+        if shared and self._metrics is not None:
+            self._metrics.increment('reads_coalesced')
+        return result
+
+    def _get_json(self, path, params):
+        # type: (str, dict[str, str]) -> dict
+        """Sends a GET request (hedged if there is a hedge policy)
+        and returns its decoded json response
+        """
         # send GET request over client and expect response
-        response = self.client.get(
-            url,
-            params=params,
-            auth=self._basic_auth
-        )
-        # check HTTP response to handle errors
-        self._handle_response_errors(path, params, response)
+        if self._hedge_policy is None:
+            response = self._request('GET', path, params)
+        else:
+            response = self._hedged_request('GET', path, params)
         return response.json()
 
+    def _hedged_request(self, method, path, params):
+        # type: (str, str, dict) -> requests.Response
+        """Sends an idempotent request and, if it has not finished after
+        the delay of the hedge policy, sends it a second time.
+        The first successful response wins (the other one is discarded).
+
+        Counters 'hedges_fired' and 'hedges_won' (hedge faster than the
+        first request) are collected in the metrics.
+
+        :param method: HTTP method (idempotent, ex. 'GET')
+        :param path: path to REST API
+        :param params: dictionary with the parameters of the request
+        :return: response object from requests.Response
+        """
+        hedge_policy = self._hedge_policy
+        # the requests run in other threads with the deadline of the job
+        current_deadline = deadline_utils.get_deadline()
+
+        def send():
+            with deadline_utils.use_deadline(current_deadline):
+                start_time = time.time()
+                response = self._request(method, path, dict(params))
+                hedge_policy.observe(time.time() - start_time)
+                return response
+
+        with self._hedge_lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(
+                    max_workers=ConfluenceClient.MAX_HEDGED_READS,
+                    thread_name_prefix='hedged-read')
+            executor = self._hedge_executor
+        first_future = executor.submit(send)
+        try:
+            return first_future.result(timeout=hedge_policy.get_delay())
+        except FutureTimeoutError:
+            pass
+        LOGGER.debug("Read %s %s is slow, sending a hedge", method, path)
+        if self._metrics is not None:
+            self._metrics.increment('hedges_fired')
+        hedge_future = executor.submit(send)
+        pending = [first_future, hedge_future]
+        error = None
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            # first request wins if both finished at once
+            for future in (first_future, hedge_future):
+                if future not in done or future not in pending:
+                    continue
+                pending.remove(future)
+                if future.exception() is not None:
+                    error = future.exception()
+                    continue
+                if future is hedge_future and self._metrics is not None:
+                    self._metrics.increment('hedges_won')
+                return future.result()
+        raise error
+
     def _delete(self, path, params):
         # type: (str, dict) -> None
         """HTTP DELETE method for Confluence Client api
@@ -177,22 +447,16 @@ class ConfluenceClient(object):
             to add to DELETE message.
         :return: None
         """
-        # build base url with path
-        url = "{}/{}".format(self._api_base_url, path)
         headers = {"X-Atlassian-Token": "nocheck"}
-        # send POST request over client and expect response
-        response = self.client.delete(
-            url,
-            params=params,
-            headers=headers,
-            auth=self._basic_auth
+        # send DELETE request over client and check the response
+        self._request(
+            'DELETE', path, params,
+            headers=headers
         )
-        # check HTTP response to handle errors
-        self._handle_response_errors(path, params, response)
 
     def create_page(self, page_title, space_key, page_content,
-                    parent_page_id=None, content_type='page'):
-        # type: (str, str, str, [str], [str]) -> Page
+                    parent_page_id=None, content_type='page', version_message=None):
+        # type: (str, str, str, [str], [str], [str]) -> Page
         """Creates a new page in Confluence inside the space_key given,
         under the parent_page_id as a child page
 
@@ -206,10 +470,91 @@ class ConfluenceClient(object):
             in which the page will be created as a child page
         :param content_type: Optional argument for content
             ('page' as default)
+        :param version_message: Optional message of the first version
+        :return: Page Content Object
+        :rtype: Page
+        """
+        data = self._build_page_data(
+            page_title, space_key, page_content, parent_page_id, content_type)
+        if version_message is not None:
+            data['version'] = {'number': 1, 'message': version_message}
+
+        response = self._post('content', {}, data)
+        # create new page object from response gotten
+        new_page = Page(response)
+        return new_page
+
+    def create_page_from_chunks(self, page_title, space_key, content_chunks,
+                                parent_page_id=None, content_type='page'):
+        # type: (str, str, Iterable, [str], [str]) -> Page
+        """Creates a new page in Confluence like 'create_page' does,
+        but the HTML content is given as an iterable of chunks
+        (ex. MappedTemplateFile.iter_chunks) which is streamed
+        into the request body while it is being rendered.
+
+        :param page_title: String with the title of the page
+            that will be created
+        :param space_key: String with the space key in confluence
+            in which the page will exists.
+        :param content_chunks: iterable of str or utf-8 bytes chunks
+            with the HTML content of the page
+        :param parent_page_id: String with the ID number of the parent page
+            in which the page will be created as a child page
+        :param content_type: Optional argument for content
+            ('page' as default)
+        :return: Page Content Object
+        :rtype: Page
+        """
+        data = self._build_page_data(
+            page_title, space_key, None, parent_page_id, content_type)
+        body_chunks = iter_json_chunks(
+            data, ['body', 'storage', 'value'], content_chunks)
+
+        response = self._post_stream('content', {}, body_chunks)
+        # create new page object from response gotten
+        new_page = Page(response)
+        return new_page
+
+    def update_page(self, page_id, page_title, space_key, page_content, version_number,
+                    parent_page_id=None, content_type='page', version_message=None):
+        # type: (str, str, str, str, int, [str], [str], [str]) -> Page
+        """Updates the title, content and (if given) the parent page
+        of an existing page in Confluence
+
+        :param page_id: String with the ID number of the page to update
+        :param page_title: String with the new title of the page
+        :param space_key: String with the space key of the page
+        :param page_content: new HTML String Content of the page
+        :param version_number: new version number of the page
+            (current version number + 1)
+        :param parent_page_id: String with the ID number of the new
+            parent page, if None the page is not moved
+        :param content_type: Optional argument for content
+            ('page' as default)
+        :param version_message: Optional message of the new version
         :return: Page Content Object
         :rtype: Page
         """
-        # json structure for a new page
+        data = self._build_page_data(
+            page_title, space_key, page_content, parent_page_id, content_type)
+        data['id'] = page_id
+        data['version'] = {'number': version_number}
+        if version_message is not None:
+            data['version']['message'] = version_message
+
+        response = self._put('content/{}'.format(page_id), {}, data)
+        # create new page object from response gotten
+        new_page = Page(response)
+        return new_page
+
+    @staticmethod
+    def _build_page_data(page_title, space_key, page_content,
+                         parent_page_id=None, content_type='page'):
+        # type: (str, str, str, [str], [str]) -> dict
+        """Builds the json structure for a new page
+
+        :return: dictionary with the page data to post
+        """
         data = {
             'type': content_type,
             'title': page_title,
@@ -228,11 +573,7 @@ class ConfluenceClient(object):
                 'type': content_type,
                 'id': parent_page_id
             }]
-
-        response = self._post('content', {}, data)
-        # create new page object from response gotten
-        new_page = Page(response)
-        return new_page
+        return data
 
     def delete_content(self, content_id, content_status='current'):
         # type: (str, [str]) -> None
@@ -309,6 +650,129 @@ class ConfluenceClient(object):
         new_page = Page(response)
         return new_page
 
+    def search_content(self, cql, limit=25, expand=None):
+        # type: (str, [int], [list]) -> list[dict]
+        """Searches content with a CQL query, following the
+        result pages until all the results are retrieved.
+
+        ex. cql = 'type=page and space="DEV" and title in ("A","B")'
+
+        :param cql: Confluence Query Language expression
+        :param limit: maximum number of results per request
+        :param expand: list of properties to expand in the results
+        :return: list with the json data of every result
+        """
+        return self._get_all_results('content/search', {'cql': cql}, limit, expand)
+
+    def get_child_pages(self, page_id, limit=50, expand=None):
+        # type: (str, [int], [list]) -> list[dict]
+        """Returns the direct child pages of a page, following the
+        result pages until all the children are retrieved.
+
+        :param page_id: id number of the parent page
+        :param limit: maximum number of children per request
+        :param expand: list of properties to expand in the results
+            (ex. ['version', 'body.storage'])
+        :return: list with the json data of every child page
+        """
+        return self._get_all_results(
+            'content/{}/child/page'.format(page_id), {}, limit, expand)
+
+    def _get_all_results(self, path, params, limit, expand):
+        # type: (str, dict, int, [list]) -> list[dict]
+        """Sends GET requests to a paginated REST API path until
+        all the results are retrieved
+
+        :return: list with the json data of every result
+        """
+        results = []
+        start = 0
+        while True:
+            page_params = dict(params, start=start, limit=limit)
+            response = self._get(path=path, params=page_params, expand=expand)
+            page_results = response.get('results', [])
+            results.extend(page_results)
+            if not page_results or 'next' not in response.get('_links', {}):
+                break
+            start += len(page_results)
+        return results
+
+
+class ClientPool(object):
+    """Opened ConfluenceClient instances shared per host and user,
+    so long running processes (ex. watch or service mode) reuse the
+    same sessions and their connections for all the pages.
+
+    This instance should be called within 'with' statement.
+    Usage:
+
+    with ClientPool() as pool:
+        instance = pool.get('http://host.com', 'user_x', 'pass_x')
+    """
+
+    def __init__(self, metrics=None, timeout=None):
+        # type: ([metrics_utils.ClientMetrics], [tuple]) -> ClientPool
+        """Constructor method
+
+        :param metrics: ClientMetrics instance in which the requests
+            metrics of all the clients are collected
+        :param timeout: (connect, read) timeout of the requests of
+            all the clients, if None the default timeout is used
+        """
+        self._metrics = metrics
+        self._timeout = timeout
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        # type: () -> ClientPool
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return len(self._clients)
+
+    def get(self, confluence_host, user, password):
+        # type: (str, str, str) -> ConfluenceClient
+        """Returns the opened client of a host and user,
+        opening it the first time it is requested
+        """
+        with self._lock:
+            client = self._clients.get((confluence_host, user))
+            if client is None:
+                client = ConfluenceClient(confluence_host, user, password,
+                                          metrics=self._metrics, timeout=self._timeout)
+                client.__enter__()
+                self._clients[(confluence_host, user)] = client
+            return client
+
+    def close(self):
+        # type: () -> None
+        """Closes all the clients of the pool
+        """
+        with self._lock:
+            for client in self._clients.values():
+                client.__exit__(None, None, None)
+            self._clients.clear()
+
+
+class _ByteCounter(object):
+    """Iterable wrapper that counts the bytes of the chunks
+    of a streamed request body while they are consumed
+    """
+
+    def __init__(self, chunks):
+        # type: (Iterable[bytes]) -> _ByteCounter
+        self._chunks = chunks
+        self.count = 0
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            self.count += len(chunk)
+            yield chunk
+
 
 class Content(object):
     """Base Class for classes related for Confluence Content
@@ -351,8 +815,12 @@ class Page(Content):
         self._content = None
         self._permanent_link = None
         self._base_url = None
+        self._version_number = None
+        self._version_message = None
         self._retrieve_values_from_json()
-        LOGGER.debug("New Page Object created: %s", self)
+        # pages are created for every response, skip building the record
+        if LOGGER.isEnabledFor(logging.DEBUG):
+            LOGGER.debug("New Page Object created: %s", self)
 
     def _retrieve_results_from_json(self):
         # type: () -> dict
@@ -458,6 +926,11 @@ class Page(Content):
         else:
             missing_value = 'space'
 
+        # version (optional, only present if expanded)
+        if 'version' in json_data_response.keys():
+            self._version_number = json_data_response['version'].get('number')
+            self._version_message = json_data_response['version'].get('message')
+
         # retrieve body section from API response
         missing_value = self._validate_body_section(json_data_response)
 
@@ -484,6 +957,22 @@ class Page(Content):
         """
         return self._title
 
+    @property
+    def version_number(self):
+        # type: () -> int
+        """Returns the version number of the Confluence page,
+        None if the version was not retrieved
+        """
+        return self._version_number
+
+    @property
+    def version_message(self):
+        # type: () -> str
+        """Returns the message of the current version of the Confluence page,
+        None if the version was not retrieved or has no message
+        """
+        return self._version_message
+
     @property
     def content(self):
         # type: () -> str
@@ -4,9 +4,14 @@ Module with Exception definitions
 
 
 class ConfluenceError(Exception):
-    """Corresponds to 413 errors on the REST API.
+    """General error on the REST API.
+
+    Errors with transient set to True are temporary
+    (the same request may succeed if it is sent again).
     """
 
+    transient = False
+
     def __init__(self, path, params, response, msg=None):
         # type: (str, dict, requests.Response, [str]) -> None
         if not msg:
@@ -26,3 +31,62 @@ class ConfluencePermissionError(ConfluenceError):
         msg = 'User has insufficient permissions to perform ' \
               'that operation on the path {}'.format(path)
         super(ConfluencePermissionError, self).__init__(path, params, response, msg)
+
+
+class ConfluenceResourceNotFound(ConfluenceError):
+    """Corresponds to 404 errors on the REST API.
+    """
+
+    def __init__(self, path, params, response):
+        # type: (str, dict, requests.Response) -> None
+        msg = 'Resource not found on the path {}'.format(path)
+        super(ConfluenceResourceNotFound, self).__init__(path, params, response, msg)
+
+
+class ConfluenceVersionConflict(ConfluenceError):
+    """Corresponds to 409 errors on the REST API.
+    """
+
+    def __init__(self, path, params, response):
+        # type: (str, dict, requests.Response) -> None
+        msg = 'Version conflict on the path {} ' \
+              '(content was modified by another request)'.format(path)
+        super(ConfluenceVersionConflict, self).__init__(path, params, response, msg)
+
+
+class ConfluenceValueTooLong(ConfluenceError):
+    """Corresponds to 413 errors on the REST API.
+    """
+
+    def __init__(self, path, params, response):
+        # type: (str, dict, requests.Response) -> None
+        msg = 'Request to the path {} is too large'.format(path)
+        super(ConfluenceValueTooLong, self).__init__(path, params, response, msg)
+
+
+class ConfluenceRateLimited(ConfluenceError):
+    """Corresponds to 429 errors on the REST API.
+    """
+
+    transient = True
+
+    def __init__(self, path, params, response, retry_after=None):
+        # type: (str, dict, requests.Response, [float]) -> None
+        msg = 'Too many requests to the path {}'.format(path)
+        if retry_after is not None:
+            msg += ' (retry after {} seconds)'.format(retry_after)
+        self.retry_after = retry_after
+        super(ConfluenceRateLimited, self).__init__(path, params, response, msg)
+
+
+class ConfluenceServerError(ConfluenceError):
+    """Corresponds to 5xx errors on the REST API.
+    """
+
+    transient = True
+
+    def __init__(self, path, params, response, retry_after=None):
+        # type: (str, dict, requests.Response, [float]) -> None
+        msg = 'Server error {} on the path {}'.format(response.status_code, path)
+        self.retry_after = retry_after
+        super(ConfluenceServerError, self).__init__(path, params, response, msg)
@@ -0,0 +1,605 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module with a local in-process stand-in for the Confluence REST API
+endpoints used by ConfluenceClient, to run the tool offline and to
+load-test it without a real server
+"""
+
+import base64
+import collections
+import json
+import logging
+import random
+import re
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# get main logger instance
+LOGGER = logging.getLogger(__name__)
+
+API_PREFIX = '/rest/api/'
+
+# CQL clause (field = value, field in (values)) and its values
+_CQL_CLAUSE = re.compile(
+    r'\s*(\w+)\s*(?:=|in)\s*("(?:[^"\\]|\\.)*"|\((?:[^()"]|"(?:[^"\\]|\\.)*")*\)|[^\s()"]+)'
+    r'\s*(?:and\s+|$)', re.IGNORECASE)
+_CQL_VALUE = re.compile(r'"((?:[^"\\]|\\.)*)"|([^\s,()"]+)')
+
+# status codes that can be injected and their default error messages
+INJECTABLE_ERRORS = {
+    400: 'Bad request (injected)',
+    403: 'Forbidden (injected)',
+    409: 'Version conflict (injected)',
+    413: 'Request entity too large (injected)',
+    429: 'Too many requests (injected)',
+    500: 'Internal server error (injected)',
+    503: 'Service unavailable (injected)'
+}
+
+
+class FakeConfluenceServer(object):
+    """Local HTTP server that emulates the Confluence REST endpoints used
+    by ConfluenceClient: content (create, search by title),
+    content/search (CQL), content/{id} (get, update, delete),
+    content/{id}/child/page (paginated children) and the
+    authentication probe on the host.
+
+    Latency, error injection and request accounting are configurable.
+    This instance should be used within 'with' statement.
+    Usage:
+
+    with FakeConfluenceServer(latency=0.01, error_rates={429: 0.05}) as server:
+        client = ConfluenceClient(server.url, 'user', 'pass')
+    """
+
+    def __init__(self, latency=0.0, latency_jitter=0.0, error_rates=None,
+                 credentials=None, host='127.0.0.1', port=0, seed=None, normalize_body=None):
+        # type: ([float], [float], [dict], [tuple], [str], [int], [int], [Callable]) -> FakeConfluenceServer
+        """Constructor method
+
+        :param latency: seconds added to every request
+        :param latency_jitter: maximum random seconds added on top of latency
+        :param error_rates: dictionary with the probability (0..1) of
+            answering any API request with an error status code
+            ex. {429: 0.05, 409: 0.01}
+        :param credentials: (user, password) accepted by the server,
+            if None any basic authentication is accepted
+        :param host: interface to listen on
+        :param port: port to listen on (0 to pick a free one)
+        :param seed: seed for the random latency and error injection
+        :param normalize_body: function applied to the page bodies written
+            through the API, to emulate how Confluence normalises the
+            storage format (ex. attribute order, self-closing tags)
+        """
+        for status_code in (error_rates or {}):
+            if status_code not in INJECTABLE_ERRORS:
+                raise ValueError("Status code can not be injected: {0}".format(status_code))
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rates = dict(error_rates or {})
+        self._credentials = credentials
+        self._normalize_body = normalize_body
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._pages = collections.OrderedDict()
+        self._next_id = 100000
+        self._forced_errors = []
+        self._forced_latencies = []
+        self._stats = None
+        self.reset_stats()
+        self._httpd = ThreadingHTTPServer((host, port), _FakeConfluenceHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.fake_server = self
+        self._thread = None
+
+    # -----------------
+    # Server lifecycle
+    # -----------------
+    def __enter__(self):
+        # type: () -> FakeConfluenceServer
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def start(self):
+        # type: () -> None
+        """Starts serving requests in a background thread
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._httpd.serve_forever, kwargs={'poll_interval': 0.05},
+                name='fake-confluence')
+            self._thread.daemon = True
+            self._thread.start()
+            LOGGER.debug("Fake Confluence server listening on %s", self.url)
+
+    def stop(self):
+        # type: () -> None
+        """Stops the server and closes its socket
+        """
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpd.server_close()
+
+    @property
+    def url(self):
+        # type: () -> str
+        """Returns the host URL of the server (ex. http://127.0.0.1:40123)
+        """
+        host, port = self._httpd.server_address[:2]
+        return 'http://{0}:{1}'.format(host, port)
+
+    # -----------------
+    # Content
+    # -----------------
+    def add_page(self, title, space_key, body, parent_page_id=None):
+        # type: (str, str, str, [str]) -> dict
+        """Adds a page to the server content (ex. a template source page)
+
+        :return: dictionary with the stored page
+        """
+        with self._lock:
+            return self._store_page(title, space_key, body, parent_page_id)
+
+    def _store_page(self, title, space_key, body, parent_page_id):
+        # type: (str, str, str, [str]) -> dict
+        """Stores a new page, lock must be held by the caller
+        """
+        self._next_id += 1
+        page = {
+            'id': str(self._next_id),
+            'title': title,
+            'space_key': space_key,
+            'body': body,
+            'parent_page_id': parent_page_id,
+            'version': 1,
+            'version_message': None
+        }
+        self._pages[page['id']] = page
+        return page
+
+    def get_page(self, page_id):
+        # type: (str) -> dict
+        """Returns the stored page with the given id, None if not found
+        """
+        with self._lock:
+            return self._pages.get(str(page_id))
+
+    def find_page(self, title, space_key):
+        # type: (str, str) -> dict
+        """Returns the stored page with the given title in a space,
+        None if not found
+        """
+        with self._lock:
+            return self._find_page(title, space_key)
+
+    def _find_page(self, title, space_key):
+        for page in self._pages.values():
+            if page['title'] == title and page['space_key'] == space_key:
+                return page
+        return None
+
+    @property
+    def pages(self):
+        # type: () -> list[dict]
+        """Returns a list with all stored pages
+        """
+        with self._lock:
+            return list(self._pages.values())
+
+    def page_json(self, page, expand=None):
+        # type: (dict, [list]) -> dict
+        """Returns the REST API json representation of a stored page
+
+        :param page: stored page
+        :param expand: list of expanded properties, if given
+            the body is only returned when 'body.storage' is expanded
+        """
+        page_json = {
+            'id': page['id'],
+            'type': 'page',
+            'status': 'current',
+            'title': page['title'],
+            'space': {'key': page['space_key']},
+            'version': {'number': page['version'], 'message': page['version_message'] or ''},
+            'history': {'latest': True},
+            'ancestors': [{'id': page['parent_page_id'], 'type': 'page'}]
+            if page['parent_page_id'] else [],
+            'body': {'storage': {'value': page['body'], 'representation': 'storage'}},
+            '_links': {
+                'base': self.url,
+                'tinyui': '/x/{0}'.format(page['id']),
+                'webui': '/pages/viewpage.action?pageId={0}'.format(page['id'])
+            }
+        }
+        if expand is not None and 'body.storage' not in expand:
+            page_json['body'] = {'_expandable': {'storage': ''}}
+        return page_json
+
+    # -----------------
+    # Error injection
+    # -----------------
+    def inject_error(self, status_code, count=1, method=None, path=None):
+        # type: (int, [int], [str], [str]) -> None
+        """Forces the next 'count' matching API requests to fail with
+        the given status code
+
+        :param status_code: HTTP status code to answer
+        :param count: number of requests that will fail
+        :param method: only requests with this HTTP method (ex. 'POST')
+        :param path: only requests with an API path starting with it
+            (ex. 'content/')
+        """
+        if status_code not in INJECTABLE_ERRORS:
+            raise ValueError("Status code can not be injected: {0}".format(status_code))
+        with self._lock:
+            self._forced_errors.append([status_code, count, method, path])
+
+    def _pick_error(self, method, api_path):
+        # type: (str, str) -> int
+        """Returns the status code of the error to answer, None if
+        the request should be processed normally
+        """
+        with self._lock:
+            for forced_error in self._forced_errors:
+                status_code, count, err_method, err_path = forced_error
+                if (err_method is None or err_method == method) and \
+                        (err_path is None or api_path.startswith(err_path)):
+                    if count <= 1:
+                        self._forced_errors.remove(forced_error)
+                    else:
+                        forced_error[1] = count - 1
+                    return status_code
+            for status_code, rate in self.error_rates.items():
+                if self._random.random() < rate:
+                    return status_code
+        return None
+
+    def inject_latency(self, seconds, count=1, method=None, path=None):
+        # type: (float, [int], [str], [str]) -> None
+        """Forces the next 'count' matching API requests to be answered
+        after the given seconds (ex. to emulate a slow cluster node)
+
+        :param seconds: delay added to the requests
+        :param count: number of requests that will be delayed
+        :param method: only requests with this HTTP method (ex. 'GET')
+        :param path: only requests with an API path starting with it
+            (ex. 'content/')
+        """
+        with self._lock:
+            self._forced_latencies.append([seconds, count, method, path])
+
+    def _sleep_latency(self, method=None, api_path=None):
+        # type: ([str], [str]) -> None
+        delay = self.latency
+        with self._lock:
+            if self.latency_jitter:
+                delay += self._random.uniform(0, self.latency_jitter)
+            for forced_latency in self._forced_latencies:
+                seconds, count, lat_method, lat_path = forced_latency
+                if api_path is not None and \
+                        (lat_method is None or lat_method == method) and \
+                        (lat_path is None or api_path.startswith(lat_path)):
+                    if count <= 1:
+                        self._forced_latencies.remove(forced_latency)
+                    else:
+                        forced_latency[1] = count - 1
+                    delay += seconds
+                    break
+        if delay > 0:
+            time.sleep(delay)
+
+    # -----------------
+    # Accounting
+    # -----------------
+    def reset_stats(self):
+        # type: () -> None
+        """Resets the request accounting
+        """
+        with self._lock:
+            self._stats = {
+                'requests': 0,
+                'bytes_received': 0,
+                'bytes_sent': 0,
+                'endpoints': collections.Counter(),
+                'status_codes': collections.Counter()
+            }
+
+    @property
+    def stats(self):
+        # type: () -> dict
+        """Returns a copy of the request accounting:
+        number of requests, bytes, requests per endpoint and status codes
+        """
+        with self._lock:
+            return {
+                'requests': self._stats['requests'],
+                'bytes_received': self._stats['bytes_received'],
+                'bytes_sent': self._stats['bytes_sent'],
+                'endpoints': dict(self._stats['endpoints']),
+                'status_codes': dict(self._stats['status_codes'])
+            }
+
+    def _account(self, endpoint, status_code, bytes_received, bytes_sent):
+        with self._lock:
+            self._stats['requests'] += 1
+            self._stats['bytes_received'] += bytes_received
+            self._stats['bytes_sent'] += bytes_sent
+            self._stats['endpoints'][endpoint] += 1
+            self._stats['status_codes'][status_code] += 1
+
+    def _is_authorized(self, auth_header):
+        # type: (str) -> bool
+        if self._credentials is None:
+            return True
+        if not auth_header or not auth_header.startswith('Basic '):
+            return False
+        decoded = base64.b64decode(auth_header[6:].encode('ascii')).decode('utf-8')
+        return tuple(decoded.split(':', 1)) == tuple(self._credentials)
+
+    # -----------------
+    # REST API
+    # -----------------
+    def handle_api(self, method, api_path, query, body):
+        # type: (str, str, dict, bytes) -> tuple
+        """Processes an API request and returns (status_code, json_data)
+
+        :param method: HTTP method
+        :param api_path: path after '/rest/api/'
+        :param query: dictionary with the query parameters
+        :param body: request body
+        :return: tuple with status code and json data (or None)
+        """
+        content_match = re.match(r'^content/(\d+)$', api_path)
+        if api_path == 'content' and method == 'GET':
+            with self._lock:
+                page = self._find_page(query.get('title'), query.get('spaceKey'))
+            results = [self.page_json(page)] if page else []
+            return 200, {'results': results, 'start': 0, 'limit': 25,
+                         'size': len(results), '_links': {'base': self.url}}
+        if api_path == 'content/search' and method == 'GET':
+            return self._search_content(query)
+        if api_path == 'content' and method == 'POST':
+            return self._create_content(body)
+        if content_match and method == 'GET':
+            page = self.get_page(content_match.group(1))
+            if page is None:
+                return self.error_json(404, 'No content found with id')
+            return 200, self.page_json(page)
+        if content_match and method == 'PUT':
+            return self._update_content(content_match.group(1), body)
+        children_match = re.match(r'^content/(\d+)/child/page$', api_path)
+        if children_match and method == 'GET':
+            return self._get_child_pages(children_match.group(1), query)
+        if content_match and method == 'DELETE':
+            with self._lock:
+                page = self._pages.pop(content_match.group(1), None)
+                # like confluence, children are moved to the parent of the page
+                for child in self._pages.values():
+                    if page is not None and child['parent_page_id'] == page['id']:
+                        child['parent_page_id'] = page['parent_page_id']
+            if page is None:
+                return self.error_json(404, 'No content found with id')
+            return 204, None
+        return self.error_json(404, 'Endpoint not supported by fake server')
+
+    def _search_content(self, query):
+        # type: (dict) -> tuple
+        """Searches pages with a CQL query. Only 'and' of the fields
+        type, space, title and id (with '=' or 'in') are supported
+        """
+        filters = {}
+        cql = query.get('cql', '').strip()
+        position = 0
+        while position < len(cql):
+            clause_match = _CQL_CLAUSE.match(cql, position)
+            if clause_match is None:
+                return self.error_json(400, 'Could not parse cql: {0}'.format(cql))
+            filters[clause_match.group(1).lower()] = set(
+                re.sub(r'\\(.)', r'\1', quoted) if quoted else bare
+                for quoted, bare in _CQL_VALUE.findall(clause_match.group(2)))
+            position = clause_match.end()
+        with self._lock:
+            found = [page for page in self._pages.values()
+                     if ('type' not in filters or 'page' in filters['type'])
+                     and ('space' not in filters or page['space_key'] in filters['space'])
+                     and ('title' not in filters or page['title'] in filters['title'])
+                     and ('id' not in filters or page['id'] in filters['id'])]
+        return 200, self._paginate(found, query, 'content/search')
+
+    def _paginate(self, found, query, api_path):
+        # type: (list[dict], dict, str) -> dict
+        """Returns the json of a page of results (start and limit
+        query parameters) with the link to the next page of results
+        """
+        start = int(query.get('start', 0))
+        limit = int(query.get('limit', 25))
+        expand = query['expand'].split(',') if 'expand' in query else None
+        results = [self.page_json(page, expand) for page in found[start:start + limit]]
+        links = {'base': self.url}
+        if start + limit < len(found):
+            links['next'] = '{0}{1}?start={2}&limit={3}'.format(
+                API_PREFIX, api_path, start + limit, limit)
+        return {'results': results, 'start': start, 'limit': limit,
+                'size': len(results), '_links': links}
+
+    def _get_child_pages(self, page_id, query):
+        # type: (str, dict) -> tuple
+        """Returns the child pages of a page (paginated)
+        """
+        with self._lock:
+            if page_id not in self._pages:
+                return self.error_json(404, 'No content found with id')
+            found = [page for page in self._pages.values()
+                     if page['parent_page_id'] == page_id]
+        return 200, self._paginate(found, query, 'content/{0}/child/page'.format(page_id))
+
+    def _update_content(self, page_id, body):
+        # type: (str, bytes) -> tuple
+        """Updates the title, body and parent of a page,
+        the version number should be the current one + 1
+        """
+        try:
+            data = json.loads(body.decode('utf-8'))
+            title = data['title']
+            content = data['body']['storage']['value']
+            version = int(data['version']['number'])
+        except (ValueError, KeyError, TypeError) as ex:
+            return self.error_json(400, 'Invalid content data: {0}'.format(ex))
+        ancestors = data.get('ancestors') or []
+        with self._lock:
+            page = self._pages.get(page_id)
+            if page is None:
+                return self.error_json(404, 'No content found with id')
+            if version != page['version'] + 1:
+                return self.error_json(
+                    409, 'Version must be incremented on update. '
+                         'Current version is: {0}'.format(page['version']))
+            other = self._find_page(title, page['space_key'])
+            if other is not None and other is not page:
+                return self.error_json(
+                    400, 'A page with this title already exists: '
+                         'A page already exists with the title {0} in this space'.format(title))
+            if ancestors:
+                parent_page_id = str(ancestors[-1]['id'])
+                if parent_page_id not in self._pages:
+                    return self.error_json(
+                        404, 'Parent page not found: {0}'.format(parent_page_id))
+                page['parent_page_id'] = parent_page_id
+            page['title'] = title
+            page['body'] = self._normalize(content)
+            page['version'] = version
+            page['version_message'] = data['version'].get('message')
+        return 200, self.page_json(page)
+
+    def _create_content(self, body):
+        # type: (bytes) -> tuple
+        try:
+            data = json.loads(body.decode('utf-8'))
+            title = data['title']
+            space_key = data['space']['key']
+            content = data['body']['storage']['value']
+        except (ValueError, KeyError, TypeError) as ex:
+            return self.error_json(400, 'Invalid content data: {0}'.format(ex))
+        ancestors = data.get('ancestors') or []
+        parent_page_id = str(ancestors[-1]['id']) if ancestors else None
+        with self._lock:
+            if self._find_page(title, space_key) is not None:
+                return self.error_json(
+                    400, 'A page with this title already exists: '
+                         'A page already exists with the title {0} in this space'.format(title))
+            if parent_page_id and parent_page_id not in self._pages:
+                return self.error_json(404, 'Parent page not found: {0}'.format(parent_page_id))
+            page = self._store_page(title, space_key, self._normalize(content), parent_page_id)
+            page['version_message'] = (data.get('version') or {}).get('message')
+        return 200, self.page_json(page)
+
+    def _normalize(self, content):
+        # type: (str) -> str
+        """Returns a page body as the server stores it
+        """
+        return content if self._normalize_body is None else self._normalize_body(content)
+
+    @staticmethod
+    def error_json(status_code, message):
+        # type: (int, str) -> tuple
+        """Returns (status_code, json_data) of a REST API error response
+        """
+        return status_code, {'statusCode': status_code, 'message': message}
+
+
+class _FakeConfluenceHandler(BaseHTTPRequestHandler):
+    """HTTP request handler for FakeConfluenceServer
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format_str, *args):
+        # called for every request, message is only formatted if logged
+        if LOGGER.isEnabledFor(logging.DEBUG):
+            LOGGER.debug("%s - %s", self.address_string(), format_str % args)
+
+    def _read_body(self):
+        # type: () -> bytes
+        """Reads the request body (with or without chunked transfer encoding)
+        """
+        if 'chunked' in self.headers.get('Transfer-Encoding', '').lower():
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().split(b';', 1)[0].strip(), 16)
+                if size == 0:
+                    # skip trailers until the empty line
+                    while self.rfile.readline() not in (b'\r\n', b'\n', b''):
+                        pass
+                    break
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+            return b''.join(chunks)
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def _send(self, status_code, json_data, payload, extra_headers=None):
+        # type: (int, dict, bytes, [dict]) -> None
+        self.send_response(status_code)
+        if json_data is not None:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (extra_headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if payload:
+            self.wfile.write(payload)
+
+    def _handle(self, method):
+        server = self.server.fake_server
+        body = self._read_body()
+        parsed_url = urlparse(self.path)
+        query = dict((key, values[-1]) for key, values in parse_qs(parsed_url.query).items())
+        api_path = None
+        if parsed_url.path.startswith(API_PREFIX):
+            api_path = parsed_url.path[len(API_PREFIX):].strip('/')
+        server._sleep_latency(method, api_path)
+
+        extra_headers = None
+        if not server._is_authorized(self.headers.get('Authorization')):
+            endpoint = 'auth'
+            status_code, json_data = FakeConfluenceServer.error_json(401, 'Unauthorized')
+        elif not parsed_url.path.startswith(API_PREFIX):
+            # authentication probe on the host (Auth.authenticate)
+            endpoint = 'auth'
+            status_code, json_data = 200, {'status': 'ok'}
+        else:
+            endpoint = '{0} {1}'.format(method, re.sub(r'/\d+', '/{id}', api_path))
+            status_code = server._pick_error(method, api_path)
+            if status_code is not None:
+                json_data = FakeConfluenceServer.error_json(
+                    status_code, INJECTABLE_ERRORS[status_code])[1]
+                if status_code in (429, 503):
+                    extra_headers = {'Retry-After': '1'}
+            else:
+                status_code, json_data = server.handle_api(method, api_path, query, body)
+        payload = json.dumps(json_data).encode('utf-8') if json_data is not None else b''
+        # accounted before answering: a client never sees a response
+        # of a request that is not in the stats yet
+        server._account(endpoint, status_code, len(body), len(payload))
+        self._send(status_code, json_data, payload, extra_headers)
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def do_PUT(self):
+        self._handle('PUT')
+
+    def do_DELETE(self):
+        self._handle('DELETE')
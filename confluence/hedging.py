@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module with the hedging policy of ConfluenceClient: idempotent reads
+that are slower than usual are sent a second time and the first
+response wins, so a slow server node does not delay the whole run
+"""
+
+import collections
+import threading
+
+
+class HedgePolicy(object):
+    """Computes how long a read waits before a hedge (second identical
+    request) is sent: the given percentile of the latencies of the last
+    reads, bounded by min_delay and max_delay. Until enough latencies
+    are observed, initial_delay is used.
+
+    A single instance can be shared by several clients,
+    so all of them learn from the same latencies.
+    Usage:
+
+    client = ConfluenceClient(host, user, password,
+                              hedge_policy=HedgePolicy(percentile=0.95))
+    """
+
+    def __init__(self, percentile=0.95, initial_delay=1.0, min_delay=0.05,
+                 max_delay=5.0, window=200, min_samples=20):
+        # type: ([float], [float], [float], [float], [int], [int]) -> HedgePolicy
+        """Constructor method
+
+        :param percentile: percentile (0..1) of the read latencies after
+            which a hedge is sent
+        :param initial_delay: delay in seconds used until min_samples
+            latencies are observed
+        :param min_delay: minimum delay in seconds before a hedge
+        :param max_delay: maximum delay in seconds before a hedge
+        :param window: number of last latencies used for the percentile
+        :param min_samples: number of latencies needed to use the percentile
+        """
+        if not 0 < percentile < 1:
+            raise ValueError("Percentile should be between 0 and 1")
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self._latencies = collections.deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        # type: (float) -> None
+        """Records the latency of a read
+        """
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def get_delay(self):
+        # type: () -> float
+        """Returns the seconds a read waits before its hedge is sent
+        """
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                delay = self.initial_delay
+            else:
+                latencies = sorted(self._latencies)
+                delay = latencies[min(len(latencies) - 1,
+                                      int(self.percentile * len(latencies)))]
+        return min(self.max_delay, max(self.min_delay, delay))
+
+
+_DEFAULT_POLICY = None
+
+
+def get_default_policy():
+    # type: () -> HedgePolicy
+    """Returns the policy used by the clients that do not set their own
+    policy, None if reads are not hedged
+    """
+    return _DEFAULT_POLICY
+
+
+def set_default_policy(hedge_policy):
+    # type: ([HedgePolicy]) -> None
+    """Sets the policy used by the clients that do not set their own
+    policy (None to disable the hedging)
+    """
+    global _DEFAULT_POLICY
+    _DEFAULT_POLICY = hedge_policy
@@ -16,3 +16,8 @@ JSON_ATTR_SOURCE = "source"
 JSON_ATTR_SPACE_KEY = "space_key"
 JSON_ATTR_PARENT_PAGE_ID = "parent_page_id"
 JSON_ATTR_PAGE_TITLE = "page_title"
+
+# page tree settings
+JSON_ATTR_PAGES = "pages"
+JSON_ATTR_CHILDREN = "children"
+JSON_ATTR_JOB_ID = "id"
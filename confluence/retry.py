@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module with the retry policy of ConfluenceClient: which failed requests
+are sent again and how long to wait before every new attempt
+"""
+
+import email.utils
+import random
+import time
+
+import requests
+
+from page_generator.confluence.exceptions import ConfluenceError
+
+# methods that can be sent again without side effects
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+
+# status codes for which the server did not process the request
+# (safe to retry even for non idempotent methods)
+NOT_PROCESSED_STATUS_CODES = frozenset([429, 503])
+
+
+def parse_retry_after(value):
+    # type: (str) -> float
+    """Returns the seconds to wait given by a Retry-After header
+    (seconds or HTTP date), None if the value is not valid
+
+    :param value: value of the header
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    return max(0.0, retry_date.timestamp() - time.time())
+
+
+class RetryPolicy(object):
+    """Decides whether a failed request is retried and computes the
+    delay before the next attempt.
+
+    Only transient errors are retried: rate limited (429), server errors
+    (5xx) and connection errors / timeouts. Non idempotent requests (POST)
+    are only retried when the server did not process them (429, 503 or
+    connection timeout), so pages are never duplicated.
+    Permanent errors (400, 403, 404, 409, 413) fail right away.
+
+    Delays use exponential backoff with full jitter:
+        uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+    unless the server sends a Retry-After header, which is honoured
+    (up to max_delay).
+    Usage:
+
+    client = ConfluenceClient(host, user, password,
+                              retry_policy=RetryPolicy(max_attempts=5))
+    """
+
+    def __init__(self, max_attempts=4, base_delay=0.5, max_delay=30.0, seed=None):
+        # type: ([int], [float], [float], [int]) -> RetryPolicy
+        """Constructor method
+
+        :param max_attempts: maximum number of attempts of a request
+            (1 to disable the retries)
+        :param base_delay: maximum delay in seconds before the first retry
+        :param max_delay: maximum delay in seconds before any retry
+        :param seed: seed of the jitter
+        """
+        if max_attempts < 1:
+            raise ValueError("Number of attempts should be greater than 0")
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._random = random.Random(seed)
+
+    @staticmethod
+    def is_transient(method, error):
+        # type: (str, Exception) -> bool
+        """Returns True if the request failed with a transient error
+        and can be safely sent again
+
+        :param method: HTTP method of the request
+        :param error: exception raised by the request
+        """
+        if isinstance(error, ConfluenceError):
+            if not error.transient:
+                return False
+            if method in IDEMPOTENT_METHODS:
+                return True
+            return (error.response is not None and
+                    error.response.status_code in NOT_PROCESSED_STATUS_CODES)
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            # the connection was never opened, the server did not get the request
+            return True
+        if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+            return method in IDEMPOTENT_METHODS
+        return False
+
+    def should_retry(self, method, error, attempt):
+        # type: (str, Exception, int) -> bool
+        """Returns True if the request should be sent again
+
+        :param method: HTTP method of the request
+        :param error: exception raised by the attempt
+        :param attempt: number of the attempt that failed (1 for the first)
+        """
+        return attempt < self.max_attempts and self.is_transient(method, error)
+
+    def get_delay(self, error, attempt):
+        # type: (Exception, int) -> float
+        """Returns the seconds to wait before the next attempt
+
+        :param error: exception raised by the attempt
+        :param attempt: number of the attempt that failed (1 for the first)
+        """
+        retry_after = getattr(error, 'retry_after', None)
+        if retry_after is not None:
+            return min(self.max_delay, retry_after)
+        return self._random.uniform(
+            0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+# policy with the retries disabled
+NO_RETRY = RetryPolicy(max_attempts=1)
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module with the single-flight layer of ConfluenceClient: concurrent
+identical reads share one in-flight request and its decoded result,
+even if they are sent by different clients of the same host and credentials
+"""
+
+import copy
+import hashlib
+import threading
+
+from page_generator.utils import deadline_utils
+
+
+class _Call(object):
+    """Call in flight of a key
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        # False if the call ended for a reason of its caller only
+        # (ex. the deadline of its job), the waiting callers run it again
+        self.shareable = False
+
+
+class SingleFlight(object):
+    """Runs a function only once for all the callers that request the
+    same key while it is running: the first caller runs it and the
+    others wait for its result (or its exception).
+
+    The waiting callers get a copy of the result, so every caller
+    can modify its own. If the deadline of the job of the first caller
+    passes, the waiting callers run the function again.
+    Usage:
+
+    single_flight = SingleFlight()
+    result, shared = single_flight.do(('content/123', ()), fetch_page)
+    """
+
+    def __init__(self):
+        # type: () -> SingleFlight
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, function):
+        # type: (Hashable, Callable) -> tuple
+        """Runs the function, or waits for the call already
+        in flight with the same key
+
+        :param key: hashable identifier of the call
+        :param function: function without arguments to run
+        :return: tuple with the result (a copy if it was shared)
+            and True if it was shared with a call in flight
+        :raises DeadlineExceeded: if the deadline of the current job
+            passed while waiting for the call in flight
+        """
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = _Call()
+            if leader:
+                break
+            current_deadline = deadline_utils.get_deadline()
+            timeout = None if current_deadline is None else current_deadline.remaining()
+            if not call.done.wait(timeout):
+                raise deadline_utils.DeadlineExceeded(
+                    "Deadline of {0:.1f} s exceeded waiting for a read in flight".format(
+                        current_deadline.seconds))
+            if not call.shareable:
+                # the call in flight was cancelled by its own deadline
+                continue
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result), True
+        try:
+            call.result = function()
+            call.shareable = True
+        except Exception as ex:
+            call.error = ex
+            # errors raised once the deadline of this caller passed (ex. its
+            # request timeout was cut to the time left) are not shared
+            current_deadline = deadline_utils.get_deadline()
+            call.shareable = not isinstance(ex, deadline_utils.DeadlineExceeded) and (
+                current_deadline is None or not current_deadline.expired)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+
+_SHARED_LOCK = threading.Lock()
+_SHARED = {}
+
+
+def get_shared(host, user, password):
+    # type: (str, str, str) -> SingleFlight
+    """Returns the SingleFlight shared by all the clients of a host and
+    credentials, so reads are coalesced even when every operation opens
+    its own client (the responses are the same for the same credentials,
+    a wrong password never gets the response of the right one)
+
+    :param host: confluence host (with http extension)
+    :param user: name of the user
+    :param password: password of the user (only its hash is kept)
+    """
+    key = (host, user, hashlib.sha256((password or '').encode('utf-8')).hexdigest())
+    with _SHARED_LOCK:
+        single_flight = _SHARED.get(key)
+        if single_flight is None:
+            single_flight = _SHARED[key] = SingleFlight()
+        return single_flight
@@ -6,22 +6,33 @@ Main script to generate confluence pages from configuration file
 
 import argparse
 import logging
-from page_generator.app.page_manager import PageManager
+import sys
+
+# NOTE: application modules are imported inside main() once the arguments
+# are parsed, so '--help' and argument errors do not pay their import cost
 
 # get logger instance
 LOGGER = logging.getLogger()
 
 
-def configure_logger(global_logger, log_level):
-    # type: (logging.Logger, str) -> None
+def configure_logger(global_logger, log_level, async_logging=False,
+                     log_max_bytes=0, log_backup_count=0):
+    # type: (logging.Logger, str, [bool], [int], [int]) -> None
     """Configures the main logger object.
     log level is set for logging level.
 
     :param global_logger: main logger instance
     :param log_level:
         logging level [ error > warning > info > debug > off ]
+    :param async_logging: if True, records are written to the file and
+        console by a background thread instead of the logging thread
+    :param log_max_bytes: maximum size of the logging file before
+        rotating it (0 disables rotation)
+    :param log_backup_count: number of rotated logging files to keep
     :return:
     """
+    from page_generator.utils import logger_utils
+
     log_levels = {
         'off': logging.NOTSET,
         'debug': logging.DEBUG,
@@ -36,7 +47,8 @@ def configure_logger(global_logger, log_level):
         log_level = log_levels[log_level]
     global_logger.setLevel(logging.DEBUG)
     # create file handler which logs even debug messages
-    file_handler = logging.FileHandler('logs.log')
+    # file is opened on the first record, not on configuration
+    file_handler = logger_utils.create_file_handler('logs.log', log_max_bytes, log_backup_count)
     file_handler.setLevel(log_level)
     # create console handler with a higher log level
     console_handler = logging.StreamHandler()
@@ -46,8 +58,11 @@ def configure_logger(global_logger, log_level):
     file_handler.setFormatter(formatter)
     console_handler.setFormatter(formatter)
     # add the handlers to the logger
-    global_logger.addHandler(file_handler)
-    global_logger.addHandler(console_handler)
+    if async_logging:
+        logger_utils.start_queue_logging(global_logger, [file_handler, console_handler])
+    else:
+        global_logger.addHandler(file_handler)
+        global_logger.addHandler(console_handler)
 
 
 # ---------------
@@ -60,23 +75,271 @@ def main():
     # Script Argument Parser
     parser = argparse.ArgumentParser(description='Confluence API')
     parser.add_argument(
-        '-c', '--config_file', required=True,
-        help='Script configuration file (JSON Format)')
+        '-c', '--config_file', nargs='+',
+        help='Script configuration file(s) (JSON Format), one per page')
+    parser.add_argument(
+        '-t', '--page_tree', metavar='FILE',
+        help='page tree job file (JSON Format) to generate a hierarchy of pages, '
+             'parent pages are created before their children')
     parser.add_argument(
         '-l', '--log_level', default="warning",
         help='debugging script log level '
              '[ error > warning > info > debug > off ]')
+    parser.add_argument(
+        '--reconcile', action='store_true',
+        help='with -t/--page_tree: only create, update, move or delete the pages '
+             'needed to make the pages under the parent page match the tree')
+    parser.add_argument(
+        '--dry_run', action='store_true',
+        help='with --reconcile: print the plan without writing any page')
+    parser.add_argument(
+        '--watch', action='store_true',
+        help='with -c/--config_file: generate the pages, then keep watching '
+             'the config files and templates and regenerate only the pages '
+             'whose inputs changed (stop with Ctrl+C)')
+    parser.add_argument(
+        '--watch_interval', type=float, default=1.0,
+        help='with --watch: seconds between checks of the local files (default: 1)')
+    parser.add_argument(
+        '--remote_interval', type=float, default=10.0,
+        help='with --watch: seconds between checks of the versions of the '
+             'remote template pages (default: 10)')
+    parser.add_argument(
+        '--serve', metavar='ADDRESS', nargs='?', const='127.0.0.1:8765',
+        help='run a resident generation service on ADDRESS (HOST:PORT or '
+             'unix:PATH, default 127.0.0.1:8765) that accepts jobs with '
+             'POST /jobs {"config_file": "page.json"} and keeps sessions '
+             'and templates warm between jobs (stop with Ctrl+C)')
+    parser.add_argument(
+        '--queue', metavar='DB',
+        help='with -c/--config_file: run the pages through a durable job '
+             'queue stored in the SQLite file DB (state of every page is '
+             'checkpointed, failed pages are retried)')
+    parser.add_argument(
+        '--resume', metavar='DB',
+        help='resume the job queue stored in DB: interrupted and failed '
+             'pages are run again, finished pages are skipped')
+    parser.add_argument(
+        '--max_attempts', type=int, default=3,
+        help='with --queue/--resume: attempts per page before it is failed (default: 3)')
+    parser.add_argument(
+        '--retry_delay', type=float, default=2.0,
+        help='with --queue/--resume: seconds before the first retry of a page, '
+             'doubled for every new retry (default: 2)')
+    parser.add_argument(
+        '--connect_timeout', type=float, default=None,
+        help='seconds to wait for a connection to the server '
+             '(default: http_utils.DEFAULT_CONNECT_TIMEOUT)')
+    parser.add_argument(
+        '--read_timeout', type=float, default=None,
+        help='seconds to wait for data from the server '
+             '(default: http_utils.DEFAULT_READ_TIMEOUT)')
+    parser.add_argument(
+        '--job_timeout', type=float, default=None,
+        help='deadline in seconds of every page (template retrieval, lookup, '
+             'write and retries). With --queue/--resume, pages that exceed it '
+             'are cancelled and scheduled again (default: no deadline)')
+    parser.add_argument(
+        '--hedge_percentile', type=float, default=None, metavar='PERCENTILE',
+        help='hedge the reads from the server: a read slower than this '
+             'percentile (0..1, ex. 0.95) of the last read latencies is sent '
+             'a second time and the first response wins (default: no hedging)')
+    parser.add_argument(
+        '--render_only', '--render-only', metavar='DIR',
+        help='render the pages into DIR with a manifest file '
+             'without connecting to the server')
+    parser.add_argument(
+        '--template_cache', metavar='DIR',
+        help='directory to cache the templates retrieved from confluence '
+             'pages (used as template source in render-only mode)')
+    parser.add_argument(
+        '--metrics', metavar='FILE',
+        help='write the metrics of the requests to the server into FILE '
+             'at the end of the run (prometheus text format for .prom/.txt '
+             'files, json otherwise)')
+    parser.add_argument(
+        '--trace', metavar='FILE',
+        help='write a trace of the generation of every page into FILE '
+             '(Chrome Trace Event format, ex. open it with ui.perfetto.dev)')
+    parser.add_argument(
+        '--profile', metavar='PREFIX', nargs='?', const='profile',
+        help='run the job under the profiler, print wall time and peak memory '
+             'per phase and write PREFIX.txt (hot functions report) '
+             'and PREFIX.prof (raw profile). PREFIX defaults to "profile"')
+    parser.add_argument(
+        '--async_logging', action='store_true',
+        help='write log records from a background thread so logging '
+             'does not block the page generation')
+    parser.add_argument(
+        '--log_max_bytes', type=int, default=0,
+        help='rotate the log file when it reaches this size in bytes '
+             '(default: no rotation)')
+    parser.add_argument(
+        '--log_backup_count', type=int, default=3,
+        help='number of rotated log files to keep (default: 3)')
+    parser.add_argument(
+        '--workers', type=int, default=None,
+        help='number of parallel workers in render-only mode '
+             '(default: number of CPUs), page tree mode (default: 4) '
+             'and template prefetch (default: 8)')
+    parser.add_argument(
+        '--minify', action='store_true',
+        help='remove the insignificant whitespace of the templates when they are '
+             'compiled, the bytes saved are reported for every page')
+    parser.add_argument(
+        '--allow_cmd_variables', action='store_true',
+        help='allow the computed variables of the configuration files to run '
+             'commands (\'!cmd:COMMAND\'), only for trusted files. The generation '
+             'service always refuses them')
+    parser.add_argument(
+        '--validate_config', action='store_true',
+        help='only parse and validate the configuration files '
+             'without connecting to the server')
     args = parser.parse_args()
+    if not args.config_file and not args.page_tree and not args.serve and not args.resume:
+        parser.error('one of the arguments -c/--config_file -t/--page_tree '
+                     '--serve --resume is required')
 
     # configure logging properties with configuration given
-    configure_logger(LOGGER, args.log_level)
-
-    # Create a confluence page manager instance that
-    # will read & validate all values from config file.
-    # This manager object will work as an API
-    # to create, delete, retrieve confluence pages.
-    page_manager_obj = PageManager(args.config_file)
-    page_manager_obj.generate_page()
+    configure_logger(LOGGER, args.log_level, async_logging=args.async_logging,
+                     log_max_bytes=args.log_max_bytes, log_backup_count=args.log_backup_count)
+
+    from page_generator.app.page_manager import PageManager
+    from page_generator.app.template_store import TemplateStore
+    from page_generator.utils import trace_utils
+
+    # the run is traced and profiled in every mode (also the offline ones)
+    tracer = trace_utils.Tracer() if args.trace else None
+    profiler = None
+    if args.profile:
+        from page_generator.utils.profile_utils import PhaseProfiler
+        profiler = PhaseProfiler(tracer=tracer)
+    trace_utils.set_tracer(profiler or tracer)
+    if profiler is not None:
+        profiler.start()
+    metrics = None
+    try:
+        if args.validate_config:
+            for config_file in args.config_file or []:
+                PageManager(config_file)
+            if args.page_tree:
+                from page_generator.app.page_tree import PageTree
+                PageTree(args.page_tree)
+            return
+
+        from page_generator.app import variable_providers
+        variable_providers.set_commands_enabled(args.allow_cmd_variables)
+
+        if args.render_only:
+            if not args.config_file:
+                parser.error('render-only mode requires -c/--config_file')
+            from page_generator.app import render_only
+            manifest = render_only.render_jobs(
+                args.config_file,
+                args.render_only,
+                template_cache_dir=args.template_cache,
+                workers=args.workers,
+                minify=args.minify)
+            if manifest['summary']['failed']:
+                sys.exit(1)
+            return
+
+        from page_generator.utils import deadline_utils
+        from page_generator.utils import http_utils
+        # http_utils (and requests) is not imported to parse the arguments,
+        # so its default timeouts are applied here
+        http_utils.set_default_timeout(
+            http_utils.DEFAULT_CONNECT_TIMEOUT if args.connect_timeout is None
+            else args.connect_timeout,
+            http_utils.DEFAULT_READ_TIMEOUT if args.read_timeout is None else args.read_timeout)
+        if args.hedge_percentile is not None:
+            from page_generator.confluence import hedging
+            hedging.set_default_policy(hedging.HedgePolicy(percentile=args.hedge_percentile))
+
+        template_store = TemplateStore(args.template_cache, minify=args.minify)
+        if args.metrics:
+            from page_generator.utils.metrics_utils import ClientMetrics
+            metrics = ClientMetrics()
+        if args.serve:
+            from page_generator.app.service import GenerationService
+            if args.serve.startswith('unix:'):
+                service = GenerationService(unix_socket=args.serve[len('unix:'):],
+                                            template_store=template_store, metrics=metrics,
+                                            job_timeout=args.job_timeout)
+            else:
+                host, _, port = args.serve.rpartition(':')
+                service = GenerationService(host=host or '127.0.0.1', port=int(port),
+                                            template_store=template_store, metrics=metrics,
+                                            job_timeout=args.job_timeout)
+            print('Generation service listening on {0}'.format(service.url))
+            service.run()
+            return
+        if args.queue or args.resume:
+            if args.queue and not args.config_file:
+                parser.error('--queue requires -c/--config_file')
+            from page_generator.app.job_queue import JobQueue
+            with JobQueue(args.queue or args.resume, max_attempts=args.max_attempts,
+                          retry_delay=args.retry_delay) as job_queue:
+                if args.resume:
+                    job_queue.recover()
+                job_queue.add(args.config_file or [])
+                counts = job_queue.run(workers=args.workers or 4,
+                                       template_store=template_store, metrics=metrics,
+                                       job_timeout=args.job_timeout)
+            print(', '.join('{0} {1}'.format(count, state) for state, count in counts.items()))
+            if counts['failed']:
+                sys.exit(1)
+            return
+        if args.watch:
+            if not args.config_file:
+                parser.error('watch mode requires -c/--config_file')
+            from page_generator.app.watcher import Watcher
+            with Watcher(args.config_file, template_store=template_store, metrics=metrics,
+                         interval=args.watch_interval, remote_interval=args.remote_interval,
+                         job_timeout=args.job_timeout) as watcher:
+                watcher.run()
+            return
+        if args.page_tree:
+            from page_generator.app.page_tree import PageTree
+            page_tree = PageTree(args.page_tree, template_store=template_store, metrics=metrics,
+                                 job_timeout=args.job_timeout)
+            if args.reconcile:
+                summary = page_tree.reconcile(workers=args.workers or 4, dry_run=args.dry_run)
+                for action in summary['plan']:
+                    print('{0:<8} {1}'.format(action.action, action.title))
+            else:
+                page_tree.generate(workers=args.workers or 4)
+            if page_tree.errors:
+                sys.exit(1)
+            return
+        # remote templates are retrieved again once per run,
+        # the pages that share them use the refreshed copy
+        refreshed_sources = set()
+        for config_file in args.config_file or []:
+            # the span of the page covers its configuration,
+            # template retrieval and creation
+            with trace_utils.get_tracer().span('page', config_file=config_file), \
+                    deadline_utils.deadline(args.job_timeout):
+                # Create a confluence page manager instance per config file that
+                # will read & validate all values from it.
+                # These manager objects will work as an API
+                # to create, delete, retrieve confluence pages.
+                page_manager_obj = PageManager(config_file, template_store=template_store,
+                                               metrics=metrics)
+                PageManager.prefetch_templates(
+                    [page_manager_obj], template_store,
+                    refresh=page_manager_obj.template_source not in refreshed_sources)
+                refreshed_sources.add(page_manager_obj.template_source)
+                page_manager_obj.generate_page()
+    finally:
+        if profiler is not None:
+            profiler.stop()
+            profiler.write_report(args.profile + '.txt', args.profile + '.prof')
+            print(profiler.format_phases())
+        if metrics is not None:
+            metrics.write(args.metrics)
+        if tracer is not None:
+            tracer.write(args.trace)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,111 @@
+"""Unit test
+unit test for the job_queue.py - JobQueue instance
+driven against the fake confluence server
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from page_generator.app.job_queue import JobQueue
+from page_generator.confluence.fake_server import FakeConfluenceServer
+
+
+def write_configs(write_config, server, source, parent_page_id, pages):
+    """Writes a PageManager config file per page and returns their paths
+    """
+    return [write_config(server, source, parent_page_id, 'Page {0}'.format(index),
+                         {'$FixVersion': str(index)}, file_name='page_{0}.json'.format(index))
+            for index in range(pages)]
+
+
+def test_good_input(tmp_path, write_config):
+    """These tests should pass
+    """
+    db_file = str(tmp_path / 'queue.db')
+    with FakeConfluenceServer() as server:
+        parent = server.add_page('Parent', 'TEST', '<p>parent</p>')
+        server.add_page('Template', 'TEST', '<p>$FixVersion</p>')
+        config_files = write_configs(
+            write_config, server, '{0}/display/TEST/Template'.format(server.url), parent['id'], 5)
+
+        with JobQueue(db_file) as job_queue:
+            assert job_queue.add(config_files) == 5
+            # already queued jobs are not added again
+            assert job_queue.add(config_files[:2]) == 0
+            # simulated interruption: a job claimed and another one
+            # whose page was written but not checkpointed as done
+            job_queue.claim()
+            submitted_job = job_queue.claim()
+            job_queue.set_state(submitted_job, 'submitted')
+            server.add_page('Page 1', 'TEST', '<p>1</p>', parent['id'])
+
+        # run by another process, a write fails once and is retried:
+        # interrupted jobs may be running elsewhere, they are left alone
+        server.inject_error(500, method='POST')
+        with JobQueue(db_file, retry_delay=0.01) as job_queue:
+            counts = job_queue.run(workers=2)
+            assert (counts['done'], counts['rendering'], counts['submitted']) == (3, 1, 1)
+            assert not server.find_page('Page 0', 'TEST')
+
+        # resumed explicitly
+        with JobQueue(db_file, retry_delay=0.01) as job_queue:
+            assert job_queue.recover() == 2
+            counts = job_queue.run(workers=2)
+            assert counts['done'] == 5
+            assert not counts['failed']
+            assert all(job.page_id for job in job_queue.get_jobs('done'))
+        for index in range(5):
+            assert server.find_page('Page {0}'.format(index), 'TEST')['body'] == \
+                '<p>{0}</p>'.format(index)
+        # no duplicated page: 4 pages created plus the failed attempt
+        assert server.stats['endpoints']['POST content'] == 5
+        assert server.stats['status_codes'][500] == 1
+
+        # finished jobs are skipped
+        server.reset_stats()
+        with JobQueue(db_file) as job_queue:
+            job_queue.add(config_files)
+            assert job_queue.run()['done'] == 5
+        assert server.stats['requests'] == 0
+
+
+def test_bad_input(tmp_path, write_config):
+    """These tests should passed with invalid arguments
+    """
+    with pytest.raises(ValueError):
+        JobQueue(str(tmp_path / 'queue.db'), max_attempts=0)
+
+    with FakeConfluenceServer() as server:
+        config_files = write_configs(
+            write_config, server, '{0}/display/TEST/Missing'.format(server.url), '1', 1)
+        with JobQueue(str(tmp_path / 'queue.db'), max_attempts=2,
+                      retry_delay=0.01) as job_queue:
+            job_queue.add(config_files)
+            assert job_queue.run()['failed'] == 1
+            failed_job = job_queue.get_jobs('failed')[0]
+            assert failed_job.attempts == 2
+            assert failed_job.error
+            # failed jobs are pending again when resumed
+            assert job_queue.recover() == 1
+            assert job_queue.get_jobs('pending')[0].attempts == 0
+
+    # queues sharing the same file never claim the same job
+    db_file = str(tmp_path / 'shared.db')
+    config_files = ['page_{0}.json'.format(index) for index in range(40)]
+    with JobQueue(db_file) as first_queue, JobQueue(db_file) as second_queue:
+        first_queue.add(config_files)
+
+        def claim_all(job_queue):
+            claimed = []
+            job = job_queue.claim()
+            while job is not None:
+                claimed.append(job.config_file)
+                job = job_queue.claim()
+            return claimed
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            claimed_lists = list(executor.map(claim_all, [first_queue, second_queue]))
+        claimed = claimed_lists[0] + claimed_lists[1]
+        assert sorted(claimed) == sorted(config_files)
+        assert all(job.attempts == 1 for job in first_queue.get_jobs('rendering'))
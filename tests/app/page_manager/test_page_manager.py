@@ -0,0 +1,67 @@
+"""Unit test
+unit test for the page_manager.py - PageManager instance
+rendering local templates that are streamed
+"""
+
+import io
+import logging
+import os
+
+import pytest
+
+from page_generator.app.page_manager import PageManager
+from page_generator.confluence.fake_server import FakeConfluenceServer
+from page_generator.utils import file_utils
+
+
+def get_resources_path():
+    """Returns the path in which resources are located
+    by taking this file as the reference
+    """
+    rel_resources_path = '../../_resources'
+    # build the path taking this file as reference
+    path = os.path.normpath(os.path.join(os.path.dirname(__file__), rel_resources_path))
+    return path
+
+
+def test_good_input(write_config, caplog, monkeypatch):
+    """These tests should pass
+    """
+    with FakeConfluenceServer() as server:
+        parent = server.add_page('Parent', 'TEST', '<p>parent</p>')
+        page_manager = PageManager(write_config(
+            server, get_resources_path() + '/template.html', parent['id'], title='Warned Page',
+            variables={'$FixVersion': '1.2.3', '$NotInTemplate': 'x'}))
+
+        # configured variables that the template does not reference are reported
+        with caplog.at_level(logging.WARNING):
+            page_manager.generate_page()
+        assert '<td>1.2.3</td>' in server.find_page('Warned Page', 'TEST')['body']
+        assert '"$NotInTemplate"' in caplog.text
+        assert '"$FixVersion"' not in caplog.text
+
+        # also when the page is rendered offline
+        caplog.clear()
+        output = io.BytesIO()
+        with caplog.at_level(logging.WARNING):
+            page_manager.render_page_offline(output)
+        assert '<td>1.2.3</td>' in output.getvalue().decode('utf-8')
+        assert '"$NotInTemplate"' in caplog.text
+
+        # the template is checked again only when the file changes
+        assert page_manager.is_template_streamed()
+        monkeypatch.setattr(file_utils, 'MappedTemplateFile', None)
+        assert page_manager.is_template_streamed()
+
+
+def test_bad_input(write_config, tmp_path):
+    """These tests should passed with invalid arguments
+    """
+    template_file = tmp_path / 'template.html'
+    template_file.write_text('<p>$FixVersion</p>')
+    with FakeConfluenceServer() as server:
+        page_manager = PageManager(write_config(server, str(template_file), '1'))
+        # template file removed after the configuration was loaded
+        template_file.unlink()
+        with pytest.raises(IOError):
+            page_manager.render_page_offline(io.BytesIO())
@@ -0,0 +1,158 @@
+"""Unit test
+unit test for the page_tree.py - PageTree instance
+driven against the fake confluence server
+"""
+
+import json
+import os
+
+import pytest
+
+from page_generator.app.page_tree import PageTree
+from page_generator.confluence.fake_server import FakeConfluenceServer
+
+
+def get_resources_path():
+    """Returns the path in which resources are located
+    by taking this file as the reference
+    """
+    rel_resources_path = '../../_resources'
+    # build the path taking this file as reference
+    path = os.path.normpath(os.path.join(os.path.dirname(__file__), rel_resources_path))
+    return path
+
+
+def write_tree(tmp_path, tree):
+    """Writes a page tree file and returns its path
+    """
+    tree_file = str(tmp_path / 'tree.json')
+    with open(tree_file, 'w') as file_obj:
+        json.dump(tree, file_obj)
+    return tree_file
+
+
+def build_tree(server, parent_page_id, components=3):
+    """Returns a release -> components -> reports page tree
+    """
+    return {
+        'host_url': server.url,
+        'user': 'my_user',
+        'pass': 'my_pass',
+        'space_key': 'REL',
+        'parent_page_id': parent_page_id,
+        '$FixVersion': '1.2.3',
+        'pages': [{
+            'id': 'release',
+            'page_title': 'Release 1.2.3',
+            'source': get_resources_path() + '/template.html',
+            'children': [{
+                'page_title': 'Component {0}'.format(index),
+                # nested pages inherit the source of their parent
+                'source': '{0}/display/REL/Template'.format(server.url),
+                '$Component': str(index),
+                'children': [{
+                    'page_title': 'Report {0}'.format(index),
+                    # link to the next component (created in parallel)
+                    '$ReportLink': '@Component {0}.link'.format((index + 1) % components)
+                }]
+            } for index in range(components)]
+        }]
+    }
+
+
+def test_good_input(tmp_path):
+    """These tests should pass
+    """
+    with FakeConfluenceServer() as server:
+        parent = server.add_page('Releases', 'REL', '<p>releases</p>')
+        server.add_page('Template', 'REL', '<p>$Component - $FixVersion</p>$ReportLink')
+        page_tree = PageTree(write_tree(tmp_path, build_tree(server, parent['id'])))
+        assert list(page_tree.jobs)[:2] == ['release', 'Component 0']
+        assert page_tree.jobs['Report 1'].parent_job_id == 'Component 1'
+        assert page_tree.jobs['Report 1'].variables['$Component'] == '1'
+
+        pages = page_tree.generate(workers=4)
+        assert len(pages) == 7
+        assert not page_tree.errors
+
+        release = server.find_page('Release 1.2.3', 'REL')
+        assert release['parent_page_id'] == parent['id']
+        assert '<td>1.2.3</td>' in release['body']
+        component = server.find_page('Component 2', 'REL')
+        assert component['parent_page_id'] == release['id']
+        assert component['body'] == '<p>2 - 1.2.3</p>$ReportLink'
+        report = server.find_page('Report 2', 'REL')
+        assert report['parent_page_id'] == component['id']
+        # reference to the page of another job
+        link = '{0}/x/{1}'.format(server.url, server.find_page('Component 0', 'REL')['id'])
+        assert report['body'] == '<p>2 - 1.2.3</p>' + link
+        assert page_tree.get_dependencies()['Report 2'] == ['Component 2', 'Component 0']
+        # one authentication and the shared template retrieved once
+        assert server.stats['endpoints'] == {'auth': 1, 'GET content': 1, 'POST content': 7}
+
+        # links to other pages can not be reconciled
+        with pytest.raises(ValueError):
+            page_tree.reconcile(dry_run=True)
+        for job in page_tree.jobs.values():
+            job.variables.pop('$ReportLink', None)
+        summary = page_tree.reconcile(dry_run=True)
+        assert [action.action for action in summary['plan']] == ['update'] * 3
+        assert summary['unchanged'] == 4
+
+        # computed variables are resolved from the directory of the tree file
+        (tmp_path / 'version.txt').write_text('1.2.3\n')
+        for job in page_tree.jobs.values():
+            job.variables['$FixVersion'] = '!file:version.txt'
+        assert page_tree.reconcile(dry_run=True)['unchanged'] == 4
+
+
+def test_bad_input(tmp_path):
+    """These tests should passed with invalid arguments
+    """
+    with FakeConfluenceServer() as server:
+        parent = server.add_page('Releases', 'REL', '<p>releases</p>')
+        server.add_page('Template', 'REL', '<p>$Component</p>')
+        tree = build_tree(server, parent['id'], components=2)
+
+        # duplicated page id
+        tree['pages'][0]['children'][1]['page_title'] = 'Component 0'
+        with pytest.raises(ValueError):
+            PageTree(write_tree(tmp_path, tree))
+
+        # reference cycle: release -> component -> report -> release
+        tree = build_tree(server, parent['id'], components=2)
+        tree['pages'][0]['$FirstReport'] = '@Report 0.id'
+        with pytest.raises(ValueError, match='cycle'):
+            PageTree(write_tree(tmp_path, tree))
+
+        # reference to an unknown page
+        tree['pages'][0]['$FirstReport'] = '@Report 9.id'
+        with pytest.raises(ValueError, match='unknown'):
+            PageTree(write_tree(tmp_path, tree))
+
+        # missing mandatory attribute
+        del tree['pages']
+        with pytest.raises(AttributeError):
+            PageTree(write_tree(tmp_path, tree))
+
+        # children of a page that fails are not created
+        tree = build_tree(server, parent['id'], components=2)
+        server.add_page('Component 1', 'REL', '<p>already exists</p>')
+        page_tree = PageTree(write_tree(tmp_path, tree))
+        pages = page_tree.generate()
+        # 'Report 0' references 'Component 1' which failed
+        assert sorted(pages) == ['Component 0', 'release']
+        assert sorted(page_tree.errors) == ['Component 1', 'Report 0', 'Report 1']
+        assert not server.find_page('Report 1', 'REL')
+
+    # pages that exceed their deadline fail, in generation and reconciliation
+    with FakeConfluenceServer(latency=0.3) as server:
+        parent = server.add_page('Releases', 'REL', '<p>releases</p>')
+        server.add_page('Template', 'REL', '<p>$Component</p>')
+        page_tree = PageTree(write_tree(tmp_path, build_tree(server, parent['id'], 1)),
+                             job_timeout=0.1)
+        assert page_tree.generate() == {}
+        assert 'release' in page_tree.errors
+        for job in page_tree.jobs.values():
+            job.variables.pop('$ReportLink', None)
+        assert page_tree.reconcile()['errors']
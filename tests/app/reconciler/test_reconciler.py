@@ -0,0 +1,132 @@
+"""Unit test
+unit test for the reconciler.py - Reconciler instance
+driven against the fake confluence server
+"""
+
+import pytest
+
+from page_generator.app.reconciler import DesiredPage, Reconciler
+from page_generator.confluence.api import ConfluenceClient
+from page_generator.confluence.fake_server import FakeConfluenceServer
+
+
+def add_current_pages(server):
+    """Adds the current subtree and returns the root page
+    """
+    root = server.add_page('Root', 'DEV', '<p>root</p>')
+    page_a = server.add_page('A', 'DEV', '<p>a</p>', root['id'])
+    server.add_page('A1', 'DEV', '<p>a1</p>', page_a['id'])
+    page_b = server.add_page('B', 'DEV', '<p>b</p>', root['id'])
+    server.add_page('B1', 'DEV', '<p>b1</p>', page_b['id'])
+    page_c = server.add_page('C', 'DEV', '<p>c</p>', root['id'])
+    server.add_page('C1', 'DEV', '<p>c1</p>', page_c['id'])
+    server.add_page('D', 'DEV', '<p>d</p>', root['id'])
+    return root
+
+
+DESIRED_PAGES = [
+    DesiredPage('A', '<p>a</p>', None),
+    DesiredPage('A1', '<p>a1 changed</p>', 'A'),
+    DesiredPage('B', '<p>b</p>', None),
+    DesiredPage('B1', '<p>b1</p>', 'A'),
+    DesiredPage('C1', '<p>c1</p>', 'A'),
+    DesiredPage('E', '<p>e</p>', 'B'),
+    DesiredPage('E1', '<p>e1</p>', 'E')
+]
+
+
+def test_good_input():
+    """These tests should pass
+    """
+    with FakeConfluenceServer() as server:
+        root = add_current_pages(server)
+        with ConfluenceClient(server.url, 'user', 'pass') as client:
+            # listing is paginated with one child per request
+            reconciler = Reconciler(client, 'DEV', root['id'], page_limit=1)
+            current_pages = reconciler.fetch_current()
+            assert list(current_pages) == ['A', 'B', 'C', 'D', 'A1', 'B1', 'C1']
+
+            # dry run computes the plan without writing
+            summary = reconciler.reconcile(DESIRED_PAGES, dry_run=True)
+            assert sorted((action.action, action.title) for action in summary['plan']) == [
+                ('create', 'E'), ('create', 'E1'), ('delete', 'C'), ('delete', 'D'),
+                ('move', 'B1'), ('move', 'C1'), ('update', 'A1')]
+            assert summary['unchanged'] == 2
+            assert server.find_page('C', 'DEV')
+
+            server.reset_stats()
+            summary = reconciler.reconcile(DESIRED_PAGES)
+            assert not summary['errors']
+            endpoints = server.stats['endpoints']
+            assert (endpoints['POST content'], endpoints['PUT content/{id}'],
+                    endpoints['DELETE content/{id}']) == (2, 3, 2)
+
+            page_a = server.find_page('A', 'DEV')
+            assert server.find_page('A1', 'DEV')['body'] == '<p>a1 changed</p>'
+            assert server.find_page('B1', 'DEV')['parent_page_id'] == page_a['id']
+            assert server.find_page('C1', 'DEV')['parent_page_id'] == page_a['id']
+            page_e = server.find_page('E', 'DEV')
+            assert page_e['parent_page_id'] == server.find_page('B', 'DEV')['id']
+            assert server.find_page('E1', 'DEV')['parent_page_id'] == page_e['id']
+            assert not server.find_page('C', 'DEV')
+            assert not server.find_page('D', 'DEV')
+
+            # nothing to write once the pages match, only the bodies of
+            # the pages not written by the reconciler (A and B) are retrieved
+            server.reset_stats()
+            summary = reconciler.reconcile(DESIRED_PAGES)
+            assert not summary['plan']
+            assert summary['unchanged'] == len(DESIRED_PAGES)
+            assert sorted(server.stats['endpoints']) == [
+                'GET content/{id}', 'GET content/{id}/child/page']
+            assert server.stats['endpoints']['GET content/{id}'] == 2
+
+    # the server normalises the bodies: the hash of the written content is compared
+    with FakeConfluenceServer(normalize_body=lambda body: body.replace('<br/>', '<br />')) \
+            as server:
+        root = server.add_page('Root', 'DEV', '<p>root</p>')
+        desired_pages = [DesiredPage('A', '<p>a<br/>b</p>', None),
+                         DesiredPage('B', '<p>b</p>', None)]
+        with ConfluenceClient(server.url, 'user', 'pass') as client:
+            reconciler = Reconciler(client, 'DEV', root['id'])
+            assert reconciler.reconcile(desired_pages)['create'] == 2
+            assert server.find_page('A', 'DEV')['body'] == '<p>a<br />b</p>'
+            server.reset_stats()
+            assert not reconciler.reconcile(desired_pages)['plan']
+            # bodies are not listed nor retrieved, the hashes are compared
+            assert list(server.stats['endpoints']) == ['GET content/{id}/child/page']
+            # pages edited by hand are retrieved and written again
+            page_b = server.find_page('B', 'DEV')
+            client.update_page(page_b['id'], 'B', 'DEV', '<p>edited</p>', 2)
+            server.reset_stats()
+            summary = reconciler.reconcile(desired_pages)
+            assert [(action.action, action.title) for action in summary['plan']] == [
+                ('update', 'B')]
+            assert server.stats['endpoints']['GET content/{id}'] == 1
+            assert not reconciler.reconcile(desired_pages)['plan']
+
+
+def test_bad_input():
+    """These tests should passed with invalid arguments
+    """
+    with FakeConfluenceServer() as server:
+        root = add_current_pages(server)
+        with ConfluenceClient(server.url, 'user', 'pass') as client:
+            reconciler = Reconciler(client, 'DEV', root['id'])
+            current_pages = reconciler.fetch_current()
+            # duplicated titles
+            with pytest.raises(ValueError):
+                reconciler.plan(DESIRED_PAGES + [DesiredPage('A', '', None)], current_pages)
+            # parent page not desired
+            with pytest.raises(ValueError):
+                reconciler.plan([DesiredPage('A1', '', 'X')], current_pages)
+            # parents in a cycle
+            with pytest.raises(ValueError):
+                reconciler.plan([DesiredPage('A', '', 'B'), DesiredPage('B', '', 'A')],
+                                current_pages)
+
+            # failed writes are reported, children of failed creations are not run
+            server.inject_error(403, method='POST')
+            summary = reconciler.reconcile(DESIRED_PAGES)
+            assert sorted(summary['errors']) == ['create:E', 'create:E1']
+            assert server.find_page('A1', 'DEV')['body'] == '<p>a1 changed</p>'
@@ -0,0 +1,45 @@
+"""Unit test
+unit test for the render_only.py - render_jobs function
+"""
+
+from page_generator.app import render_only
+from page_generator.app import variable_providers
+from page_generator.confluence.fake_server import FakeConfluenceServer
+
+
+def test_good_input(tmp_path, write_config):
+    """These tests should pass
+    """
+    template_file = tmp_path / 'template.html'
+    template_file.write_text('<p>$FixVersion $Command</p>')
+    output_dir = str(tmp_path / 'output')
+    with FakeConfluenceServer() as server:
+        config_files = [
+            write_config(server, str(template_file), '1', title='Page {0}'.format(index),
+                         variables={'$FixVersion': '1.2.3', '$Command': '!cmd:echo enabled'},
+                         file_name='config_{0}.json'.format(index))
+            for index in range(3)]
+    # the settings of the main process are applied in the workers
+    variable_providers.set_commands_enabled(True)
+    try:
+        manifest = render_only.render_jobs(config_files, output_dir, workers=2)
+    finally:
+        variable_providers.set_commands_enabled(False)
+    assert manifest['summary']['rendered'] == 3
+    output_file = tmp_path / 'output' / manifest['jobs'][0]['output_file']
+    assert output_file.read_text() == '<p>1.2.3 enabled</p>'
+
+
+def test_bad_input(tmp_path, write_config):
+    """These tests should passed with invalid arguments
+    """
+    template_file = tmp_path / 'template.html'
+    template_file.write_text('<p>$Command</p>')
+    with FakeConfluenceServer() as server:
+        config_file = write_config(server, str(template_file), '1',
+                                   variables={'$Command': '!cmd:echo disabled'})
+    # '!cmd' variables are disabled by default
+    manifest = render_only.render_jobs([config_file], str(tmp_path / 'output'), workers=1)
+    assert manifest['summary']['failed'] == 1
+    assert 'disabled' in manifest['jobs'][0]['error']
+    assert not manifest['jobs'][0].get('output_file')
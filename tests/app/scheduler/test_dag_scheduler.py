@@ -0,0 +1,78 @@
+"""Unit test
+unit test for the scheduler.py - DagScheduler instance
+"""
+
+import threading
+import time
+
+import pytest
+
+from page_generator.app.scheduler import DagScheduler, DependencyError
+
+
+def test_good_input():
+    """These tests should pass
+    """
+    running = []
+    max_running = []
+    lock = threading.Lock()
+
+    def task(name):
+        def run(dependency_results):
+            with lock:
+                running.append(name)
+                max_running.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.remove(name)
+            return name + ':' + ','.join(sorted(dependency_results.values()))
+        return run
+
+    scheduler = DagScheduler(max_workers=4)
+    scheduler.add_task('root', task('root'))
+    for child in ('a', 'b', 'c'):
+        scheduler.add_task(child, task(child), depends_on=['root'])
+    scheduler.add_task('leaf', task('leaf'), depends_on=['a', 'b'])
+    assert scheduler.get_levels() == [['root'], ['a', 'b', 'c'], ['leaf']]
+
+    results = scheduler.run()
+    assert results['root'] == 'root:'
+    assert results['a'] == 'a:root:'
+    assert results['leaf'] == 'leaf:a:root:,b:root:'
+    # children of the same level run in parallel
+    assert max(max_running) == 3
+    assert not scheduler.errors
+
+
+def test_bad_input():
+    """These tests should passed with invalid arguments
+    """
+    with pytest.raises(ValueError):
+        DagScheduler(max_workers=0)
+
+    scheduler = DagScheduler()
+    scheduler.add_task('a', lambda results: 1, depends_on=['c'])
+    scheduler.add_task('b', lambda results: 2, depends_on=['a'])
+    scheduler.add_task('c', lambda results: 3, depends_on=['b'])
+    with pytest.raises(ValueError, match='cycle'):
+        scheduler.run()
+    with pytest.raises(ValueError):
+        scheduler.add_task('a', lambda results: 1)
+
+    scheduler = DagScheduler()
+    scheduler.add_task('a', lambda results: 1, depends_on=['unknown'])
+    with pytest.raises(ValueError, match='unknown'):
+        scheduler.run()
+
+    def fail(results):
+        raise RuntimeError('failed')
+
+    # dependents of a failed task are not run
+    scheduler = DagScheduler()
+    scheduler.add_task('a', fail)
+    scheduler.add_task('b', lambda results: 2, depends_on=['a'])
+    scheduler.add_task('c', lambda results: 3, depends_on=['b'])
+    scheduler.add_task('d', lambda results: 4)
+    assert scheduler.run() == {'d': 4}
+    assert isinstance(scheduler.errors['a'], RuntimeError)
+    assert isinstance(scheduler.errors['c'], DependencyError)
@@ -0,0 +1,103 @@
+"""Unit test
+unit test for the service.py - GenerationService instance
+driven against the fake confluence server
+"""
+
+import pytest
+import requests
+
+from page_generator.app import variable_providers
+from page_generator.app.service import GenerationService
+from page_generator.confluence.api import ConfluenceClient
+from page_generator.confluence.fake_server import FakeConfluenceServer
+
+
+def test_good_input(write_config):
+    """These tests should pass
+    """
+    with FakeConfluenceServer() as server:
+        parent = server.add_page('Parent', 'TEST', '<p>parent</p>')
+        server.add_page('Template', 'TEST', '<p>$FixVersion</p>')
+        source = '{0}/display/TEST/Template'.format(server.url)
+        config_file = write_config(server, source, parent['id'], 'Served Page')
+
+        with GenerationService() as service:
+            response = requests.post(service.url + '/jobs', json={'config_file': config_file})
+            assert response.status_code == 200
+            result = response.json()
+            assert result['status'] == 'done'
+            assert result['action'] == 'created'
+            assert set(result['timings']) >= {'load_ms', 'render_ms', 'write_ms', 'total_ms'}
+            assert server.find_page('Served Page', 'TEST')['body'] == '<p>1.2.3</p>'
+
+            # warm job: no request at all for an unchanged page
+            server.reset_stats()
+            assert service.submit({'config_file': config_file})['action'] == 'unchanged'
+            assert server.stats['requests'] == 0
+
+            # warm job: only the write request
+            write_config(server, source, parent['id'], 'Served Page', {'$FixVersion': '2.0'})
+            result = service.submit({'config_file': config_file})
+            assert (result['action'], result['version']) == ('updated', 2)
+            assert server.stats['endpoints'] == {'PUT content/{id}': 1}
+
+            # page edited by someone else: indexed version is refreshed
+            with ConfluenceClient(server.url, 'user', 'pass') as client:
+                client.update_page(result['page_id'], 'Served Page', 'TEST', '<p>edited</p>', 3)
+            write_config(server, source, parent['id'], 'Served Page', {'$FixVersion': '3.0'})
+            result = service.submit({'config_file': config_file})
+            assert (result['action'], result['version']) == ('updated', 4)
+            assert server.find_page('Served Page', 'TEST')['body'] == '<p>3.0</p>'
+
+            status = requests.get(service.url + '/status').json()
+            assert (status['jobs'], status['failed'], status['clients']) == (4, 0, 1)
+
+            # '!page' variables are computed again by every job,
+            # the cache of the batch is not used
+            cached_values = len(variable_providers.get_default_cache())
+            write_config(server, source, parent['id'], 'Served Page', {
+                '$FixVersion': '!page:{0}/display/TEST/Parent|version'.format(server.url)})
+            assert service.submit({'config_file': config_file})['status'] == 'done'
+            assert server.find_page('Served Page', 'TEST')['body'] == '<p>1</p>'
+            with ConfluenceClient(server.url, 'user', 'pass') as client:
+                client.update_page(parent['id'], 'Parent', 'TEST', '<p>parent</p>', 2)
+            assert service.submit({'config_file': config_file})['status'] == 'done'
+            assert server.find_page('Served Page', 'TEST')['body'] == '<p>2</p>'
+            assert len(variable_providers.get_default_cache()) == cached_values
+
+
+def test_bad_input(tmp_path, monkeypatch, write_config):
+    """These tests should passed with invalid arguments
+    """
+    with GenerationService() as service:
+        assert requests.post(service.url + '/jobs', json={}).status_code == 400
+        assert requests.post(service.url + '/jobs', data='not json').status_code == 400
+        assert requests.get(service.url + '/unknown').status_code == 404
+        response = requests.post(service.url + '/jobs',
+                                 json={'config_file': str(tmp_path / 'missing.json')})
+        assert response.status_code == 500
+        assert response.json()['status'] == 'failed'
+        with pytest.raises(ValueError):
+            service.submit({'other': 1})
+
+        # config files can not run commands in the service, even if they are enabled
+        monkeypatch.setattr(variable_providers, '_COMMANDS_ENABLED', True)
+        with FakeConfluenceServer() as server:
+            config_file = write_config(server, str(tmp_path / 'template.html'), '1',
+                                       variables={'$FixVersion': '!cmd:touch executed'})
+            (tmp_path / 'template.html').write_text('<p>$FixVersion</p>')
+            result = service.submit({'config_file': config_file})
+            assert result['status'] == 'failed'
+            assert '!cmd' in result['error']
+            assert not (tmp_path / 'executed').exists()
+            assert server.stats['requests'] == 0
+
+            # nor read local files or environment variables
+            (tmp_path / 'secret.txt').write_text('secret')
+            for value in ('!file:secret.txt', '!env:HOME', '!lines:secret.txt'):
+                config_file = write_config(server, str(tmp_path / 'template.html'), '1',
+                                           variables={'$FixVersion': value})
+                result = service.submit({'config_file': config_file})
+                assert result['status'] == 'failed'
+                assert value.split(':')[0] in result['error']
+            assert server.stats['requests'] == 0
@@ -0,0 +1,91 @@
+"""Unit test
+unit test for the storage_format.py - minification of the templates
+"""
+
+import os
+
+from page_generator.app import storage_format
+from page_generator.app.template_store import TemplateStore
+
+
+def get_resources_path():
+    """Returns the path in which resources are located
+    by taking this file as the reference
+    """
+    rel_resources_path = '../../_resources'
+    # build the path taking this file as reference
+    path = os.path.normpath(os.path.join(os.path.dirname(__file__), rel_resources_path))
+    return path
+
+
+def test_good_input(tmp_path):
+    """These tests should pass
+    """
+    minify = storage_format.minify
+    # whitespace next to block elements is removed, inline spaces are kept
+    assert minify('<p>\n  Hello <strong>x</strong>   world\n</p>\n<p> a </p>') == \
+        '<p>Hello <strong>x</strong> world</p><p>a</p>'
+    assert minify('<span>a</span>\n  <span>b</span>') == '<span>a</span> <span>b</span>'
+    assert minify('<td>\n  $Var\n</td>') == '<td>$Var</td>'
+    # attributes are never changed and parameter values keep their spaces
+    assert minify(' <th  colspan="1"   style="a  b">x</th> ') == \
+        '<th  colspan="1"   style="a  b">x</th>'
+    assert minify('<ac:parameter ac:name="x">  v  </ac:parameter>\n  <br/>') == \
+        '<ac:parameter ac:name="x"> v </ac:parameter><br/>'
+    # inline macros and unknown elements keep the spaces around them
+    status = ('<ac:structured-macro ac:name="status">\n  <ac:parameter ac:name="colour">'
+              'Green</ac:parameter>\n  <ac:parameter ac:name="title">OK</ac:parameter>\n'
+              '</ac:structured-macro>')
+    assert minify('<p>Status: ' + status + ' since $Date</p>') == (
+        '<p>Status: <ac:structured-macro ac:name="status"><ac:parameter ac:name="colour">'
+        'Green</ac:parameter><ac:parameter ac:name="title">OK</ac:parameter>'
+        '</ac:structured-macro> since $Date</p>')
+    jira = '<ac:structured-macro ac:name="jira"><ac:parameter ac:name="key">REL-1</ac:parameter>' \
+        '</ac:structured-macro>'
+    assert minify('<p>\n  Fixed by  ' + jira + '\n  and ' + jira + '\n</p>') == \
+        '<p>Fixed by ' + jira + ' and ' + jira + '</p>'
+    assert minify('<p>a <ac:structured-macro ac:name="anchor"/> b</p>') == \
+        '<p>a <ac:structured-macro ac:name="anchor"/> b</p>'
+    assert minify('a <input/> b') == 'a <input/> b'
+    assert minify('<p>a <custom:tag>x</custom:tag>\n b</p>') == \
+        '<p>a <custom:tag>x</custom:tag> b</p>'
+    # no-break spaces are content
+    assert minify('<p>a\xa0 b</p>') == '<p>a\xa0 b</p>'
+    # preformatted content is kept as it is
+    code = ('<ac:structured-macro ac:name="code"><ac:plain-text-body><![CDATA[  x\n'
+            '    y ]]></ac:plain-text-body></ac:structured-macro>')
+    assert minify('<div>\n  <pre>  keep\n   this </pre>\n  ' + code + '\n</div>') == \
+        '<div><pre>  keep\n   this </pre>' + code + '</div>'
+
+    # minified when compiled, the bytes saved are kept with the compiled template
+    source = get_resources_path() + '/template.html'
+    compiled = TemplateStore(minify=True).get_compiled(source)
+    plain = TemplateStore().get_compiled(source)
+    assert plain.bytes_saved == 0
+    assert compiled.source_size == plain.source_size
+    assert compiled.bytes_saved == plain.source_size - len(compiled.content.encode('utf-8')) > 0
+    assert '\n' not in compiled.content
+    variables = {'$FixVersion': '1.2.3', '$Customer': 'ACME'}
+    assert '<td>1.2.3</td>' in compiled.render(variables)
+    assert ''.join(compiled.render(variables).split()) == ''.join(plain.render(variables).split())
+
+    # sizes of composed templates count the fragments before minification
+    (tmp_path / 'legend.html').write_text(
+        '<table>\n  <tr>\n    <td>$Legend</td>\n  </tr>\n</table>\n')
+    (tmp_path / 'page.html').write_text('<div>\n  <!--#include source="legend.html" -->\n</div>\n')
+    compiled = TemplateStore(minify=True).get_compiled(str(tmp_path / 'page.html'))
+    assert compiled.content == '<div><table><tr><td>$Legend</td></tr></table></div>'
+    assert compiled.source_size == TemplateStore().get_compiled(
+        str(tmp_path / 'page.html')).source_size
+
+
+def test_bad_input():
+    """These tests should passed with invalid arguments
+    """
+    minify = storage_format.minify
+    assert minify('') == ''
+    assert minify('   \n  ') == ''
+    assert minify('plain  text') == 'plain text'
+    # unclosed preformatted blocks and comments are minified as usual
+    assert minify('<pre>\n  x') == '<pre>x'
+    assert minify('<p>  <!-- a  b -->  </p>') == '<p><!-- a  b --></p>'
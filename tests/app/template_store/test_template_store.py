@@ -0,0 +1,126 @@
+"""Unit test
+unit test for the template_store.py - TemplateStore instance
+"""
+
+import os
+import threading
+
+import pytest
+
+from page_generator.app.page_manager import PageManager
+from page_generator.app.template_store import CompiledTemplate, TemplateStore
+from page_generator.confluence.fake_server import FakeConfluenceServer
+
+
+def write_file(path, content):
+    """Writes a template file and returns its path
+    """
+    with open(str(path), 'w') as file_obj:
+        file_obj.write(content)
+    return str(path)
+
+
+def test_good_input(tmp_path, write_config):
+    """These tests should pass
+    """
+    local_source = write_file(tmp_path / 'template.html', '<p>$Local</p>')
+    # both remote templates have to be retrieved at the same time
+    barrier = threading.Barrier(2, timeout=5)
+
+    def loader(source):
+        barrier.wait()
+        return '<p>{0}</p>'.format(source)
+
+    store = TemplateStore(str(tmp_path / 'cache'))
+    sources = ['https://host/display/A/One', 'https://host/display/A/Two']
+    errors = store.prefetch({sources[0]: loader, sources[1]: loader, local_source: None})
+    assert errors == {}
+    assert all(store.is_compiled(source) for source in sources + [local_source])
+    assert store.get_compiled(sources[1]).content == '<p>https://host/display/A/Two</p>'
+    assert store.get_compiled(local_source).render({'$Local': 'x'}) == '<p>x</p>'
+
+    # cached templates are only retrieved again on refresh
+    store = TemplateStore(str(tmp_path / 'cache'))
+    assert store.prefetch({sources[0]: lambda source: '<p>new</p>'}) == {}
+    assert store.get_compiled(sources[0]).content == '<p>https://host/display/A/One</p>'
+    assert store.prefetch({sources[0]: lambda source: '<p>new</p>'}, refresh=True) == {}
+    assert store.get_compiled(sources[0]).content == '<p>new</p>'
+
+    # includes: relative local fragments (nested) and remote fragments
+    os.makedirs(str(tmp_path / 'parts'))
+    write_file(tmp_path / 'parts' / 'legend.html', '<table>$Legend</table>')
+    write_file(tmp_path / 'parts' / 'header.html',
+               '<h1>$Title</h1><!--#include source="legend.html" -->')
+    source = write_file(tmp_path / 'page.html',
+                        '<!--#include source="parts/header.html" -->'
+                        '<!--#include source="https://host/display/A/Toc" --><p>$Body</p>')
+    loaded = []
+
+    def toc_loader(source):
+        loaded.append(source)
+        return '<ac:structured-macro ac:name="toc" />'
+
+    store = TemplateStore()
+    compiled = store.get_compiled(source, loader=toc_loader)
+    assert compiled.render({'$Title': 'T', '$Legend': 'L', '$Body': 'B'}) == (
+        '<h1>T</h1><table>L</table><ac:structured-macro ac:name="toc" /><p>B</p>')
+    assert sorted(compiled.includes) == sorted([
+        'https://host/display/A/Toc', str(tmp_path / 'parts' / 'header.html'),
+        str(tmp_path / 'parts' / 'legend.html')])
+    # the composed template is cached as a single compiled unit
+    assert store.get_compiled(source, loader=toc_loader) is compiled
+    assert loaded == ['https://host/display/A/Toc']
+    # a changed fragment is composed again into the templates including it
+    write_file(tmp_path / 'parts' / 'legend.html', '<table>new</table>')
+    store.invalidate(str(tmp_path / 'parts' / 'legend.html'))
+    assert not store.is_compiled(source)
+    assert '<table>new</table>' in store.get_compiled(source).content
+    assert loaded == ['https://host/display/A/Toc']
+
+    # streamed local templates of a batch are not prefetched
+    included_source = write_file(tmp_path / 'included.html',
+                                 '<!--#include source="parts/legend.html" --><p>$Body</p>')
+    store = TemplateStore()
+    with FakeConfluenceServer() as server:
+        managers = [
+            PageManager(write_config(server, local_source, '1', file_name='streamed.json'),
+                        template_store=store),
+            PageManager(write_config(server, included_source, '1', file_name='included.json'),
+                        template_store=store)]
+        assert PageManager.prefetch_templates(managers, store) == {}
+        assert server.stats['requests'] == 0
+    assert not store.is_compiled(local_source)
+    assert store.is_compiled(included_source)
+
+    # only the segments of the sets of variable names used last are kept
+    compiled = CompiledTemplate('<p>$Name</p>')
+    for index in range(CompiledTemplate.MAX_SEGMENTS * 2):
+        assert compiled.render({'$Name': 'x', '$Extra{0}'.format(index): ''}) == '<p>x</p>'
+        assert len(compiled._segments) <= CompiledTemplate.MAX_SEGMENTS
+    assert compiled.find_variables({'$Name': 'y'}) == {'$Name'}
+    assert frozenset(['$Name']) in compiled._segments
+
+
+def test_bad_input(tmp_path):
+    """These tests should passed with invalid arguments
+    """
+    def loader(source):
+        raise IOError("not found: {0}".format(source))
+
+    store = TemplateStore()
+    assert store.prefetch({}) == {}
+    errors = store.prefetch({'https://host/display/A/Missing': loader,
+                             str(tmp_path / 'missing.html'): None})
+    assert len(errors) == 2
+    assert isinstance(errors['https://host/display/A/Missing'], IOError)
+    assert not store.is_compiled('https://host/display/A/Missing')
+
+    # include cycle: page -> header -> page
+    write_file(tmp_path / 'header.html', '<!--#include source="page.html" -->')
+    source = write_file(tmp_path / 'page.html', '<!--#include source="header.html" -->')
+    with pytest.raises(ValueError, match='cycle'):
+        store.get_compiled(source)
+    # missing fragment
+    source = write_file(tmp_path / 'other.html', '<!--#include source="missing.html" -->')
+    with pytest.raises(IOError):
+        store.get_compiled(source)
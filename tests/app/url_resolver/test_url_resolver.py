@@ -0,0 +1,77 @@
+"""Unit test
+unit test for the url_resolver.py - URL parsing and UrlResolver instance
+"""
+
+import pytest
+
+from page_generator.app import url_resolver
+from page_generator.app.page_manager import PageManager
+from page_generator.confluence.api import ConfluenceClient
+from page_generator.confluence.fake_server import FakeConfluenceServer
+
+
+def test_good_input():
+    """These tests should pass
+    """
+    location = url_resolver.parse_url('http://host.com:8090/display/~user1/My+Page+1')
+    assert location.host == 'http://host.com:8090'
+    assert location.space_key == '~user1'
+    assert location.title == 'My Page 1'
+    assert location.raw_title == 'My+Page+1'
+    assert location.page_id is None
+
+    location = url_resolver.parse_url('http://host.com/pages/viewpage.action?pageId=102948555')
+    assert location.page_id == '102948555'
+
+    # modern URL format, with and without /wiki prefix
+    url = 'https://host.com/wiki/spaces/DEV/pages/12345/Release+%26+Notes'
+    location = url_resolver.parse_url(url)
+    assert (location.space_key, location.page_id, location.title) == (
+        'DEV', '12345', 'Release & Notes')
+    assert url_resolver.parse_url('https://host.com/spaces/DEV/pages/12345').title is None
+    assert PageManager.is_id_in_url(url)
+    assert PageManager.get_id_from_url(url) == '12345'
+    assert PageManager.get_space_from_url(url) == 'DEV'
+
+    # parsed URLs are cached
+    assert url_resolver.parse_url(url) is location
+
+    with FakeConfluenceServer() as server:
+        first = server.add_page('Cats and "Dogs"', 'TEST', '<p>1</p>')
+        second = server.add_page('Second', 'TEST', '<p>2</p>')
+        other = server.add_page('Second', 'OTHER', '<p>3</p>')
+        urls = [
+            server.url + '/display/TEST/Cats+and+%22Dogs%22',
+            server.url + '/display/TEST/Second',
+            server.url + '/display/OTHER/Second',
+            server.url + '/pages/viewpage.action?pageId=42',
+            server.url + '/display/TEST/Missing'
+        ]
+        resolver = url_resolver.UrlResolver()
+        with ConfluenceClient(server.url, 'user', 'pass') as client:
+            page_ids = resolver.resolve_ids(urls, client)
+            # one search per space, none for the id URL
+            assert server.stats['endpoints']['GET content/search'] == 2
+            assert page_ids == dict(zip(urls, [
+                first['id'], second['id'], other['id'], '42', None]))
+
+            # resolved titles are not searched again
+            resolver.resolve_ids(urls[:3], client)
+            assert server.stats['endpoints']['GET content/search'] == 2
+
+            # results are retrieved through all the result pages
+            assert len(client.search_content('type=page and space="TEST"', limit=1)) == 2
+
+
+def test_bad_input():
+    """These tests should passed with invalid arguments
+    """
+    with pytest.raises(ValueError):
+        url_resolver.parse_url('not an url')
+    with pytest.raises(ValueError):
+        url_resolver.parse_url('http://host.com/unknown/path')
+    assert not PageManager.is_id_in_url('http://host.com/unknown/path')
+    with pytest.raises(Exception):
+        PageManager.get_page_title_from_url('http://host.com/pages/viewpage.action?pageId=1')
+    with pytest.raises(Exception):
+        PageManager.get_id_from_url('http://host.com/display/DEV/Page')
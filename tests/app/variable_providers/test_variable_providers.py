@@ -0,0 +1,108 @@
+"""Unit test
+unit test for the variable_providers.py - computed template variables
+"""
+
+import io
+import sys
+
+import pytest
+
+from page_generator.app import variable_providers
+from page_generator.app.page_manager import PageManager
+from page_generator.app.template_store import TemplateStore
+from page_generator.confluence.fake_server import FakeConfluenceServer
+
+
+def test_good_input(tmp_path, monkeypatch, write_config):
+    """These tests should pass
+    """
+    calls = []
+
+    def count_calls(argument, context):
+        calls.append(argument)
+        return argument.upper()
+
+    variable_providers.register_provider('upper', count_calls)
+    monkeypatch.setattr(variable_providers, '_COMMANDS_ENABLED', True)
+    monkeypatch.setenv('PAGE_GENERATOR_BUILD', '42')
+    (tmp_path / 'items.txt').write_text('a\nb\nc\n')
+    (tmp_path / 'template.html').write_text(
+        '<p>$Build $Items $Lines $Cmd $Upper $Version</p>')
+    variables = {
+        '$Build': '!env:PAGE_GENERATOR_BUILD',
+        '$Items': '!file:items.txt',
+        '$Lines': '!lines:items.txt',
+        '$Cmd': '!cmd:"{0}" -c "print(6 * 7)"'.format(sys.executable),
+        '$Upper': '!upper:shared',
+        # not referenced by the template: never computed
+        '$Unused': '!upper:unused',
+        # not a registered provider: static value
+        '$Static': '!important: value'
+    }
+    with FakeConfluenceServer() as server:
+        page = server.add_page('Release', 'REL', '<p>release</p>')
+        variables['$Version'] = '!page:{0}/display/REL/Release|version'.format(server.url)
+        variable_providers.set_default_cache(variable_providers.ProviderCache())
+        store = TemplateStore()
+        managers = [PageManager(write_config(server, str(tmp_path / 'template.html'), '1', name,
+                                             variables, 'REL', '{0}.json'.format(name)),
+                                template_store=store) for name in ('one', 'two')]
+        assert managers[0].config_obj.template_variables == {'$Static': '!important: value'}
+        assert '$Upper' in managers[0].config_obj.computed_variables
+        for manager in managers:
+            assert manager.render_page() == '<p>42 a\nb\nc 3 42 SHARED {0}</p>'.format(
+                page['version'])
+        # memoized for the batch: providers shared by the pages run once
+        assert calls == ['shared']
+        assert server.stats['endpoints'] == {'GET content': 1}
+        # a new batch computes the variables again
+        variable_providers.set_default_cache(variable_providers.ProviderCache())
+        managers[0].render_page()
+        assert calls == ['shared', 'shared']
+        # streamed local templates (not render-only) retrieve the pages too
+        output = io.BytesIO()
+        managers[0].render_page_to(output)
+        assert output.getvalue().decode('utf-8').endswith(' {0}</p>'.format(page['version']))
+
+
+def test_bad_input(tmp_path, monkeypatch, write_config):
+    """These tests should passed with invalid arguments
+    """
+    context = variable_providers.ProviderContext(str(tmp_path))
+    cache = variable_providers.ProviderCache()
+    assert variable_providers.parse('plain value') is None
+    assert variable_providers.parse('!unknown:value') is None
+    assert variable_providers.parse(42) is None
+    with pytest.raises(ValueError):
+        variable_providers.resolve('$Env', '!env:PAGE_GENERATOR_MISSING', context, cache)
+    with pytest.raises(ValueError):
+        variable_providers.resolve('$File', '!file:missing.txt', context, cache)
+    # commands are disabled by default
+    with pytest.raises(ValueError, match='disabled'):
+        variable_providers.resolve(
+            '$Cmd', '!cmd:"{0}" -c "print(42)"'.format(sys.executable), context, cache)
+    monkeypatch.setattr(variable_providers, '_COMMANDS_ENABLED', True)
+    with pytest.raises(ValueError):
+        variable_providers.resolve(
+            '$Cmd', '!cmd:"{0}" -c "import sys; sys.exit(3)"'.format(sys.executable),
+            context, cache)
+    assert variable_providers.uses_provider({'$Cmd': '!cmd:ls', '$Env': '!env:HOME'}, 'cmd')
+    assert not variable_providers.uses_provider({'$Env': '!env:HOME', '$N': 1}, 'cmd')
+    with pytest.raises(ValueError):
+        variable_providers.resolve('$Page', '!page:http://host/display/A/B|size', context, cache)
+    # no server to retrieve the page
+    with pytest.raises(ValueError):
+        variable_providers.resolve('$Page', '!page:http://host/display/A/B', context, cache)
+    # failures are not memoized
+    assert len(cache) == 0
+
+    # render-only mode never connects to the server to retrieve a page
+    (tmp_path / 'template.html').write_text('<p>$Version</p>')
+    with FakeConfluenceServer() as server:
+        server.add_page('Release', 'REL', '<p>release</p>')
+        config_file = write_config(server, str(tmp_path / 'template.html'), '1', variables={
+            '$Version': '!page:{0}/display/REL/Release'.format(server.url)})
+        manager = PageManager(config_file, template_store=TemplateStore())
+        with pytest.raises(ValueError):
+            manager.render_page_offline(io.BytesIO())
+        assert server.stats['endpoints'] == {}
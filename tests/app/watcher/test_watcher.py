@@ -0,0 +1,95 @@
+"""Unit test
+unit test for the watcher.py - Watcher instance
+driven against the fake confluence server
+"""
+
+from page_generator.app.watcher import Watcher
+from page_generator.confluence.api import ConfluenceClient
+from page_generator.confluence.fake_server import FakeConfluenceServer
+
+
+def test_good_input(tmp_path, write_config):
+    """These tests should pass
+    """
+    with FakeConfluenceServer() as server:
+        parent = server.add_page('Parent', 'TEST', '<p>parent</p>')
+        remote = server.add_page('Template', 'TEST', '<p>remote $FixVersion</p>')
+        local_template = tmp_path / 'template.html'
+        local_template.write_text('<p>local $FixVersion</p>')
+        remote_source = '{0}/display/TEST/Template'.format(server.url)
+        local_config = write_config(server, str(local_template), parent['id'], 'Local',
+                                    file_name='Local.json')
+        remote_config = write_config(server, remote_source, parent['id'], 'Remote',
+                                     file_name='Remote.json')
+
+        with Watcher([local_config, remote_config], remote_interval=0) as watcher:
+            assert not watcher.start()
+            assert server.find_page('Local', 'TEST')['body'] == '<p>local 1.2.3</p>'
+            assert server.find_page('Remote', 'TEST')['body'] == '<p>remote 1.2.3</p>'
+            assert watcher.dependents[remote_source] == {remote_config}
+
+            # nothing changed: only the remote versions are polled
+            assert watcher.check_changes() == set()
+
+            # local template changed
+            local_template.write_text('<p>new local $FixVersion</p>')
+            assert watcher.check_changes() == {local_config}
+            assert not watcher.regenerate([local_config])
+            local_page = server.find_page('Local', 'TEST')
+            assert local_page['body'] == '<p>new local 1.2.3</p>'
+            assert local_page['version'] == 2
+
+            # remote template changed
+            with ConfluenceClient(server.url, 'user', 'pass') as client:
+                client.update_page(remote['id'], 'Template', 'TEST',
+                                   '<p>new remote $FixVersion</p>', 2)
+            assert watcher.check_changes() == {remote_config}
+            watcher.regenerate([remote_config])
+            assert server.find_page('Remote', 'TEST')['body'] == '<p>new remote 1.2.3</p>'
+
+            # config changed
+            write_config(server, remote_source, parent['id'], 'Remote', {'$FixVersion': '2.0'},
+                         file_name='Remote.json')
+            assert watcher.check_changes() == {remote_config}
+            watcher.regenerate([remote_config])
+            assert server.find_page('Remote', 'TEST')['body'] == '<p>new remote 2.0</p>'
+
+            # unchanged pages are not written again
+            watcher.regenerate([local_config])
+            assert server.find_page('Local', 'TEST')['version'] == 2
+
+    # the server normalises the bodies: the hash of the written content is compared
+    with FakeConfluenceServer(normalize_body=lambda body: body.replace('<br/>', '<br />')) \
+            as server:
+        parent = server.add_page('Parent', 'TEST', '<p>parent</p>')
+        local_template = tmp_path / 'normalized.html'
+        local_template.write_text('<p>$FixVersion<br/>local</p>')
+        config_file = write_config(server, str(local_template), parent['id'], 'Normalized',
+                                   file_name='Normalized.json')
+        with Watcher([config_file], remote_interval=0) as watcher:
+            assert not watcher.start()
+            assert server.find_page('Normalized', 'TEST')['body'] == '<p>1.2.3<br />local</p>'
+            server.reset_stats()
+            assert not watcher.regenerate([config_file])
+            assert server.find_page('Normalized', 'TEST')['version'] == 1
+            assert 'PUT content/{id}' not in server.stats['endpoints']
+            # pages edited by hand are written again
+            page = server.find_page('Normalized', 'TEST')
+            with ConfluenceClient(server.url, 'user', 'pass') as client:
+                client.update_page(page['id'], 'Normalized', 'TEST', '<p>edited</p>', 2)
+            assert not watcher.regenerate([config_file])
+            assert server.find_page('Normalized', 'TEST')['version'] == 3
+
+
+def test_bad_input(write_config):
+    """These tests should passed with invalid arguments
+    """
+    with FakeConfluenceServer() as server:
+        missing_source = '{0}/display/TEST/Missing'.format(server.url)
+        config_file = write_config(server, missing_source, '1', 'Page')
+        with Watcher([config_file], interval=0.01, remote_interval=0) as watcher:
+            # failed pages are reported, watching goes on
+            errors = watcher.start()
+            assert list(errors) == [config_file]
+            assert watcher.check_changes() == set()
+            watcher.run(max_cycles=1)
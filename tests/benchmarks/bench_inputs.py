@@ -0,0 +1,82 @@
+"""Benchmarks
+synthetic inputs for the benchmarks, scaled by size and variable count
+"""
+
+# block of pretty-printed storage format repeated to build templates
+TEMPLATE_BLOCK = (
+    u'  <ac:layout-section ac:type="single">\n'
+    u'    <ac:layout-cell>\n'
+    u'      <table class="relative-table wrapped">\n'
+    u'        <tbody>\n'
+    u'          <tr><th>Fix Version</th><th>Total PR</th></tr>\n'
+    u'          <tr><td>{var}</td><td><span>{var}</span></td></tr>\n'
+    u'        </tbody>\n'
+    u'      </table>\n'
+    u'    </ac:layout-cell>\n'
+    u'  </ac:layout-section>\n'
+)
+
+
+def get_variable_names(var_count):
+    # type: (int) -> list[str]
+    """Returns a list with synthetic template variable names
+    """
+    return ['$Variable{0:05d}'.format(index) for index in range(var_count)]
+
+
+def build_template(size_kb, var_count):
+    # type: (int, int) -> str
+    """Builds a storage format template of about 'size_kb' kilobytes
+    referencing every one of the 'var_count' variables
+    """
+    names = get_variable_names(var_count)
+    blocks = []
+    size = 0
+    index = 0
+    while size < size_kb * 1024 or index < var_count:
+        block = TEMPLATE_BLOCK.format(var=names[index % var_count])
+        blocks.append(block)
+        size += len(block)
+        index += 1
+    return u'<ac:layout>\n{0}</ac:layout>\n'.format(u''.join(blocks))
+
+
+def build_config(source, var_count):
+    # type: (str, int) -> dict
+    """Builds a json configuration for PageManager with 'var_count' variables
+    """
+    config = {
+        'host_url': 'http://localhost:8090',
+        'user': 'bench_user',
+        'pass': 'bench_pass',
+        'source': source,
+        'space_key': 'BENCH',
+        'parent_page_id': '1000',
+        'page_title': 'Benchmark Page'
+    }
+    for name in get_variable_names(var_count):
+        config[name] = 'value of {0}'.format(name[1:])
+    return config
+
+
+def build_page_response(size_kb, results=False):
+    # type: (int, bool) -> dict
+    """Builds a confluence REST API response with a page of
+    about 'size_kb' kilobytes of storage content
+    """
+    page = {
+        'id': '102948555',
+        'type': 'page',
+        'title': 'Benchmark Page',
+        'space': {'key': 'BENCH', 'name': 'Benchmark'},
+        'version': {'number': 7},
+        'history': {'latest': True},
+        'body': {'storage': {
+            'value': build_template(size_kb, 10),
+            'representation': 'storage'}},
+        '_links': {'tinyui': '/x/AbCd', 'webui': '/display/BENCH/Benchmark+Page'}
+    }
+    if results:
+        return {'results': [page], 'size': 1, '_links': {'base': 'http://localhost:8090'}}
+    page['_links']['base'] = 'http://localhost:8090'
+    return page
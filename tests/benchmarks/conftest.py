@@ -0,0 +1,46 @@
+"""Benchmarks
+Micro-benchmarks for the hot paths of the page generator (pytest-benchmark).
+
+Synthetic inputs are scaled by size and variable count through
+the fixtures of this module.
+
+The benchmarks are skipped unless '--run-benchmarks' is given.
+
+Run the benchmarks and store the results as a baseline:
+    pytest tests/benchmarks --run-benchmarks --benchmark-only --benchmark-autosave
+
+Compare against the last stored baseline, failing on regressions:
+    pytest tests/benchmarks --run-benchmarks --benchmark-only \
+        --benchmark-compare --benchmark-compare-fail=mean:10%
+
+Run them once as plain tests (no timing) with
+'--run-benchmarks --benchmark-disable'.
+"""
+
+import json
+import os
+
+import pytest
+
+
+@pytest.fixture
+def write_file(tmp_path):
+    """Returns a function that writes content into a temporary file
+    and returns its path
+    """
+    def _write_file(file_name, content):
+        path = str(tmp_path / file_name)
+        with open(path, 'w') as file_obj:
+            if isinstance(content, dict):
+                json.dump(content, file_obj)
+            else:
+                file_obj.write(content)
+        return path
+    return _write_file
+
+
+@pytest.fixture
+def resources_path():
+    """Returns the path in which test resources are located
+    """
+    return os.path.normpath(os.path.join(os.path.dirname(__file__), '../_resources'))
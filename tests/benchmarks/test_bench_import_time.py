@@ -0,0 +1,61 @@
+"""Benchmarks
+benchmarks for the start-up (import) latency of the command line tool
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+# benchmarks are skipped if pytest-benchmark is not installed
+pytest.importorskip('pytest_benchmark')
+
+import page_generator.app
+
+# modules that should only be imported once the server is used
+HEAVY_MODULES = ['requests', 'urllib3', 'page_generator.confluence.api', 'cProfile']
+
+
+def get_python_path():
+    """Returns the directory which contains the page_generator package
+    """
+    package_path = os.path.dirname(os.path.dirname(page_generator.app.__file__))
+    return os.path.dirname(os.path.abspath(package_path))
+
+
+def run_python(*args):
+    """Runs a python process with the page_generator package in its path
+    """
+    env = dict(os.environ, PYTHONPATH=get_python_path())
+    return subprocess.run([sys.executable] + list(args), env=env,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          universal_newlines=True, check=True)
+
+
+@pytest.mark.parametrize('module', [
+    'page_generator.page_generator_tool',
+    'page_generator.app.page_manager'])
+def test_import_is_lightweight(module):
+    """Importing the tool or the page manager does not import
+    the network modules
+    """
+    result = run_python('-c', 'import sys, {0}; print(",".join(sys.modules))'.format(module))
+    imported = set(result.stdout.strip().split(','))
+    assert not imported.intersection(HEAVY_MODULES)
+
+
+def test_import_tool(benchmark):
+    """Wall time of a python process importing the tool
+    """
+    benchmark.pedantic(run_python, args=('-c', 'import page_generator.page_generator_tool'),
+                       rounds=10, warmup_rounds=1)
+
+
+def test_tool_help(benchmark):
+    """Wall time of 'page_generator_tool --help'
+    """
+    result = benchmark.pedantic(run_python, args=('-m', 'page_generator.page_generator_tool',
+                                                  '--help'),
+                                rounds=10, warmup_rounds=1)
+    assert '--config_file' in result.stdout
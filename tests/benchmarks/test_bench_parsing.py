@@ -0,0 +1,81 @@
+"""Benchmarks
+benchmarks for the parsing of configuration, mapping and API response data
+"""
+
+import pytest
+
+# benchmarks are skipped if pytest-benchmark is not installed
+pytest.importorskip('pytest_benchmark')
+
+from page_generator.app.page_manager import PageManager
+from page_generator.confluence import api
+from page_generator.utils.file_utils import VariableMappingFile
+from page_generator.utils.json_utils import JsonDataFile
+
+from bench_inputs import build_config, build_page_response, get_variable_names
+
+
+@pytest.mark.parametrize('var_count', [10, 1000])
+def test_json_data_file(benchmark, write_file, resources_path, var_count):
+    """JsonDataFile loading and flattening of a configuration file
+    """
+    config = build_config(resources_path + '/template.html', var_count)
+    # nested sections are flattened by JsonDataFile too
+    config['sections'] = [{'name': 'section{0}'.format(index), 'values': [index, index + 1]}
+                          for index in range(var_count)]
+    config_file = write_file('config.json', config)
+
+    json_data_obj = benchmark(JsonDataFile, config_file)
+    assert json_data_obj.has_json_attribute(get_variable_names(var_count)[-1])
+
+
+@pytest.mark.parametrize('results', [False, True])
+@pytest.mark.parametrize('size_kb', [16, 4096])
+def test_page_from_response(benchmark, size_kb, results):
+    """api.Page construction from large json API responses
+    """
+    benchmark.group = 'page-{0}kb'.format(size_kb)
+    response = build_page_response(size_kb, results)
+
+    page = benchmark(api.Page, response)
+    assert page.content.startswith('<ac:layout>')
+
+
+@pytest.mark.parametrize('var_count', [100, 5000])
+def test_variable_mapping_file(benchmark, write_file, var_count):
+    """VariableMappingFile parsing of a mapping file
+    """
+    mapping = ',\n'.join('{0} = json_{1}'.format(name, name[1:])
+                         for name in get_variable_names(var_count))
+    mapping_file = write_file('mapping.txt', mapping)
+
+    mapping_obj = benchmark(VariableMappingFile, mapping_file)
+    assert len(mapping_obj.get_var_mapping_dict()) == var_count
+
+
+URL_COUNT = 1000
+
+
+def test_get_space_from_url(benchmark):
+    """PageManager.get_space_from_url over a batch of page URLs
+    """
+    urls = ['http://confluence.host.com:8090/display/SPACE{0}/My+Page+{0}'.format(index)
+            for index in range(URL_COUNT)]
+
+    def resolve():
+        return [PageManager.get_space_from_url(url) for url in urls]
+
+    assert benchmark(resolve)[-1] == 'SPACE{0}'.format(URL_COUNT - 1)
+
+
+def test_get_id_from_url(benchmark):
+    """PageManager.get_id_from_url over a batch of page URLs
+    """
+    urls = ['http://confluence.host.com:8090/pages/viewpage.action?pageId={0}'.format(index)
+            for index in range(URL_COUNT)]
+
+    def resolve():
+        return [PageManager.get_id_from_url(url) for url in urls]
+
+    assert benchmark(resolve)[-1] == str(URL_COUNT - 1)
+
@@ -0,0 +1,57 @@
+"""Benchmarks
+benchmarks for the template variable replacement
+"""
+
+import io
+
+import pytest
+
+# benchmarks are skipped if pytest-benchmark is not installed
+pytest.importorskip('pytest_benchmark')
+
+from page_generator.app.page_manager import PageManager
+from page_generator.utils.file_utils import MappedTemplateFile
+
+from bench_inputs import build_config, build_template
+
+TEMPLATE_SIZES_KB = [16, 1024]
+VARIABLE_COUNTS = [10, 200]
+
+
+@pytest.mark.parametrize('var_count', VARIABLE_COUNTS)
+@pytest.mark.parametrize('size_kb', TEMPLATE_SIZES_KB)
+def test_replace_variables_in_template(benchmark, write_file, size_kb, var_count):
+    """PageManager._replace_variables_in_template over an in-memory template
+    """
+    benchmark.group = 'replace-variables-{0}kb'.format(size_kb)
+    template = build_template(size_kb, var_count)
+    source = write_file('template.html', template)
+    page_manager = PageManager(write_file('config.json', build_config(source, var_count)))
+
+    def replace_variables():
+        page_manager._html_template = template
+        page_manager._replace_variables_in_template()
+        return page_manager._html_template
+
+    rendered = benchmark(replace_variables)
+    assert '$Variable' not in rendered
+
+
+@pytest.mark.parametrize('var_count', VARIABLE_COUNTS)
+@pytest.mark.parametrize('size_kb', TEMPLATE_SIZES_KB)
+def test_mapped_template_render(benchmark, write_file, size_kb, var_count):
+    """MappedTemplateFile.render_to from a template file into a buffer
+    """
+    benchmark.group = 'replace-variables-{0}kb'.format(size_kb)
+    source = write_file('template.html', build_template(size_kb, var_count))
+    variables = build_config(source, var_count)
+    variables = dict((key, value) for key, value in variables.items() if key.startswith('$'))
+
+    def render():
+        with MappedTemplateFile(source) as template:
+            output = io.BytesIO()
+            template.render_to(output, variables)
+            return output
+
+    rendered = benchmark(render)
+    assert b'$Variable' not in rendered.getvalue()
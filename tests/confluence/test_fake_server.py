@@ -0,0 +1,77 @@
+"""Unit test
+unit test for the fake_server.py - FakeConfluenceServer instance
+driven end-to-end through PageManager
+"""
+
+import os
+import pytest
+
+from page_generator.app.load_harness import run_load_test
+from page_generator.app.page_manager import PageManager
+from page_generator.confluence.fake_server import FakeConfluenceServer
+
+
+def get_resources_path():
+    """Returns the path in which resources are located
+    by taking this file as the reference
+    """
+    rel_resources_path = '../_resources'
+    # build the path taking this file as reference
+    path = os.path.normpath(os.path.join(os.path.dirname(__file__), rel_resources_path))
+    return path
+
+
+def test_good_input(write_config):
+    """These tests should pass
+    """
+    with FakeConfluenceServer(credentials=('my_user', 'my_pass')) as server:
+        parent = server.add_page('Parent', 'TEST', '<p>parent</p>')
+        template = server.add_page('Template', 'TEST', '<p>$FixVersion</p>')
+
+        # local template file streamed into the new page
+        page_manager = PageManager(write_config(
+            server, get_resources_path() + '/template.html', parent['id']))
+        page = page_manager.generate_page()
+        stored = server.get_page(page.id_number)
+        assert stored['parent_page_id'] == parent['id']
+        assert '<td>1.2.3</td>' in stored['body']
+        assert server.stats['endpoints'] == {'auth': 1, 'POST content': 1}
+
+        # remote template retrieved by title URL
+        source = '{0}/display/TEST/Template'.format(server.url)
+        page_manager = PageManager(write_config(
+            server, source, parent['id'], title='Other Page'))
+        page = page_manager.generate_page()
+        assert server.find_page('Other Page', 'TEST')['body'] == '<p>1.2.3</p>'
+        assert page.title == 'Other Page'
+        assert template['id'] != page.id_number
+
+    report = run_load_test(pages=10, concurrency=2)
+    assert report['created'] == 10
+    assert report['requests_per_page'] == 2.0
+    assert report['latency_p50'] <= report['latency_p99']
+
+
+def test_bad_input(write_config):
+    """These tests should passed with invalid arguments
+    """
+    with FakeConfluenceServer(credentials=('my_user', 'other_pass')) as server:
+        page_manager = PageManager(write_config(
+            server, get_resources_path() + '/template.html', '1'))
+        # wrong credentials
+        with pytest.raises(AssertionError):
+            page_manager.generate_page()
+
+    with FakeConfluenceServer() as server:
+        parent = server.add_page('Parent', 'TEST', '<p>parent</p>')
+        page_manager = PageManager(write_config(
+            server, get_resources_path() + '/template.html', parent['id']))
+        # injected permission error
+        server.inject_error(403, method='POST')
+        with pytest.raises(AssertionError):
+            page_manager.generate_page()
+        assert server.stats['status_codes'][403] == 1
+        assert not server.find_page('Generated Page', 'TEST')
+
+    with pytest.raises(ValueError):
+        FakeConfluenceServer(error_rates={418: 1.0})
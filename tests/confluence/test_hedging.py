@@ -0,0 +1,69 @@
+"""Unit test
+unit test for the hedging.py - HedgePolicy instance and the hedged
+reads of ConfluenceClient, driven against the fake confluence server
+"""
+
+import time
+
+import pytest
+
+from page_generator.confluence import exceptions
+from page_generator.confluence.api import ConfluenceClient
+from page_generator.confluence.fake_server import FakeConfluenceServer
+from page_generator.confluence.hedging import HedgePolicy
+from page_generator.confluence.retry import NO_RETRY
+from page_generator.utils.metrics_utils import ClientMetrics
+
+
+def test_good_input():
+    """These tests should pass
+    """
+    policy = HedgePolicy(percentile=0.9, initial_delay=0.5, min_delay=0.01,
+                         max_delay=1.0, min_samples=10)
+    assert policy.get_delay() == 0.5
+    for index in range(10):
+        policy.observe(0.1 * (index + 1))
+    assert policy.get_delay() == 1.0
+    policy.observe(0.001)
+    assert 0.9 <= policy.get_delay() <= 1.0
+
+    with FakeConfluenceServer() as server:
+        page = server.add_page('Page', 'TEST', '<p>1</p>')
+        metrics = ClientMetrics()
+        policy = HedgePolicy(initial_delay=0.05, min_delay=0.05)
+        with ConfluenceClient(server.url, 'user', 'pass', metrics=metrics,
+                              hedge_policy=policy) as client:
+            # fast reads are not hedged
+            assert client.get_content(page['id']).title == 'Page'
+            assert metrics.get_counter('hedges_fired') == 0
+
+            # slow node: the hedge answers first
+            server.inject_latency(2.0, method='GET')
+            start = time.time()
+            assert client.get_content(page['id']).title == 'Page'
+            assert time.time() - start < 1.0
+            assert metrics.get_counter('hedges_fired') == 1
+            assert metrics.get_counter('hedges_won') == 1
+
+            # writes are never hedged
+            server.inject_latency(0.2, method='POST')
+            client.create_page('New', 'TEST', '<p>new</p>', page['id'])
+            assert server.stats['endpoints']['POST content'] == 1
+            assert metrics.get_counter('hedges_fired') == 1
+
+
+def test_bad_input():
+    """These tests should passed with invalid arguments
+    """
+    with pytest.raises(ValueError):
+        HedgePolicy(percentile=1.5)
+
+    with FakeConfluenceServer() as server:
+        policy = HedgePolicy(initial_delay=0.05, min_delay=0.05)
+        with ConfluenceClient(server.url, 'user', 'pass', retry_policy=NO_RETRY,
+                              hedge_policy=policy) as client:
+            # errors are raised once both requests failed
+            server.inject_latency(0.2, method='GET')
+            with pytest.raises(exceptions.ConfluenceResourceNotFound):
+                client.get_content('1')
+            assert server.stats['endpoints']['GET content/{id}'] == 2
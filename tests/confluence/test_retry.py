@@ -0,0 +1,83 @@
+"""Unit test
+unit test for the retry.py - RetryPolicy instance and the typed
+errors raised by ConfluenceClient, driven against the fake confluence server
+"""
+
+import pytest
+import requests
+
+from page_generator.confluence import exceptions
+from page_generator.confluence.api import ConfluenceClient
+from page_generator.confluence.fake_server import FakeConfluenceServer
+from page_generator.confluence.retry import RetryPolicy, parse_retry_after
+from page_generator.utils.metrics_utils import ClientMetrics
+
+
+def test_good_input():
+    """These tests should pass
+    """
+    assert parse_retry_after('2') == 2.0
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+    policy = RetryPolicy(base_delay=1.0, max_delay=3.0, seed=1)
+    assert all(0 <= policy.get_delay(None, attempt) <= min(3.0, 2 ** (attempt - 1))
+               for attempt in range(1, 6))
+
+    with FakeConfluenceServer() as server:
+        page = server.add_page('Page', 'TEST', '<p>1</p>')
+        metrics = ClientMetrics()
+        # Retry-After of the fake server (1s) is capped by max_delay
+        policy = RetryPolicy(max_attempts=3, base_delay=0.01, max_delay=0.01)
+        with ConfluenceClient(server.url, 'user', 'pass', metrics=metrics,
+                              retry_policy=policy) as client:
+            # transient errors are retried
+            server.inject_error(503, count=2, method='GET')
+            assert client.get_content(page['id']).title == 'Page'
+            assert metrics.get_counter('retries') == 2
+
+            # rate limited creation was not processed: retried without duplicates
+            server.inject_error(429, method='POST')
+            client.create_page('New', 'TEST', '<p>new</p>', page['id'])
+            assert server.stats['endpoints']['POST content'] == 2
+            assert server.find_page('New', 'TEST')
+
+
+def test_bad_input():
+    """These tests should passed with invalid arguments
+    """
+    with pytest.raises(ValueError):
+        RetryPolicy(max_attempts=0)
+    assert parse_retry_after('soon') is None
+
+    with FakeConfluenceServer() as server:
+        page = server.add_page('Page', 'TEST', '<p>1</p>')
+        policy = RetryPolicy(max_attempts=3, base_delay=0.01, max_delay=0.01)
+        with ConfluenceClient(server.url, 'user', 'pass', retry_policy=policy) as client:
+            # permanent errors fail on the first attempt
+            with pytest.raises(exceptions.ConfluenceResourceNotFound):
+                client.get_content('1')
+            server.inject_error(409, method='PUT')
+            with pytest.raises(exceptions.ConfluenceVersionConflict):
+                client.update_page(page['id'], 'Page', 'TEST', '<p>2</p>', 2)
+            server.inject_error(413, method='POST')
+            with pytest.raises(exceptions.ConfluenceValueTooLong):
+                client.create_page('Big', 'TEST', '<p>big</p>')
+            assert server.stats['requests'] == 3
+
+            # a server error on a creation may have been processed: not retried
+            server.inject_error(500, method='POST')
+            with pytest.raises(exceptions.ConfluenceServerError):
+                client.create_page('Other', 'TEST', '<p>other</p>')
+            # transient errors fail once the attempts are exhausted
+            server.inject_error(429, count=3, method='GET')
+            with pytest.raises(exceptions.ConfluenceRateLimited) as error_info:
+                client.get_content(page['id'])
+            assert error_info.value.retry_after == 1.0
+            assert server.stats['requests'] == 7
+
+    # error bodies that are not json
+    response = requests.Response()
+    response.status_code = 400
+    response._content = b'<html>Bad request</html>'
+    with pytest.raises(exceptions.ConfluenceError) as error_info:
+        ConfluenceClient._handle_response_errors('content', {}, response)
+    assert '<html>Bad request</html> (code:400)' in str(error_info.value)
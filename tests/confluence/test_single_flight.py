@@ -0,0 +1,118 @@
+"""Unit test
+unit test for the single_flight.py - SingleFlight instance and the
+coalesced reads of ConfluenceClient, driven against the fake confluence server
+"""
+
+import contextlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from page_generator.confluence import exceptions
+from page_generator.confluence.api import ConfluenceClient
+from page_generator.confluence.fake_server import FakeConfluenceServer
+from page_generator.confluence.single_flight import SingleFlight
+from page_generator.utils import deadline_utils
+from page_generator.utils.metrics_utils import ClientMetrics
+
+
+def run_concurrently(function, arguments):
+    """Runs the function once per argument, all of them at the same time
+    """
+    barrier = threading.Barrier(len(arguments))
+
+    def run(argument):
+        barrier.wait()
+        return function(argument)
+
+    with ThreadPoolExecutor(max_workers=len(arguments)) as executor:
+        futures = [executor.submit(run, argument) for argument in arguments]
+    return futures
+
+
+def test_good_input():
+    """These tests should pass
+    """
+    assert SingleFlight().do('key', lambda: 1) == (1, False)
+
+    with FakeConfluenceServer(latency=0.2) as server:
+        template = server.add_page('Template', 'TEST', '<p>$FixVersion</p>')
+        other = server.add_page('Other', 'TEST', '<p>other</p>')
+        metrics = ClientMetrics()
+        with ConfluenceClient(server.url, 'user', 'pass', metrics=metrics) as client:
+            # 8 jobs reading the same template: a single request
+            futures = run_concurrently(client.get_content, [template['id']] * 8)
+            assert all(future.result().title == 'Template' for future in futures)
+            assert server.stats['endpoints']['GET content/{id}'] == 1
+            assert metrics.get_counter('reads_coalesced') == 7
+            # every caller gets its own copy of the result
+            assert len(set(id(future.result().json_data_model) for future in futures)) == 8
+
+            # requests scale with the distinct resources
+            futures = run_concurrently(
+                lambda title: client.get_page_from_title(title, 'TEST'),
+                ['Template', 'Other'] * 4)
+            assert [future.result().id_number for future in futures[:2]] == \
+                [template['id'], other['id']]
+            assert server.stats['endpoints']['GET content'] == 2
+
+        # clients of the same host and credentials share the reads in flight
+        # (ex. the CLI opens a client per operation), other credentials do not
+        server.reset_stats()
+        with contextlib.ExitStack() as stack:
+            clients = [stack.enter_context(ConfluenceClient(server.url, user, password))
+                       for user, password in [('user', 'pass')] * 4 +
+                       [('other_user', 'pass'), ('user', 'other_pass')]]
+            futures = run_concurrently(lambda client: client.get_content(other['id']), clients)
+            assert all(future.result().title == 'Other' for future in futures)
+            assert server.stats['endpoints']['GET content/{id}'] == 3
+
+        # coalescing can be disabled
+        server.reset_stats()
+        with ConfluenceClient(server.url, 'user', 'pass', coalesce_reads=False) as client:
+            run_concurrently(client.get_content, [template['id']] * 3)
+            assert server.stats['endpoints']['GET content/{id}'] == 3
+
+
+def test_bad_input():
+    """These tests should passed with invalid arguments
+    """
+    with FakeConfluenceServer(latency=0.2) as server:
+        with ConfluenceClient(server.url, 'user', 'pass') as client:
+            # errors are shared too
+            futures = run_concurrently(client.get_content, ['1'] * 4)
+            for future in futures:
+                with pytest.raises(exceptions.ConfluenceResourceNotFound):
+                    future.result()
+            assert server.stats['endpoints']['GET content/{id}'] == 1
+
+    # a wrong password never gets the response of the right one
+    with FakeConfluenceServer(latency=0.2, credentials=('user', 'pass')) as server:
+        page = server.add_page('Page', 'TEST', '<p>page</p>')
+        with contextlib.ExitStack() as stack:
+            clients = [stack.enter_context(ConfluenceClient(server.url, 'user', password))
+                       for password in ['wrong', 'pass']]
+            futures = run_concurrently(lambda client: client.get_content(page['id']), clients)
+            with pytest.raises(exceptions.ConfluenceError):
+                futures[0].result()
+            assert futures[1].result().title == 'Page'
+
+    # the deadline of the job of the first caller does not fail the waiting callers
+    with FakeConfluenceServer(latency=0.5) as server:
+        page = server.add_page('Page', 'TEST', '<p>page</p>')
+        with ConfluenceClient(server.url, 'user', 'pass') as client:
+
+            def get_with_deadline(page_id):
+                with deadline_utils.deadline(0.2):
+                    return client.get_content(page_id)
+
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                first = executor.submit(get_with_deadline, page['id'])
+                time.sleep(0.05)
+                waiting = executor.submit(client.get_content, page['id'])
+                with pytest.raises(Exception):
+                    first.result()
+                assert waiting.result().title == 'Page'
+            assert server.stats['endpoints']['GET content/{id}'] == 2
@@ -0,0 +1,55 @@
+"""Unit test
+Fixtures shared by the unit tests
+
+The micro-benchmarks of tests/benchmarks are slow, they are skipped
+unless the tests run with '--run-benchmarks'
+"""
+
+import json
+import os
+
+import pytest
+
+BENCHMARKS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks')
+
+
+def pytest_addoption(parser):
+    """Adds the option that runs the micro-benchmarks
+    """
+    parser.addoption('--run-benchmarks', action='store_true', default=False,
+                     help='run the micro-benchmarks of tests/benchmarks')
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skips the micro-benchmarks unless '--run-benchmarks' is given
+    """
+    if config.getoption('--run-benchmarks'):
+        return
+    skip_benchmark = pytest.mark.skip(reason='benchmarks run with --run-benchmarks')
+    for item in items:
+        if os.path.abspath(str(item.fspath)).startswith(BENCHMARKS_DIR + os.sep):
+            item.add_marker(skip_benchmark)
+
+
+@pytest.fixture
+def write_config(tmp_path):
+    """Returns a function that writes a PageManager config file
+    pointing to the fake server and returns its path
+    """
+    def _write_config(server, source, parent_page_id, title='Generated Page', variables=None,
+                      space_key='TEST', file_name='config.json'):
+        config = {
+            'host_url': server.url,
+            'user': 'my_user',
+            'pass': 'my_pass',
+            'source': source,
+            'space_key': space_key,
+            'parent_page_id': parent_page_id,
+            'page_title': title
+        }
+        config.update({'$FixVersion': '1.2.3'} if variables is None else variables)
+        config_file = str(tmp_path / file_name)
+        with open(config_file, 'w') as file_obj:
+            json.dump(config, file_obj)
+        return config_file
+    return _write_config
@@ -0,0 +1,88 @@
+"""Unit test
+unit test for the deadline_utils.py - Deadline instance and job deadlines
+driven against the fake confluence server
+"""
+
+import json
+import time
+
+import pytest
+import requests
+
+from page_generator.app.job_queue import JobQueue
+from page_generator.confluence.api import ConfluenceClient
+from page_generator.confluence.fake_server import FakeConfluenceServer
+from page_generator.utils import deadline_utils
+from page_generator.utils import http_utils
+
+
+def test_good_input(tmp_path):
+    """These tests should pass
+    """
+    assert deadline_utils.get_deadline() is None
+    assert http_utils.get_request_timeout() == http_utils.get_default_timeout()
+    with deadline_utils.deadline(5) as outer_deadline:
+        assert 4 < outer_deadline.remaining() <= 5
+        connect_timeout, read_timeout = http_utils.get_request_timeout((10, 60))
+        assert connect_timeout <= 5 and read_timeout <= 5
+        # the earliest deadline is kept
+        with deadline_utils.deadline(60) as inner_deadline:
+            assert inner_deadline is outer_deadline
+        with deadline_utils.deadline(1) as inner_deadline:
+            assert deadline_utils.get_deadline() is inner_deadline
+        assert deadline_utils.get_deadline() is outer_deadline
+    assert deadline_utils.get_deadline() is None
+    with deadline_utils.deadline(None) as no_deadline:
+        assert no_deadline is None
+        deadline_utils.check('anything')
+
+    # slow jobs are cancelled and scheduled again until they succeed
+    with FakeConfluenceServer(latency=0.3) as server:
+        parent = server.add_page('Parent', 'TEST', '<p>parent</p>')
+        server.add_page('Template', 'TEST', '<p>$FixVersion</p>')
+        config_file = str(tmp_path / 'config.json')
+        with open(config_file, 'w') as file_obj:
+            json.dump({
+                'host_url': server.url,
+                'user': 'my_user',
+                'pass': 'my_pass',
+                'source': '{0}/display/TEST/Template'.format(server.url),
+                'space_key': 'TEST',
+                'parent_page_id': parent['id'],
+                'page_title': 'Page',
+                '$FixVersion': '1.2.3'
+            }, file_obj)
+        with JobQueue(str(tmp_path / 'queue.db'), max_attempts=2,
+                      retry_delay=0.01) as job_queue:
+            job_queue.add([config_file])
+            start = time.time()
+            assert job_queue.run(job_timeout=0.1)['failed'] == 1
+            assert time.time() - start < 2
+            assert job_queue.get_jobs('failed')[0].attempts == 2
+            server.latency = 0
+            job_queue.recover()
+            assert job_queue.run(job_timeout=5)['done'] == 1
+
+
+def test_bad_input():
+    """These tests should passed with invalid arguments
+    """
+    with deadline_utils.deadline(0.01):
+        time.sleep(0.02)
+        with pytest.raises(deadline_utils.DeadlineExceeded):
+            deadline_utils.check('create_page')
+        with pytest.raises(deadline_utils.DeadlineExceeded):
+            http_utils.get_request_timeout()
+
+    with FakeConfluenceServer(latency=0.5) as server:
+        page = server.add_page('Page', 'TEST', '<p>1</p>')
+        with ConfluenceClient(server.url, 'user', 'pass') as client:
+            # a stuck request does not outlive the deadline of its job
+            start = time.time()
+            with deadline_utils.deadline(0.2):
+                with pytest.raises(deadline_utils.DeadlineExceeded):
+                    client.get_content(page['id'])
+            assert time.time() - start < 0.5
+        # timeouts without deadline
+        with pytest.raises(requests.Timeout):
+            http_utils.Auth.authenticate(server.url, 'user', 'pass', timeout=(1, 0.1))
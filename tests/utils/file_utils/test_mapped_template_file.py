@@ -0,0 +1,57 @@
+"""Unit test
+unit test for the file_utils.py - MappedTemplateFile instance
+"""
+
+import io
+import os
+import pytest
+
+from page_generator.utils.file_utils import MappedTemplateFile
+
+
+def get_resources_path():
+    """Returns the path in which resources are located
+    by taking this file as the reference
+    """
+    rel_resources_path = '../../_resources'
+    # build the path taking this file as reference
+    path = os.path.normpath(os.path.join(os.path.dirname(__file__), rel_resources_path))
+    return path
+
+
+def test_good_input():
+    """These tests should pass
+    """
+    template_file = get_resources_path() + '/template.html'
+    variables = {'$FixVersion': '1.2.3', '$TotalPr': '42'}
+    with open(template_file, 'rb') as file_obj:
+        expected = file_obj.read().decode('utf-8')
+    for name, value in variables.items():
+        expected = expected.replace(name, value)
+
+    # rendering in small chunks gives the same result as str.replace
+    with MappedTemplateFile(template_file, chunk_size=7) as template:
+        output = io.BytesIO()
+        written = template.render_to(output, variables)
+        assert output.getvalue().decode('utf-8') == expected
+        assert written == len(output.getvalue())
+        assert template.found_variables == set(variables)
+        assert max(len(chunk) for chunk in template.iter_chunks({})) <= 7
+        assert template.find_variables(dict(variables, **{'$NotUsed': ''})) == set(variables)
+
+    # longer variable names take precedence over their prefixes
+    with MappedTemplateFile(template_file) as template:
+        rendered = b''.join(template.iter_chunks({'$Total': 'X', '$TotalPr': 'Y'}))
+        assert b'<td>Y</td>' in rendered
+
+    # empty files can not be mapped but are rendered as empty content
+    with MappedTemplateFile(get_resources_path() + '/empty.txt') as template:
+        assert template.size == 0
+        assert b''.join(template.iter_chunks({'$Var': 'value'})) == b''
+
+
+def test_bad_input():
+    """These tests should passed with invalid arguments
+    """
+    with pytest.raises(IOError):
+        MappedTemplateFile('path/not_existing.html')
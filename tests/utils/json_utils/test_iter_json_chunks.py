@@ -0,0 +1,27 @@
+"""
+Unit test for the json_utils.py - iter_json_chunks function
+"""
+
+import json
+
+from page_generator.utils.json_utils import iter_json_chunks
+
+
+def test_good_input():
+    """these tests should pass
+    """
+    value = u'<p>héllo "quoted" €</p>\n<p>\\end</p>'
+    envelope = {'title': 'page', 'body': {'storage': {'value': None}}}
+
+    # utf-8 characters split across byte chunks are decoded correctly
+    encoded = value.encode('utf-8')
+    byte_chunks = [encoded[i:i + 3] for i in range(0, len(encoded), 3)]
+    body = b''.join(iter_json_chunks(envelope, ['body', 'storage', 'value'], byte_chunks))
+    assert json.loads(body.decode('utf-8')) == {
+        'title': 'page', 'body': {'storage': {'value': value}}}
+
+    # str chunks and an empty stream are supported too
+    body = b''.join(iter_json_chunks({'value': None}, ['value'], [value[:5], value[5:]]))
+    assert json.loads(body.decode('utf-8'))['value'] == value
+    body = b''.join(iter_json_chunks({'value': None}, ['value'], []))
+    assert json.loads(body.decode('utf-8'))['value'] == ''
@@ -0,0 +1,58 @@
+"""Unit test
+unit test for the logger_utils.py - queue logging and Logger handlers
+"""
+
+import logging
+import logging.handlers
+
+from page_generator.utils import logger_utils
+
+
+def test_good_input(tmp_path):
+    """These tests should pass
+    """
+    log_file = str(tmp_path / 'queue.log')
+    test_logger = logging.getLogger('test_queue_logging')
+    test_logger.setLevel(logging.DEBUG)
+    file_handler = logger_utils.create_file_handler(log_file, max_bytes=200, backup_count=2)
+    file_handler.setFormatter(logging.Formatter('%(message)s'))
+    assert isinstance(file_handler, logging.handlers.RotatingFileHandler)
+
+    listener = logger_utils.start_queue_logging(test_logger, [file_handler])
+    assert len(test_logger.handlers) == 1
+    assert isinstance(test_logger.handlers[0], logging.handlers.QueueHandler)
+    for index in range(20):
+        test_logger.info("record number %d", index)
+    listener.stop()
+    # stopped again at exit: nothing to do
+    listener.stop()
+    test_logger.handlers = []
+    file_handler.close()
+
+    # records were written by the listener thread and the file rotated
+    with open(log_file) as file_obj:
+        assert file_obj.read().splitlines()[-1] == 'record number 19'
+    assert (tmp_path / 'queue.log.1').exists()
+
+    # handlers are added once per logger name
+    first = logger_utils.Logger('test_logger_handlers', log_file_name=log_file)
+    second = logger_utils.Logger('test_logger_handlers', log_file_name=log_file)
+    assert len(logging.getLogger('test_logger_handlers').handlers) == 2
+    assert first._listener is None
+    # the second instance configures the handlers of the first one
+    assert second._ch_handler is first._ch_handler
+    second.set_logging_level('error')
+    assert first._ch_handler.level == logging.ERROR
+    # the standard logger is not tagged with private attributes
+    assert not hasattr(logging.getLogger('test_logger_handlers'), '_page_generator_handlers')
+
+
+def test_bad_input(tmp_path):
+    """These tests should passed with invalid arguments
+    """
+    # no rotation when the maximum size is not set
+    file_handler = logger_utils.create_file_handler(str(tmp_path / 'plain.log'))
+    assert not isinstance(file_handler, logging.handlers.RotatingFileHandler)
+    # file is not created until the first record
+    assert not (tmp_path / 'plain.log').exists()
+    file_handler.close()
@@ -0,0 +1,55 @@
+"""Unit test
+unit test for the metrics_utils.py - ClientMetrics instance
+collected from ConfluenceClient requests
+"""
+
+import json
+
+from page_generator.confluence.api import ConfluenceClient
+from page_generator.confluence.fake_server import FakeConfluenceServer
+from page_generator.utils.metrics_utils import ClientMetrics, normalize_endpoint
+
+
+def test_good_input(tmp_path):
+    """These tests should pass
+    """
+    assert normalize_endpoint('content/102948555/child/page') == 'content/{id}/child/page'
+    assert normalize_endpoint('content') == 'content'
+
+    metrics = ClientMetrics()
+    with FakeConfluenceServer() as server:
+        parent = server.add_page('Parent', 'TEST', '<p>parent</p>')
+        with ConfluenceClient(server.url, 'user', 'pass', metrics=metrics) as client:
+            page = client.create_page('Page', 'TEST', '<p>content</p>', parent['id'])
+            client.create_page_from_chunks('Streamed', 'TEST', [b'<p>', b'x</p>'], parent['id'])
+            client.get_content(page.id_number)
+            client.get_content(parent['id'])
+            server.inject_error(403, method='DELETE')
+            try:
+                client.delete_content(page.id_number)
+            except Exception:
+                pass
+
+    data = metrics.to_dict()
+    assert data['requests'] == 5
+    endpoints = dict(((item['method'], item['endpoint']), item) for item in data['endpoints'])
+    assert endpoints[('GET', 'content/{id}')]['latency_seconds']['count'] == 2
+    assert endpoints[('DELETE', 'content/{id}')]['status_codes'] == {'403': 1}
+    assert endpoints[('POST', 'content')]['bytes_sent'] > 0
+    assert data['bytes_received'] == server.stats['bytes_sent']
+    assert data['bytes_sent'] == server.stats['bytes_received']
+    # a single connection is reused by the client session
+    assert data['counters'] == {'connections_opened': 1, 'connections_reused': 4}
+
+    # exported formats
+    json_file = str(tmp_path / 'metrics.json')
+    prom_file = str(tmp_path / 'metrics.prom')
+    metrics.write(json_file)
+    metrics.write(prom_file)
+    with open(json_file) as file_obj:
+        assert json.load(file_obj)['requests'] == 5
+    with open(prom_file) as file_obj:
+        prometheus = file_obj.read()
+    assert 'page_generator_http_request_duration_seconds_count' \
+           '{method="GET",endpoint="content/{id}"} 2' in prometheus
+    assert 'le="+Inf"' in prometheus
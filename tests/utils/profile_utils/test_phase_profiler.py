@@ -0,0 +1,98 @@
+"""Unit test
+unit test for the profile_utils.py - PhaseProfiler instance
+"""
+
+import os
+import pstats
+import subprocess
+import sys
+
+import pytest
+
+from page_generator.confluence.fake_server import FakeConfluenceServer
+from page_generator.utils import trace_utils
+from page_generator.utils.profile_utils import PhaseProfiler
+
+
+def get_resources_path():
+    """Returns the path in which resources are located
+    by taking this file as the reference
+    """
+    rel_resources_path = '../../_resources'
+    # build the path taking this file as reference
+    path = os.path.normpath(os.path.join(os.path.dirname(__file__), rel_resources_path))
+    return path
+
+
+@trace_utils.traced('load_phase')
+def load_phase(size):
+    """Function recorded as a phase when profiling
+    """
+    return [0] * size
+
+
+def test_good_input(tmp_path, write_config):
+    """These tests should pass
+    """
+    tracer = trace_utils.Tracer()
+    profiler = PhaseProfiler(tracer=tracer)
+    trace_utils.set_tracer(profiler)
+    try:
+        with profiler:
+            with profiler.span('page', title='My Page'):
+                load_phase(100000)
+                load_phase(10)
+    finally:
+        trace_utils.set_tracer(None)
+
+    # phases with the same name are aggregated, nested phases get their own peak
+    assert list(profiler.phases) == ['load_phase', 'page']
+    assert profiler.phases['load_phase']['calls'] == 2
+    assert profiler.phases['page']['calls'] == 1
+    assert profiler.phases['page']['peak_bytes'] >= profiler.phases['load_phase']['peak_bytes']
+    assert profiler.phases['load_phase']['peak_bytes'] >= 100000 * 8
+    # the spans are also recorded by the tracer
+    assert [event['name'] for event in tracer.events] == ['load_phase', 'load_phase', 'page']
+
+    table = profiler.format_phases().splitlines()
+    assert table[0].split() == ['phase', 'calls', 'wall', '(s)', 'peak', 'mem', '(KiB)']
+    assert [line.split()[:2] for line in table[1:]] == [
+        ['load_phase', '2'], ['page', '1'], ['total', '1']]
+
+    report_file = str(tmp_path / 'profile.txt')
+    raw_profile_file = str(tmp_path / 'profile.prof')
+    profiler.write_report(report_file, raw_profile_file)
+    with open(report_file) as file_obj:
+        report = file_obj.read()
+    assert report.startswith(profiler.format_phases())
+    assert 'load_phase' in report
+    stats = pstats.Stats(raw_profile_file)
+    assert any(function[2] == 'load_phase' for function in stats.stats)
+
+    # offline modes are profiled too
+    with FakeConfluenceServer() as server:
+        config_file = write_config(server, get_resources_path() + '/template.html', '1')
+    result = subprocess.run(
+        [sys.executable, '-m', 'page_generator.page_generator_tool', '-c', config_file,
+         '--validate_config', '--profile', str(tmp_path / 'validate')],
+        cwd=str(tmp_path), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    assert result.returncode == 0, result.stderr
+    assert b'load_config_file' in result.stdout
+    assert os.path.getsize(str(tmp_path / 'validate.txt'))
+    assert pstats.Stats(str(tmp_path / 'validate.prof')).total_calls
+
+
+def test_bad_input(tmp_path):
+    """These tests should passed with invalid arguments
+    """
+    profiler = PhaseProfiler()
+    with pytest.raises(ValueError):
+        with profiler:
+            with profiler.span('failed_phase'):
+                raise ValueError('phase failed')
+    # failed phases are measured too
+    assert profiler.phases['failed_phase']['calls'] == 1
+    # reports can not be written into missing directories
+    with pytest.raises(IOError):
+        profiler.write_report(str(tmp_path / 'missing' / 'profile.txt'),
+                              str(tmp_path / 'missing' / 'profile.prof'))
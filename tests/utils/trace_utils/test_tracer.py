@@ -0,0 +1,60 @@
+"""Unit test
+unit test for the trace_utils.py - Tracer instance
+"""
+
+import json
+import pytest
+
+from page_generator.utils import trace_utils
+
+
+@trace_utils.traced('traced_function')
+def traced_function(value):
+    """Function recorded as a span when tracing is enabled
+    """
+    if value is None:
+        raise ValueError('no value')
+    return value
+
+
+def test_good_input(tmp_path):
+    """These tests should pass
+    """
+    # tracing disabled by default
+    assert not trace_utils.get_tracer().enabled
+    assert traced_function(1) == 1
+
+    tracer = trace_utils.Tracer()
+    trace_utils.set_tracer(tracer)
+    try:
+        with tracer.span('page', title='My Page'):
+            assert traced_function(2) == 2
+    finally:
+        trace_utils.set_tracer(None)
+
+    child, root = tracer.events
+    assert (root['name'], child['name']) == ('page', 'traced_function')
+    assert root['args'] == {'title': 'My Page'}
+    # child span is nested inside the root span of the same thread
+    assert root['ts'] <= child['ts']
+    assert child['ts'] + child['dur'] <= root['ts'] + root['dur']
+    assert root['tid'] == child['tid']
+
+    trace_file = str(tmp_path / 'trace.json')
+    tracer.write(trace_file)
+    with open(trace_file) as file_obj:
+        events = json.load(file_obj)['traceEvents']
+    assert [event['ph'] for event in events] == ['M', 'X', 'X']
+
+
+def test_bad_input():
+    """These tests should passed with invalid arguments
+    """
+    tracer = trace_utils.Tracer()
+    trace_utils.set_tracer(tracer)
+    try:
+        with pytest.raises(ValueError):
+            traced_function(None)
+    finally:
+        trace_utils.set_tracer(None)
+    assert 'ValueError' in tracer.events[0]['args']['error']
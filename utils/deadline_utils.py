@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module with deadline budgets: a job gets a maximum duration and every
+blocking step done for it (template fetch, page lookup, page creation,
+retries) is bounded by the time left
+"""
+
+import contextlib
+import threading
+import time
+
+
+class DeadlineExceeded(Exception):
+    """Raised when an operation is started (or would wait)
+    after the deadline of its job
+    """
+
+
+class Deadline(object):
+    """Point in time by which a job should be finished.
+    Usage:
+
+    deadline = Deadline(30)
+    deadline.check('create_page')
+    requests.get(url, timeout=deadline.get_timeout((10, 60)))
+    """
+
+    def __init__(self, seconds):
+        # type: (float) -> Deadline
+        """Constructor method
+
+        :param seconds: budget of the job in seconds from now
+        """
+        self.seconds = seconds
+        self._expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        # type: () -> float
+        """Returns the seconds left (0 if the deadline passed)
+        """
+        return max(0.0, self._expires_at - time.monotonic())
+
+    @property
+    def expired(self):
+        # type: () -> bool
+        return self.remaining() <= 0
+
+    def check(self, operation):
+        # type: (str) -> None
+        """Raises DeadlineExceeded if the deadline passed
+
+        :param operation: name of the operation about to start (for the message)
+        """
+        if self.expired:
+            raise DeadlineExceeded("Deadline of {0:.1f} s exceeded before {1}".format(
+                self.seconds, operation))
+
+    def get_timeout(self, timeout):
+        # type: (tuple) -> tuple
+        """Returns a requests timeout (connect, read) bounded by the time left
+
+        :param timeout: configured (connect, read) timeout in seconds
+        """
+        remaining = self.remaining()
+        return tuple(remaining if value is None else min(value, remaining)
+                     for value in timeout)
+
+
+_LOCAL = threading.local()
+
+
+def get_deadline():
+    # type: () -> Deadline
+    """Returns the deadline of the job running in the current thread,
+    None if it has no deadline
+    """
+    return getattr(_LOCAL, 'deadline', None)
+
+
+@contextlib.contextmanager
+def deadline(seconds):
+    # type: (float) -> contextlib.AbstractContextManager
+    """Context manager that sets the deadline of the job running in
+    the current thread. Deadlines can be nested, the earliest one is used.
+
+    :param seconds: budget in seconds, if None the job has no deadline
+    """
+    previous_deadline = get_deadline()
+    if seconds is None or (previous_deadline is not None and
+                           previous_deadline.remaining() <= seconds):
+        yield previous_deadline
+        return
+    _LOCAL.deadline = Deadline(seconds)
+    try:
+        yield _LOCAL.deadline
+    finally:
+        _LOCAL.deadline = previous_deadline
+
+
+@contextlib.contextmanager
+def use_deadline(current_deadline):
+    # type: ([Deadline]) -> contextlib.AbstractContextManager
+    """Context manager that sets a given deadline in the current thread
+    (ex. the deadline of a job in a worker thread that runs part of it)
+
+    :param current_deadline: Deadline instance, None for no deadline
+    """
+    previous_deadline = get_deadline()
+    _LOCAL.deadline = current_deadline
+    try:
+        yield current_deadline
+    finally:
+        _LOCAL.deadline = previous_deadline
+
+
+def check(operation):
+    # type: (str) -> None
+    """Raises DeadlineExceeded if the deadline of the current job passed
+    (does nothing if the job has no deadline)
+
+    :param operation: name of the operation about to start (for the message)
+    """
+    current_deadline = get_deadline()
+    if current_deadline is not None:
+        current_deadline.check(operation)
@@ -6,6 +6,7 @@ Module for utilities needed for different kinds of files
 
 import os
 import re
+import mmap
 import collections
 
 
@@ -54,7 +55,7 @@ class ConfluenceHtmlTemplate(DataFile):
 
     def __init__(self, template_file):
         # type: (str) -> ConfluenceHtmlTemplate[object]
-        super(ConfluenceHtmlTemplate).__init__(template_file)
+        super(ConfluenceHtmlTemplate, self).__init__(template_file)
 
     def get_template_content(self):
         # type: () -> str
@@ -83,6 +84,197 @@ class ConfluenceHtmlTemplate(DataFile):
             )
 
 
+class MappedTemplateFile(object):
+    """
+    Template file backed by a read-only memory map.
+
+    The template content is never loaded into a Python string, it is
+    scanned in place and rendered segment by segment into an output
+    stream, so rendering a template needs roughly one copy of the
+    template (paged in by the OS) plus the output.
+
+    This instance should be used within 'with' statement.
+    Usage:
+
+    with MappedTemplateFile('template.html') as template:
+        template.render_to(output_file, {'$Var': 'value'})
+    """
+
+    # default size of the chunks written to the output
+    DEFAULT_CHUNK_SIZE = 64 * 1024
+    # encoding of the template file and rendered output
+    ENCODING = 'utf-8'
+
+    def __init__(self, template_file, chunk_size=DEFAULT_CHUNK_SIZE):
+        # type: (str, [int]) -> MappedTemplateFile[object]
+        """
+        MappedTemplateFile Constructor
+
+        :param template_file: file path of the html template
+        :param chunk_size: maximum size in bytes of every rendered chunk
+        """
+        if not os.path.exists(template_file):
+            raise IOError("File '{0}' does not exist".format(template_file))
+        self._file = template_file
+        self._chunk_size = chunk_size
+        self._file_obj = None
+        self._mmap = None
+        self._found_variables = set()
+
+    def __enter__(self):
+        # type: () -> MappedTemplateFile
+        """Opens the template file and maps it into memory
+        """
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Unmaps and closes the template file
+        """
+        self.close()
+
+    @property
+    def file_name(self):
+        # type: () -> str
+        """Returns the file path of the template
+        """
+        return self._file
+
+    @property
+    def size(self):
+        # type: () -> int
+        """Returns the size in bytes of the mapped template
+        """
+        if self._mmap is None:
+            return 0
+        return len(self._mmap)
+
+    def open(self):
+        # type: () -> None
+        """Maps the template file into memory.
+        Empty files can not be mapped, those are rendered as empty content.
+
+        :return: None
+        """
+        if self._file_obj is not None:
+            return
+        self._file_obj = open(self._file, 'rb')
+        if os.fstat(self._file_obj.fileno()).st_size > 0:
+            self._mmap = mmap.mmap(self._file_obj.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        # type: () -> None
+        """Releases the memory map and the file handler
+
+        :return: None
+        """
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file_obj is not None:
+            self._file_obj.close()
+            self._file_obj = None
+
+    @staticmethod
+    def _build_variables_pattern(variables):
+        # type: (dict) -> re.Pattern
+        """Builds a single regex matching any of the variable names.
+        Longer names are tried first so '$VarX' is not matched as '$Var'.
+
+        :param variables: dictionary with the template variables
+        :return: compiled bytes pattern
+        """
+        names = sorted(variables.keys(), key=len, reverse=True)
+        return re.compile(b'|'.join(
+            re.escape(name.encode(MappedTemplateFile.ENCODING)) for name in names))
+
+    @property
+    def found_variables(self):
+        # type: () -> set
+        """Returns the variable names replaced by the last rendering
+        """
+        return set(name.decode(MappedTemplateFile.ENCODING) for name in self._found_variables)
+
+    def find_variables(self, variables):
+        # type: (dict) -> set
+        """Returns the variable names that are referenced in the template
+
+        :param variables: dictionary with the template variables
+        :return: a set with the variable names found
+        """
+        if self._mmap is None or not variables:
+            return set()
+        pattern = self._build_variables_pattern(variables)
+        return set(match.group(0).decode(MappedTemplateFile.ENCODING)
+                   for match in pattern.finditer(self._mmap))
+
+    def contains(self, text):
+        # type: (str) -> bool
+        """Returns True if the text is found in the template
+
+        :param text: text to look for (ex. a directive marker)
+        """
+        if self._mmap is None:
+            return False
+        return self._mmap.find(text.encode(MappedTemplateFile.ENCODING)) != -1
+
+    def _iter_segment(self, start, end):
+        # type: (int, int) -> Iterator[bytes]
+        """Yields the template bytes between start and end in chunks
+        """
+        while start < end:
+            chunk_end = min(start + self._chunk_size, end)
+            yield self._mmap[start:chunk_end]
+            start = chunk_end
+
+    def iter_chunks(self, variables):
+        # type: (dict) -> Iterator[bytes]
+        """Renders the template replacing the variables in a single pass
+        over the mapped file and yields the output in byte chunks
+
+        :param variables: dictionary with the template variables
+            $VarName = value
+        :return: generator of encoded chunks of the rendered template
+        """
+        if self._mmap is None:
+            self.open()
+            if self._mmap is None:
+                return
+        found_variables = self._found_variables = set()
+        if not variables:
+            for chunk in self._iter_segment(0, len(self._mmap)):
+                yield chunk
+            return
+        encoded_values = dict(
+            (name.encode(MappedTemplateFile.ENCODING),
+             value.encode(MappedTemplateFile.ENCODING))
+            for name, value in variables.items())
+        position = 0
+        for match in self._build_variables_pattern(variables).finditer(self._mmap):
+            for chunk in self._iter_segment(position, match.start()):
+                yield chunk
+            found_variables.add(match.group(0))
+            yield encoded_values[match.group(0)]
+            position = match.end()
+        for chunk in self._iter_segment(position, len(self._mmap)):
+            yield chunk
+
+    def render_to(self, output, variables):
+        # type: (io.BufferedIOBase, dict) -> int
+        """Renders the template into a binary output stream
+        (ex. io.BytesIO or a file opened with 'wb')
+
+        :param output: binary stream in which the rendered template is written
+        :param variables: dictionary with the template variables
+        :return: number of bytes written
+        """
+        written = 0
+        for chunk in self.iter_chunks(variables):
+            output.write(chunk)
+            written += len(chunk)
+        return written
+
+
 class VariableMappingFile(DataFile):
     """
     Object to contain variable mapping file abstraction.
@@ -132,10 +324,8 @@ class VariableMappingFile(DataFile):
         :return: None
         """
         # find all variables by regex
-        for match in re.finditer(
-                VariableMappingFile.REGEX_MAPPING_FORMAT,
-                self.get_file_content(),
-                re.MULTILINE
+        for match in VariableMappingFile.REGEX_MAPPING_FORMAT.finditer(
+                self.get_file_content()
         ):
             # load variables into dictionary (key:html_var, value:json_var)
             self._map_variable_dict[
@@ -7,9 +7,51 @@ Module to use utils from HTTP, like authentication
 import requests
 from requests.auth import HTTPBasicAuth
 
+from page_generator.utils import deadline_utils
+
 # https://www.iana.org/assignments/http-status-codes/http-status-codes.xhtml
 HTTP_CODE_OK = 200
 
+# default timeouts in seconds of the requests to the server
+DEFAULT_CONNECT_TIMEOUT = 10.0
+DEFAULT_READ_TIMEOUT = 60.0
+
+_DEFAULT_TIMEOUT = (DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT)
+
+
+def get_default_timeout():
+    # type: () -> tuple
+    """Returns the (connect, read) timeout used by the requests
+    that do not set their own timeout
+    """
+    return _DEFAULT_TIMEOUT
+
+
+def set_default_timeout(connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                        read_timeout=DEFAULT_READ_TIMEOUT):
+    # type: ([float], [float]) -> None
+    """Sets the (connect, read) timeout used by the requests
+    that do not set their own timeout (None to wait forever)
+    """
+    global _DEFAULT_TIMEOUT
+    _DEFAULT_TIMEOUT = (connect_timeout, read_timeout)
+
+
+def get_request_timeout(timeout=None):
+    # type: ([tuple]) -> tuple
+    """Returns the (connect, read) timeout of a request,
+    bounded by the deadline of the current job if it has one
+
+    :param timeout: (connect, read) timeout, if None the default one
+    :raises DeadlineExceeded: if the deadline of the job passed
+    """
+    timeout = timeout or get_default_timeout()
+    current_deadline = deadline_utils.get_deadline()
+    if current_deadline is None:
+        return timeout
+    current_deadline.check('request')
+    return current_deadline.get_timeout(timeout)
+
 
 class Auth(object):
     """Main Class for HTTP utils
@@ -19,21 +61,24 @@ class Auth(object):
         pass
 
     @staticmethod
-    def authenticate(host, user, password):
-        # type: (str, str, str) -> bool
+    def authenticate(host, user, password, timeout=None):
+        # type: (str, str, str, [tuple]) -> bool
         """Performs an HTTP GET request into the host given
         with the user and password
 
         :param host: server host to make http request
         :param user: name of the user
         :param password: password of the user
+        :param timeout: (connect, read) timeout in seconds,
+            if None the default timeout is used
         :return: True if authentication has succeeded.
         Otherwise, returns False
         """
         # Test User Authentication at Host
         auth_request = requests.get(
             host,
-            auth=HTTPBasicAuth(user, password)
+            auth=HTTPBasicAuth(user, password),
+            timeout=get_request_timeout(timeout)
         )
         # Check HTTP code status
         if auth_request.status_code != HTTP_CODE_OK:
@@ -6,6 +6,49 @@ Module to manage json utilities for files in json format
 
 import os
 import json
+import codecs
+
+# placeholder used to locate the streamed value inside a json envelope
+_STREAM_PLACEHOLDER = "__page_generator_streamed_value__"
+
+
+def iter_json_chunks(json_envelope, value_path, value_chunks, encoding='utf-8'):
+    # type: (dict, list[str], Iterable, [str]) -> Iterator[bytes]
+    """Serializes a json envelope into encoded byte chunks where the
+    string value located at 'value_path' is taken from a stream of chunks.
+
+    The streamed value is json escaped chunk by chunk, so the whole
+    value never needs to be built in memory.
+
+    ex. iter_json_chunks({'body': {'value': None}}, ['body', 'value'], chunks)
+
+    :param json_envelope: dictionary with the json data, the value
+        at 'value_path' will be replaced with the streamed content
+    :param value_path: list of keys to reach the streamed value
+    :param value_chunks: iterable of str or bytes chunks with the value
+    :param encoding: encoding of bytes chunks and of the output
+    :return: generator of encoded json chunks
+    """
+    # set the placeholder in the (small) envelope to split it
+    container = json_envelope
+    for key in value_path[:-1]:
+        container = container[key]
+    container[value_path[-1]] = _STREAM_PLACEHOLDER
+    prefix, suffix = json.dumps(json_envelope).split(
+        json.dumps(_STREAM_PLACEHOLDER), 1)
+
+    decoder = codecs.getincrementaldecoder(encoding)()
+    yield (prefix + '"').encode(encoding)
+    for chunk in value_chunks:
+        if isinstance(chunk, bytes):
+            chunk = decoder.decode(chunk)
+        if chunk:
+            yield json.dumps(chunk)[1:-1].encode(encoding)
+    # flush any incomplete character left in the decoder
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield json.dumps(tail)[1:-1].encode(encoding)
+    yield ('"' + suffix).encode(encoding)
 
 
 class JsonDataFile(object):
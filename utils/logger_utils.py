@@ -4,8 +4,82 @@
 Module to use custom logger utilities
 """
 
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
+import threading
+
+# handlers attached by the Logger instances, per logger name:
+# logger name -> (console handler, file handler, listener or None)
+_LOGGER_HANDLERS = {}
+_LOGGER_HANDLERS_LOCK = threading.Lock()
+
+
+def create_file_handler(log_file_name, max_bytes=0, backup_count=0):
+    # type: (str, [int], [int]) -> logging.Handler
+    """Creates a file handler that opens the file on the first record.
+    If max_bytes is set, the file is rotated when it reaches that size.
+
+    :param log_file_name: name of the logging file
+    :param max_bytes: maximum size of the file before rotating it
+        (0 disables rotation)
+    :param backup_count: number of rotated files to keep
+    :return: file handler
+    """
+    if max_bytes:
+        return logging.handlers.RotatingFileHandler(
+            log_file_name, maxBytes=max_bytes, backupCount=backup_count, delay=True)
+    return logging.FileHandler(log_file_name, delay=True)
+
+
+def start_queue_logging(target_logger, handlers):
+    # type: (logging.Logger, list[logging.Handler]) -> logging.handlers.QueueListener
+    """Moves the I/O of the given handlers to a background thread:
+    the logger only puts records into a queue and a listener thread
+    writes them with the handlers, so logging does not block the caller.
+
+    The listener is stopped (and the queue flushed) at exit, or before
+    by calling its 'stop' method.
+
+    :param target_logger: logger instance to attach the queue handler to
+    :param handlers: handlers that will write the records
+    :return: QueueListener instance already started
+    """
+    record_queue = queue.Queue(-1)
+    for handler in handlers:
+        if handler in target_logger.handlers:
+            target_logger.removeHandler(handler)
+    target_logger.addHandler(logging.handlers.QueueHandler(record_queue))
+    # respect_handler_level: every handler keeps its own level
+    listener = _QueueListener(record_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+class _QueueListener(logging.handlers.QueueListener):
+    """QueueListener that can be stopped more than once
+    (ex. by its owner and at exit)
+    """
+
+    def __init__(self, record_queue, *handlers, **kwargs):
+        super(_QueueListener, self).__init__(record_queue, *handlers, **kwargs)
+        self._running = False
+
+    def start(self):
+        # type: () -> None
+        super(_QueueListener, self).start()
+        self._running = True
+
+    def stop(self):
+        # type: () -> None
+        """Flushes the queue and stops the listener thread if it is running
+        """
+        if self._running:
+            self._running = False
+            super(_QueueListener, self).stop()
 
 
 class Logger(object):
@@ -37,43 +111,69 @@ class Logger(object):
             Logger.LOGGER_INSTANCE.set_module_name(name)
         return Logger.LOGGER_INSTANCE
 
-    def __init__(self, logger_name="Logger", log_file_name='logs.log', logger_format=None):
-        # type: ([str], [str], [str]) -> Logger
+    def __init__(self, logger_name="Logger", log_file_name='logs.log', logger_format=None,
+                 use_queue=False, max_bytes=0, backup_count=0):
+        # type: ([str], [str], [str], [bool], [int], [int]) -> Logger
         """Constructor method
 
         :param logger_name: name of the logger to identify
         :param log_file_name: name of the logging file
         :param logger_format: format for logging
             if None, use default logging format set
+        :param use_queue: if True, records are written by a background
+            thread so logging does not block the caller
+        :param max_bytes: maximum size of the logging file before
+            rotating it (0 disables rotation)
+        :param backup_count: number of rotated logging files to keep
         """
         # create logger
         self._logger = logging.getLogger(logger_name)  # logger
         self._logger.setLevel(logging.DEBUG)
 
+        # handlers are created and added only once per logger name,
+        # otherwise every new instance would duplicate the logged records
+        with _LOGGER_HANDLERS_LOCK:
+            if logger_name not in _LOGGER_HANDLERS:
+                _LOGGER_HANDLERS[logger_name] = self._add_handlers(
+                    log_file_name, logger_format, use_queue, max_bytes, backup_count)
+            self._ch_handler, self._fl_handler, self._listener = _LOGGER_HANDLERS[logger_name]
+
+        self._logger_name = logger_name
+
+        # handling in case of an error (exit or exception)
+        self._exit_on_error = True
+
+    def _add_handlers(self, log_file_name, logger_format, use_queue, max_bytes, backup_count):
+        # type: (str, [str], bool, int, int) -> tuple
+        """Creates the console and file handlers and adds them to the logger
+
+        :param log_file_name: name of the logging file
+        :param logger_format: format for logging
+            if None, use default logging format set
+        :param use_queue: if True, records are written by a background thread
+        :param max_bytes: maximum size of the logging file before rotating it
+        :param backup_count: number of rotated logging files to keep
+        :return: console handler, file handler and listener (None without queue)
+        """
         # configure file handler
-        self._fl_handler = logging.FileHandler(log_file_name)
-        self._fl_handler_format = logging.Formatter(Logger.DEFAULT_FL_HANDLER_FORMAT)
-        self._fl_handler.setFormatter(self._fl_handler_format)
+        fl_handler = create_file_handler(log_file_name, max_bytes, backup_count)
+        fl_handler.setFormatter(logging.Formatter(Logger.DEFAULT_FL_HANDLER_FORMAT))
 
         # configure console handler
-        self._ch_handler = logging.StreamHandler()
-        self._ch_handler.setLevel(logging.DEBUG)
-
-        # create formatter
+        ch_handler = logging.StreamHandler()
+        ch_handler.setLevel(logging.DEBUG)
         if logger_format is None:
-            self._format = logging.Formatter(Logger.DEFAULT_FORMAT)
+            ch_handler.setFormatter(logging.Formatter(Logger.DEFAULT_FORMAT))
         else:
-            self._format = logging.Formatter(logger_format)
-        self._ch_handler.setFormatter(self._format)
-
-        # add handlers
-        self._logger.addHandler(self._ch_handler)
-        self._logger.addHandler(self._fl_handler)
-
-        self._logger_name = logger_name
+            ch_handler.setFormatter(logging.Formatter(logger_format))
 
-        # handling in case of an error (exit or exception)
-        self._exit_on_error = True
+        listener = None
+        if use_queue:
+            listener = start_queue_logging(self._logger, [ch_handler, fl_handler])
+        else:
+            self._logger.addHandler(ch_handler)
+            self._logger.addHandler(fl_handler)
+        return ch_handler, fl_handler, listener
 
     def set_module_name(self, module_name):
         """Sets the module name as the logger name
@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module with the metrics collected for the HTTP requests
+done to the Confluence REST API (latency, bytes, status codes, connections)
+"""
+
+import collections
+import json
+import re
+import threading
+
+# latency histogram buckets upper bounds (seconds)
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# file extensions exported in prometheus text format
+PROMETHEUS_EXTENSIONS = ('.prom', '.txt')
+
+# ids inside REST API paths, ex. content/102948555 -> content/{id}
+_ID_IN_PATH = re.compile(r'/\d+(?=/|$)')
+
+
+def normalize_endpoint(path):
+    # type: (str) -> str
+    """Returns the endpoint of an API path without the ids in it
+    so requests to different pages are aggregated
+
+    ex. 'content/102948555/child/page' -> 'content/{id}/child/page'
+    """
+    return _ID_IN_PATH.sub('/{id}', '/' + path.strip('/'))[1:]
+
+
+class LatencyHistogram(object):
+    """Cumulative histogram of latencies with fixed buckets
+    """
+
+    def __init__(self, buckets=DEFAULT_LATENCY_BUCKETS):
+        # type: ([tuple]) -> LatencyHistogram
+        self._buckets = tuple(buckets)
+        self._counts = [0] * (len(self._buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+
+    @property
+    def count(self):
+        # type: () -> int
+        """Returns the number of observed values
+        """
+        return self._count
+
+    @property
+    def total(self):
+        # type: () -> float
+        """Returns the sum of the observed values
+        """
+        return self._sum
+
+    def observe(self, value):
+        # type: (float) -> None
+        """Adds a value to the histogram
+        """
+        index = 0
+        for index, upper_bound in enumerate(self._buckets):
+            if value <= upper_bound:
+                break
+        else:
+            index = len(self._buckets)
+        self._counts[index] += 1
+        self._sum += value
+        self._count += 1
+
+    def cumulative_buckets(self):
+        # type: () -> list[tuple]
+        """Returns a list of (upper_bound, cumulative_count),
+        the last upper bound is '+Inf'
+        """
+        result = []
+        cumulative = 0
+        for upper_bound, count in zip(self._buckets + ('+Inf',), self._counts):
+            cumulative += count
+            result.append((upper_bound, cumulative))
+        return result
+
+    def to_dict(self):
+        # type: () -> dict
+        """Returns a dictionary representation of the histogram
+        """
+        return {
+            'count': self._count,
+            'sum': round(self._sum, 6),
+            'buckets': [[str(upper_bound), count]
+                        for upper_bound, count in self.cumulative_buckets()]
+        }
+
+
+class ClientMetrics(object):
+    """Thread-safe collector of the HTTP requests metrics of ConfluenceClient
+    instances: latency histograms per method and endpoint, bytes sent and
+    received, status codes and connection reuse.
+
+    Metrics can be exported as json or as prometheus text format.
+    """
+
+    def __init__(self, latency_buckets=DEFAULT_LATENCY_BUCKETS):
+        # type: ([tuple]) -> ClientMetrics
+        """Constructor method
+
+        :param latency_buckets: upper bounds in seconds of the latency histograms
+        """
+        self._latency_buckets = latency_buckets
+        self._lock = threading.Lock()
+        self._latencies = {}
+        self._bytes_sent = collections.Counter()
+        self._bytes_received = collections.Counter()
+        self._status_codes = collections.Counter()
+        self._counters = collections.Counter()
+
+    def observe_request(self, method, path, status_code, seconds,
+                        bytes_sent=0, bytes_received=0, new_connection=None):
+        # type: (str, str, int, float, [int], [int], [bool]) -> None
+        """Records the metrics of a completed HTTP request
+
+        :param method: HTTP method (ex. 'GET')
+        :param path: REST API path requested (ids are aggregated)
+        :param status_code: HTTP status code of the response
+            (None if no response was received)
+        :param seconds: duration of the request
+        :param bytes_sent: size of the request body
+        :param bytes_received: size of the response body
+        :param new_connection: True if a new connection was opened,
+            False if a pooled connection was reused, None if unknown
+        """
+        key = (method, normalize_endpoint(path))
+        with self._lock:
+            histogram = self._latencies.get(key)
+            if histogram is None:
+                histogram = self._latencies[key] = LatencyHistogram(self._latency_buckets)
+            histogram.observe(seconds)
+            self._bytes_sent[key] += bytes_sent
+            self._bytes_received[key] += bytes_received
+            self._status_codes[key + (status_code or 'error',)] += 1
+            if new_connection is not None:
+                self._counters[
+                    'connections_opened' if new_connection else 'connections_reused'] += 1
+
+    def increment(self, counter_name, value=1):
+        # type: (str, [int]) -> None
+        """Increments a general counter (ex. 'hedges_fired')
+        """
+        with self._lock:
+            self._counters[counter_name] += value
+
+    def get_counter(self, counter_name):
+        # type: (str) -> int
+        """Returns the value of a general counter
+        """
+        with self._lock:
+            return self._counters[counter_name]
+
+    def to_dict(self):
+        # type: () -> dict
+        """Returns a dictionary with all the metrics
+        """
+        with self._lock:
+            endpoints = []
+            for key in sorted(self._latencies):
+                method, endpoint = key
+                endpoints.append({
+                    'method': method,
+                    'endpoint': endpoint,
+                    'latency_seconds': self._latencies[key].to_dict(),
+                    'bytes_sent': self._bytes_sent[key],
+                    'bytes_received': self._bytes_received[key],
+                    'status_codes': dict(
+                        (str(status_key[2]), count)
+                        for status_key, count in sorted(self._status_codes.items(), key=str)
+                        if status_key[:2] == key)
+                })
+            return {
+                'requests': sum(histogram.count for histogram in self._latencies.values()),
+                'bytes_sent': sum(self._bytes_sent.values()),
+                'bytes_received': sum(self._bytes_received.values()),
+                'counters': dict(self._counters),
+                'endpoints': endpoints
+            }
+
+    def to_json(self):
+        # type: () -> str
+        """Returns the metrics as a json string
+        """
+        return json.dumps(self.to_dict(), indent=2, sort_keys=True)
+
+    def to_prometheus(self, prefix='page_generator'):
+        # type: ([str]) -> str
+        """Returns the metrics in prometheus text exposition format
+
+        :param prefix: prefix of the metric names
+        """
+        data = self.to_dict()
+        lines = [
+            '# HELP {0}_http_request_duration_seconds Confluence API request latency'.format(prefix),
+            '# TYPE {0}_http_request_duration_seconds histogram'.format(prefix)]
+        for endpoint in data['endpoints']:
+            labels = 'method="{method}",endpoint="{endpoint}"'.format(**endpoint)
+            latency = endpoint['latency_seconds']
+            for upper_bound, count in latency['buckets']:
+                lines.append('{0}_http_request_duration_seconds_bucket{{{1},le="{2}"}} {3}'.format(
+                    prefix, labels, upper_bound, count))
+            lines.append('{0}_http_request_duration_seconds_sum{{{1}}} {2}'.format(
+                prefix, labels, latency['sum']))
+            lines.append('{0}_http_request_duration_seconds_count{{{1}}} {2}'.format(
+                prefix, labels, latency['count']))
+        for metric, help_text in (('bytes_sent', 'request body bytes sent'),
+                                  ('bytes_received', 'response body bytes received')):
+            lines.append('# HELP {0}_http_{1}_total Confluence API {2}'.format(
+                prefix, metric, help_text))
+            lines.append('# TYPE {0}_http_{1}_total counter'.format(prefix, metric))
+            for endpoint in data['endpoints']:
+                lines.append('{0}_http_{1}_total{{method="{2}",endpoint="{3}"}} {4}'.format(
+                    prefix, metric, endpoint['method'], endpoint['endpoint'], endpoint[metric]))
+        lines.append('# HELP {0}_http_responses_total Confluence API responses '
+                     'by status code'.format(prefix))
+        lines.append('# TYPE {0}_http_responses_total counter'.format(prefix))
+        for endpoint in data['endpoints']:
+            for status_code, count in endpoint['status_codes'].items():
+                lines.append(
+                    '{0}_http_responses_total{{method="{1}",endpoint="{2}",code="{3}"}} {4}'.format(
+                        prefix, endpoint['method'], endpoint['endpoint'], status_code, count))
+        for counter_name, value in sorted(data['counters'].items()):
+            lines.append('# TYPE {0}_{1}_total counter'.format(prefix, counter_name))
+            lines.append('{0}_{1}_total {2}'.format(prefix, counter_name, value))
+        return '\n'.join(lines) + '\n'
+
+    def write(self, file_path):
+        # type: (str) -> None
+        """Writes the metrics into a file, in prometheus text format
+        for '.prom' and '.txt' files, otherwise in json format
+
+        :param file_path: path of the metrics file
+        """
+        if file_path.lower().endswith(PROMETHEUS_EXTENSIONS):
+            content = self.to_prometheus()
+        else:
+            content = self.to_json()
+        with open(file_path, 'w') as file_obj:
+            file_obj.write(content)
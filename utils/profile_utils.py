@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module to profile a whole run of the tool: cProfile hot functions report
+plus wall time and peak memory (tracemalloc) per phase
+"""
+
+import collections
+import contextlib
+import cProfile
+import io
+import pstats
+import threading
+import time
+import tracemalloc
+
+
+class PhaseProfiler(object):
+    """Profiles a run with cProfile and measures wall time and peak memory
+    of every phase.
+
+    Phases are the spans of the application tracer (see trace_utils),
+    so this instance can be set as the application tracer to get the
+    numbers of each generation phase (load_config_file, authenticate,
+    setup_html_template, create_page...). Phases with the same name are
+    aggregated. Only spans of the thread that started the profiler are
+    measured, since memory peaks can not be attributed across threads.
+    Usage:
+
+    profiler = PhaseProfiler()
+    trace_utils.set_tracer(profiler)
+    with profiler:
+        ...
+    profiler.write_report('profile.txt', 'profile.prof')
+    """
+
+    enabled = True
+
+    def __init__(self, tracer=None, sort_key='cumulative', top_functions=40):
+        # type: ([trace_utils.Tracer], [str], [int]) -> PhaseProfiler
+        """Constructor method
+
+        :param tracer: Tracer instance which also records the spans
+            (ex. when a trace file is written too)
+        :param sort_key: pstats sort key of the hot functions report
+        :param top_functions: number of functions in the report
+        """
+        self._tracer = tracer
+        self._sort_key = sort_key
+        self._top_functions = top_functions
+        self._profile = cProfile.Profile()
+        self._thread_id = None
+        self._phase_stack = []
+        self._phases = collections.OrderedDict()
+        self._start_time = None
+        self._wall_seconds = None
+        self._peak_bytes = 0
+
+    def __enter__(self):
+        # type: () -> PhaseProfiler
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def start(self):
+        # type: () -> None
+        """Starts profiling and memory tracing
+        """
+        self._thread_id = threading.current_thread().ident
+        tracemalloc.start()
+        self._start_time = time.time()
+        self._profile.enable()
+
+    def stop(self):
+        # type: () -> None
+        """Stops profiling and memory tracing
+        """
+        self._profile.disable()
+        self._wall_seconds = time.time() - self._start_time
+        self._fold_peak()
+        tracemalloc.stop()
+
+    def _fold_peak(self):
+        # type: () -> None
+        """Adds the memory peak since the last reset to all open phases
+        and resets the peak, so nested phases get their own peaks
+        """
+        if not tracemalloc.is_tracing():
+            return
+        peak = tracemalloc.get_traced_memory()[1]
+        self._peak_bytes = max(self._peak_bytes, peak)
+        for phase in self._phase_stack:
+            phase['peak_bytes'] = max(phase['peak_bytes'], peak)
+        tracemalloc.reset_peak()
+
+    @contextlib.contextmanager
+    def span(self, name, **args):
+        # type: (str, **object) -> contextlib.AbstractContextManager
+        """Measures the code inside it as a phase (tracer interface)
+
+        :param name: name of the phase
+        :param args: values of the span (forwarded to the tracer)
+        """
+        measured = threading.current_thread().ident == self._thread_id
+        with contextlib.ExitStack() as exit_stack:
+            if self._tracer is not None:
+                exit_stack.enter_context(self._tracer.span(name, **args))
+            phase = None
+            if measured:
+                self._fold_peak()
+                phase = {'peak_bytes': 0}
+                self._phase_stack.append(phase)
+            start_time = time.time()
+            try:
+                yield
+            finally:
+                elapsed = time.time() - start_time
+                if measured:
+                    self._fold_peak()
+                    self._phase_stack.pop()
+                    totals = self._phases.setdefault(
+                        name, {'calls': 0, 'wall_seconds': 0.0, 'peak_bytes': 0})
+                    totals['calls'] += 1
+                    totals['wall_seconds'] += elapsed
+                    totals['peak_bytes'] = max(totals['peak_bytes'], phase['peak_bytes'])
+
+    @property
+    def phases(self):
+        # type: () -> dict
+        """Returns a dictionary with the totals of every phase:
+        calls, wall_seconds and peak_bytes
+        """
+        return self._phases
+
+    def format_phases(self):
+        # type: () -> str
+        """Returns a table with the wall time and peak memory per phase
+        """
+        lines = ['{0:<32} {1:>7} {2:>12} {3:>14}'.format(
+            'phase', 'calls', 'wall (s)', 'peak mem (KiB)')]
+        for name, totals in self._phases.items():
+            lines.append('{0:<32} {1:>7} {2:>12.4f} {3:>14.1f}'.format(
+                name, totals['calls'], totals['wall_seconds'], totals['peak_bytes'] / 1024.0))
+        if self._wall_seconds is not None:
+            lines.append('{0:<32} {1:>7} {2:>12.4f} {3:>14.1f}'.format(
+                'total', 1, self._wall_seconds, self._peak_bytes / 1024.0))
+        return '\n'.join(lines)
+
+    def format_hot_functions(self):
+        # type: () -> str
+        """Returns the cProfile report of the hottest functions
+        """
+        stream = io.StringIO()
+        stats = pstats.Stats(self._profile, stream=stream)
+        stats.sort_stats(self._sort_key).print_stats(self._top_functions)
+        return stream.getvalue()
+
+    def write_report(self, report_file, raw_profile_file):
+        # type: (str, str) -> None
+        """Writes the phases and hot functions report as text
+        and the raw profile data (readable with pstats or snakeviz)
+
+        :param report_file: path of the text report
+        :param raw_profile_file: path of the raw cProfile data
+        """
+        self._profile.dump_stats(raw_profile_file)
+        with open(report_file, 'w') as file_obj:
+            file_obj.write(self.format_phases())
+            file_obj.write('\n\n')
+            file_obj.write(self.format_hot_functions())
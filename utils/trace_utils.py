@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module with lightweight span tracing. Spans are written in the
+Chrome Trace Event format (json), which can be opened with trace viewers
+like Perfetto (https://ui.perfetto.dev) or chrome://tracing
+"""
+
+import contextlib
+import json
+import os
+import threading
+import time
+from functools import wraps
+
+
+class NullTracer(object):
+    """Tracer used when tracing is disabled, spans do nothing
+    """
+
+    enabled = False
+
+    @contextlib.contextmanager
+    def _null_span(self):
+        yield
+
+    def span(self, name, **args):
+        # type: (str, **object) -> contextlib.AbstractContextManager
+        """Returns a context manager that does not record anything
+        """
+        return self._null_span()
+
+
+class Tracer(object):
+    """Records spans (name, start, duration, thread, arguments)
+    as complete events of the Chrome Trace Event format.
+
+    Spans opened inside other spans in the same thread are nested,
+    so every page generation gets its own tree of spans.
+    Usage:
+
+    tracer = Tracer()
+    with tracer.span('page', title='My Page'):
+        with tracer.span('create_page'):
+            ...
+    tracer.write('trace.json')
+    """
+
+    enabled = True
+
+    def __init__(self):
+        # type: () -> Tracer
+        self._events = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._pid = os.getpid()
+        self._start_time = time.time()
+        self._thread_names = {}
+
+    @contextlib.contextmanager
+    def span(self, name, **args):
+        # type: (str, **object) -> contextlib.AbstractContextManager
+        """Context manager that records a span for the code inside it
+
+        :param name: name of the span (ex. 'create_page')
+        :param args: values attached to the span (ex. page title)
+        """
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(name)
+        start_time = time.time()
+        error = None
+        try:
+            yield
+        except BaseException as ex:
+            error = ex
+            raise
+        finally:
+            end_time = time.time()
+            stack.pop()
+            thread = threading.current_thread()
+            event = {
+                'name': name,
+                'cat': stack[0] if stack else name,
+                'ph': 'X',
+                'ts': int((start_time - self._start_time) * 1000000),
+                'dur': int((end_time - start_time) * 1000000),
+                'pid': self._pid,
+                'tid': thread.ident,
+                'args': dict((key, str(value)) for key, value in args.items())
+            }
+            if error is not None:
+                event['args']['error'] = repr(error)
+            with self._lock:
+                self._events.append(event)
+                self._thread_names[thread.ident] = thread.name
+
+    @property
+    def events(self):
+        # type: () -> list[dict]
+        """Returns a copy of the recorded trace events
+        """
+        with self._lock:
+            return list(self._events)
+
+    def to_dict(self):
+        # type: () -> dict
+        """Returns the trace in Chrome Trace Event format
+        """
+        with self._lock:
+            metadata = [{
+                'name': 'thread_name', 'ph': 'M', 'pid': self._pid, 'tid': tid,
+                'args': {'name': thread_name}
+            } for tid, thread_name in self._thread_names.items()]
+            events = sorted(self._events, key=lambda event: event['ts'])
+        return {'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}
+
+    def write(self, file_path):
+        # type: (str) -> None
+        """Writes the trace into a json file that can be opened
+        with a trace viewer
+
+        :param file_path: path of the trace file
+        """
+        with open(file_path, 'w') as file_obj:
+            json.dump(self.to_dict(), file_obj)
+
+
+# tracer instance used by the application, tracing is disabled by default
+_TRACER = NullTracer()
+
+
+def get_tracer():
+    # type: () -> Tracer
+    """Returns the tracer instance used by the application
+    """
+    return _TRACER
+
+
+def set_tracer(tracer):
+    # type: ([Tracer]) -> None
+    """Sets the tracer instance used by the application
+
+    :param tracer: Tracer instance, if None tracing is disabled
+    """
+    global _TRACER
+    _TRACER = tracer if tracer is not None else NullTracer()
+
+
+def traced(span_name):
+    """Decorator for functions whose calls are recorded as spans
+    by the tracer of the application
+
+    :param span_name: name of the span
+    :return: function decorated
+    """
+    def decorator(function_to_decorate):
+        @wraps(function_to_decorate)
+        def wrapper(*args, **kwargs):
+            """Wrapper for decorated function
+            """
+            tracer = _TRACER
+            if not tracer.enabled:
+                return function_to_decorate(*args, **kwargs)
+            with tracer.span(span_name):
+                return function_to_decorate(*args, **kwargs)
+        return wrapper
+    return decorator